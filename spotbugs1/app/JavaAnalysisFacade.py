@@ -1,12 +1,14 @@
+import contextlib
 import glob
 import os
 import json
 import re
 import shutil
+import threading
 import time
-from typing import Dict, List, Tuple, Optional
+from typing import Callable, Dict, List, Tuple, Optional
 from app.services.CodeFetcher import CodeFetcher
-from app.services.BugAnalyzer import BugAnalyzer
+from app.services.BugAnalyzer import BugAnalyzer, normalize_source_path
 from app.services.LLMModel import LLMModel
 from app.services.SolutionApplier import SolutionApplier
 from app.services.Validator import Validator
@@ -15,7 +17,18 @@ from app.services.MetricAnalyzer import CKMetricsAnalyzer
 from app.services.MetricAnalyzer import SolutionMetricsAnalyzer
 from app.services.MetricAnalyzer import organize_ck_outputs
 from app.services.BuildSystemManager import BuildSystemManager
+from app.services.AnalysisCache import AnalysisCache, digest_text
+from app.services.AnalysisStore import AnalysisStore
+from app.services.CacheBackend import CacheBackend, create_cache_backend
+from app.services.ClassFindingsCache import ClassFindingsCache
+from app.services.RepositoryWarmer import RepositoryWarmer
+from app.services.SingleFlight import SingleFlight
+from app.services.ToolHostClient import get_tool_host
+from app.services.ProgressReporter import ProgressReporter, as_reporter
+from app.services.WorkspaceManager import Workspace
 from app.config import OUTPUT_DIR, GITHUB_TOKEN, BIN_DIR, SPOTBUGS_PATH, SPOTBUGS_REPORT_PATH, GOOGLE_FORMATTER_PATH, REPO_ROOT_DIR, PMD_PATH, PMD_RULESET_PATH, PMD_REPORT_PATH  # Added PMD paths
+from app.config import ANALYSIS_CACHE_MAX_ENTRIES, ANALYSIS_STORE_PATH, CACHE_BACKEND_URL, CACHE_NAMESPACE_TTLS, SPOTBUGS_CLASS_CACHE_MAX_ENTRIES, WARMUP_ENABLED
+from app.config import SPOTBUGS_PROFILE, SPOTBUGS_LATENCY_TARGET_SECONDS
 
 
 class JavaAnalysisFacade:
@@ -27,44 +40,136 @@ class JavaAnalysisFacade:
                  pmd_path: str = PMD_PATH,  # PMD re-enabled
                  pmd_ruleset_path: str = PMD_RULESET_PATH,
                  pmd_report_path: str = PMD_REPORT_PATH,
-                 llm_api_key: Optional[str] = None):
-        """Initialize the facade with all necessary components."""
+                 llm_api_key: Optional[str] = None,
+                 analysis_store_path: Optional[str] = ANALYSIS_STORE_PATH,
+                 cache_backend_url: Optional[str] = CACHE_BACKEND_URL,
+                 enable_warmup: bool = WARMUP_ENABLED,
+                 workspace: Optional[Workspace] = None,
+                 analysis_store: Optional[AnalysisStore] = None,
+                 cache_backend: Optional[CacheBackend] = None):
+        """
+        Initialize the facade with all necessary components.
+
+        With a workspace, every directory the services write to comes from it
+        instead of the shared defaults, so facades for different sessions can
+        run side by side. A store and cache backend can be passed in to share
+        them between those facades.
+        """
+
+        self.workspace = workspace
+        if workspace:
+            output_dir = workspace.clone_dir
+            bin_dir = workspace.bin_dir
+            repo_root_dir = workspace.clone_dir
+            self.report_dir = workspace.report_dir
+            self.temp_ck_dir = workspace.temp_ck_dir
+            self.ck_solutions_dir = workspace.ck_solutions_dir
+            ck_output_dir = workspace.ck_output_dir
+            pmd_cache_dir = workspace.pmd_cache_dir
+            build_cache_dir = workspace.build_cache_dir
+            cache_scope = workspace.id
+        else:
+            repo_root_dir = REPO_ROOT_DIR
+            self.report_dir = output_dir
+            self.temp_ck_dir = "temp_ck"
+            self.ck_solutions_dir = "ck_output_solutions"
+            ck_output_dir = None
+            # Inside the clone so they go with it, hidden from the build fingerprint
+            pmd_cache_dir = os.path.join(output_dir, ".pmd_cache")
+            build_cache_dir = os.path.join(output_dir, ".build_cache")
+            cache_scope = ""
 
         self.output_dir = output_dir
         self.bin_dir = bin_dir
         self.repo_name = None  # Store repository name
 
-        # Clean bin directory on initialization
-        self._clean_bin_directory()
+        # A workspace's bin directory is shared with the facades of other
+        # workers, so it is only cleaned when a repository is cloned into it
+        if not workspace:
+            self._clean_bin_directory()
+
+        # Warm JVM shared by all Java tools; None falls back to a JVM per run
+        self.tool_host = get_tool_host()
+
+        # Cache backend shared by the analysis, metrics and SpotBugs class caches
+        self.cache_backend = cache_backend or create_cache_backend(
+            cache_backend_url, CACHE_NAMESPACE_TTLS,
+            {AnalysisCache.NAMESPACE: ANALYSIS_CACHE_MAX_ENTRIES,
+             ClassFindingsCache.NAMESPACE: SPOTBUGS_CLASS_CACHE_MAX_ENTRIES})
 
         # Initialize components
         self.github_fetcher = CodeFetcher(
             self.repo_name, output_dir, github_token)
         self.spotbugs_analyzer = BugAnalyzer(
-            output_dir, bin_dir, spotbugs_path, REPO_ROOT_DIR)
+            output_dir, bin_dir, spotbugs_path, repo_root_dir, self.tool_host,
+            ClassFindingsCache(self.cache_backend))
         self.llm_model = LLMModel(llm_api_key) if llm_api_key else None
-        self.solution_applier = SolutionApplier(GOOGLE_FORMATTER_PATH)
+        self.solution_applier = SolutionApplier(
+            GOOGLE_FORMATTER_PATH, output_dir if workspace else "cloned_repo", self.temp_ck_dir,
+            self.tool_host)
         self.pmd_analyzer = PMDAnalyzer(  # PMD re-enabled
-            pmd_path, pmd_ruleset_path, pmd_report_path)
+            pmd_path, pmd_ruleset_path, pmd_report_path, self.tool_host, pmd_cache_dir)
         self.build_system_manager = BuildSystemManager(
-            output_dir, bin_dir, spotbugs_path, REPO_ROOT_DIR)
+            output_dir, bin_dir, spotbugs_path, repo_root_dir, self.tool_host, build_cache_dir)
+        # SpotBugs sees the modules that are not built into bin_dir through the same list
+        self.spotbugs_analyzer.aux_classpath = self.build_system_manager.aux_classpath
+        self.spotbugs_analyzer.source_roots = self.build_system_manager.source_roots
         self.validator = Validator(
             output_dir, bin_dir, spotbugs_path, self.spotbugs_analyzer,
-            self.pmd_analyzer, self.build_system_manager)  # Added build_system_manager
-        self.ck_metrics = CKMetricsAnalyzer()
-        self.solution_metrics = SolutionMetricsAnalyzer()
+            self.pmd_analyzer, self.build_system_manager,  # Added build_system_manager
+            report_dir=self.report_dir)
+        # On-disk results shared by all workers (disabled when no path is configured)
+        if analysis_store is None and analysis_store_path:
+            analysis_store = AnalysisStore(analysis_store_path)
+        self.analysis_store = analysis_store
+        self.ck_metrics = CKMetricsAnalyzer(
+            store=self.analysis_store, cache_backend=self.cache_backend,
+            src_dir=output_dir if workspace else None, output_dir=ck_output_dir,
+            cache_scope=cache_scope, tool_host=self.tool_host)
+        self.solution_metrics = SolutionMetricsAnalyzer(
+            store=self.analysis_store, cache_backend=self.cache_backend,
+            output_root=self.ck_solutions_dir, cache_scope=cache_scope, tool_host=self.tool_host)
         # Load bug descriptions
         self.bug_descriptions = self._load_bug_descriptions()
 
-        # Add cache for bugs and metrics
-        self._bugs_cache = {}
-        self._metrics_cache = {}
-        self._last_analysis_time = {}
-        self._cache_timeout = 300  # 5 minutes cache timeout
+        # Cache for bugs and metrics, keyed on file contents and tool configuration
+        self.analysis_cache = AnalysisCache(
+            ANALYSIS_CACHE_MAX_ENTRIES, self.cache_backend, scope=cache_scope)
 
         # Add persistent cache for initial metrics
         self._initial_metrics_cache = {}
 
+        # Background pre-analysis of newly cloned repositories
+        self.enable_warmup = enable_warmup
+        self.warmer = RepositoryWarmer(self)
+
+        # Repository-level SpotBugs results, keyed by normalized source path
+        self._spotbugs_index = None
+        # Bumped on every invalidation so a run that started earlier cannot
+        # publish results for class files that have since changed
+        self._spotbugs_generation = 0
+        self._spotbugs_run_lock = threading.Lock()
+        # Profile the current index was built with, and the background deep pass
+        self._spotbugs_profile = None
+        self.spotbugs_profile = SPOTBUGS_PROFILE
+        self.spotbugs_latency_target = SPOTBUGS_LATENCY_TARGET_SECONDS
+        self._deep_pass = None
+        self._deep_pass_lock = threading.Lock()
+
+        # Concurrent identical requests share one computation
+        self._inflight = SingleFlight()
+        self._spotbugs_report_path = self.validator.repository_report_path
+
+        # Repository cloned into the workspace, possibly by another worker
+        self._state_path = os.path.join(self.report_dir, "repository.json") if workspace else None
+        # Per-file state shared with them: initial metrics and pre-patch digests
+        self._file_state_dir = self.report_dir if workspace else None
+        self._pre_patch_digests = {}
+        self._state_mtime = None
+        # Generation at which the deep report on disk may be indexed as is
+        self._report_generation = None
+        self._sync_repository_state()
+
     def _clean_bin_directory(self):
         """Clean the bin directory by removing all .class files and subdirectories."""
         try:
@@ -92,13 +197,17 @@ class JavaAnalysisFacade:
         except Exception as e:
             print(f"[ERROR] Failed to clean bin directory: {e}")
 
-    def analyze_github_repository(self, github_url: str) -> List[Dict]:
-        """Fetch Java files from a GitHub repository."""
+    def analyze_github_repository(self, github_url: str, progress: Optional[Callable] = None) -> List[Dict]:
+        """Fetch Java files from a GitHub repository, reporting stages to an optional progress listener."""
+        reporter = as_reporter(progress)
         # Extract repository details
         repo_name, file_path = CodeFetcher.extract_repo_details(github_url)
         if not repo_name:
             raise ValueError("Invalid GitHub URL")
 
+        # Stop warming the previous repository before its files disappear
+        self.warmer.stop()
+
         # Store repository name
         self.repo_name = repo_name
 
@@ -108,9 +217,16 @@ class JavaAnalysisFacade:
         # Clear and prepare directories
         self.github_fetcher.cleanup_directory(self.output_dir)
         self._clean_bin_directory()  # Clean bin directory before cloning new repo
+        # Incremental validation merges into this report, so it must not outlive the clone
+        if os.path.exists(self._spotbugs_report_path):
+            os.remove(self._spotbugs_report_path)
+        if self._file_state_dir:
+            for kind in ("initial_metrics", "pre_patch"):
+                shutil.rmtree(os.path.join(self._file_state_dir, kind), ignore_errors=True)
 
         # Clone the repository
-        self.github_fetcher.clone_repo()
+        with reporter.stage("clone", repo=repo_name):
+            self.github_fetcher.clone_repo()
 
         # Check if it's a fork and set up upstream if needed
         if self.github_fetcher.is_fork():
@@ -118,82 +234,232 @@ class JavaAnalysisFacade:
             if not self.github_fetcher.setup_upstream():
                 print("[WARNING] Failed to set up upstream remote")
 
+        commit_sha = self.github_fetcher.current_commit_sha()
+        self._set_repository(repo_name, commit_sha)
+        self._save_repository_state(repo_name, commit_sha)
+
+        # Fetch files
+        java_files = self.github_fetcher.fetch_java_files_from_local_clone()
+
+        # Start filling the caches before the user opens the first file
+        if self.enable_warmup:
+            self.warmer.start(self.list_java_files())
+
+        return java_files
+
+    def _set_repository(self, repo_name: Optional[str], commit_sha: Optional[str]):
+        """Reset the per-repository state for a newly cloned repository."""
+        self.repo_name = repo_name
+        self.github_fetcher.repo_name = repo_name
+        # Record where stored results come from
+        for analyzer in (self.ck_metrics, self.solution_metrics):
+            analyzer.repo_name = repo_name
+            analyzer.commit_sha = commit_sha
+
         # Clear the initial metrics cache when analyzing a new repo
         self._initial_metrics_cache.clear()
+        self._pre_patch_digests.clear()
         print("[CACHE] Cleared initial metrics cache for new repository analysis.")
+        self._invalidate_spotbugs_index()
 
-        # Fetch files
-        return self.github_fetcher.fetch_java_files_from_local_clone()
+        # Symbols of the previous clone no longer describe the sources
+        self.build_system_manager.symbol_index.invalidate()
 
-    def analyze_file(self, filename: str, tool: str = 'spotbugs') -> Tuple[str, List[Dict], int, List[Dict]]:
-        """Analyze a Java file for bugs using the specified tool."""
-        print(PMD_PATH)
+    def _save_repository_state(self, repo_name: str, commit_sha: Optional[str]):
+        """Record the cloned repository in the workspace for the facades of other workers."""
+        if not self._state_path:
+            return
+        try:
+            os.makedirs(self.report_dir, exist_ok=True)
+            tmp_path = f"{self._state_path}.{os.getpid()}"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"repo_name": repo_name, "commit_sha": commit_sha}, f)
+            os.replace(tmp_path, self._state_path)
+            self._state_mtime = os.stat(self._state_path).st_mtime_ns
+        except OSError as e:
+            print(f"[WARNING] Could not save repository state: {e}")
+
+    def _sync_repository_state(self):
+        """Adopt the repository another worker cloned into the workspace since this facade last looked."""
+        if not self._state_path:
+            return
+        try:
+            mtime = os.stat(self._state_path).st_mtime_ns
+            if mtime == self._state_mtime:
+                return
+            with open(self._state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        self._state_mtime = mtime
+        repo_name, commit_sha = state.get("repo_name"), state.get("commit_sha")
+        if (repo_name, commit_sha) == (self.repo_name, self.ck_metrics.commit_sha):
+            return
+        print(f"[INFO] Using {repo_name} already cloned into workspace {self.workspace.id}")
+        self._set_repository(repo_name, commit_sha)
+        self.github_fetcher.local_repo_path = self.output_dir
+        self.github_fetcher.repo = None
+        # Its classes are already built, so the deep report left beside them still holds
+        self._report_generation = self._spotbugs_generation
+
+    def _load_file_state(self, kind: str, filename: str):
+        """Per-file state of the given kind saved in the workspace by any worker, or None."""
+        if not self._file_state_dir:
+            return None
+        path = os.path.join(self._file_state_dir, kind, os.path.basename(filename) + ".json")
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_file_state(self, kind: str, filename: str, value):
+        if not self._file_state_dir:
+            return
+        path = os.path.join(self._file_state_dir, kind, os.path.basename(filename) + ".json")
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(value, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[WARNING] Could not save {kind} of {os.path.basename(filename)}: {e}")
+
+    def _initial_metrics(self, filename: str) -> Optional[Dict]:
+        """Metrics of a file before any solution was applied, as first calculated by any worker."""
+        base_filename = os.path.basename(filename)
+        metrics = self._initial_metrics_cache.get(base_filename)
+        if metrics is None:
+            metrics = self._load_file_state("initial_metrics", base_filename)
+            if metrics is not None:
+                self._initial_metrics_cache[base_filename] = metrics
+        return metrics
+
+    def _store_initial_metrics(self, filename: str, metrics: Dict):
+        base_filename = os.path.basename(filename)
+        self._initial_metrics_cache[base_filename] = metrics
+        self._save_file_state("initial_metrics", base_filename, metrics)
+
+    def _remember_pre_patch_digest(self, filename: str, digest: Optional[str]):
+        """Record the contents a solution is applied to, whose cached results still describe the file."""
+        if digest is None:
+            return
+        self._pre_patch_digests[os.path.basename(filename)] = digest
+        self._save_file_state("pre_patch", filename, digest)
+
+    def _pre_patch_digest(self, filename: str) -> Optional[str]:
+        """Digest of the file before the last solution applied to it, by any worker."""
+        return self._load_file_state("pre_patch", filename) or self._pre_patch_digests.get(
+            os.path.basename(filename))
+
+    def get_warmup_status(self) -> Dict:
+        """Report which files of the current repository are already analyzed."""
+        return self.warmer.status()
+
+    def _workspace_key(self) -> str:
+        return self.workspace.id if self.workspace else os.path.abspath(self.output_dir)
+
+    def analyze_file(self, filename: str, tool: str = 'spotbugs', progress: Optional[Callable] = None,
+                     profile: Optional[str] = None) -> Tuple[str, List[Dict], int, List[Dict]]:
+        """
+        Analyze a Java file for bugs using the specified tool, reporting stages to an optional progress listener.
+
+        profile overrides the SpotBugs profile ("quick", "deep" or "auto")
+        for this request. Concurrent calls for the same workspace, file
+        contents, tool and profile share one analysis instead of each
+        starting their own JVMs.
+        """
+        reporter = as_reporter(progress)
+        self._sync_repository_state()
         try:
-            # Get file content first
             file_path = os.path.join(self.output_dir, filename)
             with open(file_path, 'r') as f:
                 content = f.read()
+        except Exception as e:
+            print(f"[ERROR] Unexpected error during analysis: {str(e)}")
+            return "", [], 0, []
 
-            # Generate unique report paths for each file and tool
-            report_filename = f"{tool}_report_{os.path.basename(filename)}.xml"
-            report_path = os.path.join(self.output_dir, report_filename)
+        profile = self._requested_profile(profile)
+        key = ("analyze", self._workspace_key(),
+               digest_text(content), tool.lower(), profile)
+        (content, bugs, num_bugs, metrics), shared = self._inflight.do(
+            key, self._analyze_file, filename, tool, reporter, profile)
+        if shared:
+            # Callers must not mutate results they share with each other
+            bugs = [dict(bug) for bug in bugs]
+            metrics = [dict(row) for row in metrics]
+            reporter.emit("coalesced", filename=filename, tool=tool)
+            reporter.partial_results(tool, filename, bugs)
+        return content, bugs, num_bugs, metrics
+
+    def _analyze_file(self, filename: str, tool: str, reporter: ProgressReporter,
+                      profile: Optional[str] = None) -> Tuple[str, List[Dict], int, List[Dict]]:
+        try:
+            # Get file content first
+            file_path = os.path.join(self.output_dir, filename)
+            with open(file_path, 'r') as f:
+                content = f.read()
 
-            # Check if we need to compile (do this before cache check)
+            # Compile before the cache check; an unchanged source tree is
+            # answered from the build result cache without compiling
             needs_compilation = tool.lower() == 'spotbugs'
             if needs_compilation:
-                rel_path = os.path.relpath(file_path, self.output_dir)
-                class_file = os.path.join(
-                    self.bin_dir, rel_path.replace('.java', '.class'))
-
-                # Only recompile if class file doesn't exist
-                if not os.path.exists(class_file):
-                    print(
-                        f"[INFO] Class file not found, compiling {file_path}")
-                    try:
-                        if not self.build_system_manager.compile_java_files(file_path, self.bin_dir):
-                            error_msg = "Compilation failed. Cannot proceed with SpotBugs analysis."
-                            print(f"[ERROR] {error_msg}")
-                            return content, [], 0, []
-                    except RuntimeError as e:
-                        error_msg = str(e)
+                try:
+                    with reporter.stage("compile", filename=filename):
+                        compiled = self.build_system_manager.compile_java_files(
+                            file_path, self.bin_dir, progress=reporter)
+                    if not compiled:
+                        error_msg = "Compilation failed. Cannot proceed with SpotBugs analysis."
                         print(f"[ERROR] {error_msg}")
+                        for error in self.build_system_manager.last_errors:
+                            print(f"[ERROR] {error['file']}:{error['line']}: {error['message']}")
                         return content, [], 0, []
+                    if self.build_system_manager.outputs_changed:
+                        # New class files make the repository results stale
+                        self._invalidate_spotbugs_index()
+                except RuntimeError as e:
+                    error_msg = str(e)
+                    print(f"[ERROR] {error_msg}")
+                    return content, [], 0, []
 
             # Check cache after compilation
-            cached_bugs, cached_metrics = self._get_cached_data(filename, tool)
+            used_profile = self._spotbugs_lookup_profile(profile)
+            cached_bugs, cached_metrics = self._get_cached_data(
+                filename, tool, content, used_profile)
             if cached_bugs is not None:
+                reporter.partial_results(tool, filename, cached_bugs)
                 return content, cached_bugs, len(cached_bugs), cached_metrics
 
             # Handle different analysis tools
             if tool.lower() == 'pmd':
-                print(f"[INFO] Running PMD analysis on {file_path}")
-                self.pmd_analyzer.run_pmd_analysis(
-                    source_file=file_path, report_path=report_path)
-                bugs = self._get_file_bugs_pmd(filename, report_path)
+                bugs = self._get_file_bugs_pmd(filename, reporter)
             else:  # SpotBugs
-                print("[INFO] Running SpotBugs analysis")
-                self.spotbugs_analyzer.run_spotbugs_analysis(report_path)
-                bugs = self._get_file_bugs(filename, report_path)
+                bugs, used_profile = self._get_file_bugs(
+                    filename, reporter, profile)
 
             num_bugs = len(bugs)
 
             # Get metrics - Check initial cache first
             base_filename = os.path.basename(filename)
-            if base_filename in self._initial_metrics_cache:
+            metrics = self._initial_metrics(base_filename)
+            if metrics is not None:
                 print(
                     f"[CACHE] Using initial metrics from cache for {base_filename}")
-                metrics = self._initial_metrics_cache[base_filename]
             else:
                 print(
                     f"[METRICS] Calculating initial metrics for {base_filename}")
-                metrics_list = self.ck_metrics.get_original_metrics(
-                    filename)  # filename has path needed by CK
+                with reporter.stage("ck", filename=filename):
+                    # The SpotBugs and PMD analyses of a file both need its metrics
+                    metrics_list, _ = self._inflight.do(
+                        ("ck", self._workspace_key(), filename),
+                        self.ck_metrics.get_original_metrics, filename)  # filename has path needed by CK
                 metrics = metrics_list[0] if metrics_list else {}
                 if metrics and "error" not in metrics:
                     print(
                         f"[CACHE] Storing initial metrics for {base_filename}")
                     # Store in persistent cache
-                    self._initial_metrics_cache[base_filename] = metrics
+                    self._store_initial_metrics(base_filename, metrics)
                 else:
                     print(
                         f"[WARNING] Failed to calculate or invalid initial metrics for {base_filename}")
@@ -202,8 +468,9 @@ class JavaAnalysisFacade:
 
             print("[CKMetricsAnalyzer] Metrics Found:", metrics)
 
-            # Cache the results for time-based expiration
-            self._update_cache(filename, bugs, metrics, tool)
+            # Cache the results against the analyzed file contents
+            self._update_cache(filename, bugs, metrics,
+                               tool, content, used_profile)
 
             # Ensure metrics is returned as a list to match frontend expectations
             metrics_to_return = [
@@ -221,8 +488,8 @@ class JavaAnalysisFacade:
             raise ValueError("LLM API key not provided")
 
         # Create temp directories if needed
-        os.makedirs("temp_ck", exist_ok=True)
-        os.makedirs("ck_output_solutions", exist_ok=True)
+        os.makedirs(self.temp_ck_dir, exist_ok=True)
+        os.makedirs(self.ck_solutions_dir, exist_ok=True)
 
         file_content = bug_info.get("file_content")
         bug = bug_info.get("bug", {})
@@ -269,13 +536,16 @@ class JavaAnalysisFacade:
 
     def apply_solution(self, file_path: str, code_snippet: str, solution: str, solution_number: int = 1) -> Tuple[str, str, Dict]:
         """Apply a solution to fix a bug and calculate metrics for it."""
+        self._sync_repository_state()
         try:
             # Get the filename
             filename = os.path.basename(file_path)
 
-            # Clear ALL caches for this file before applying the solution
-            print(f"[DEBUG] Clearing caches for file: {filename}")
-            self.clear_cache_for_file(filename)
+            # Cached results are keyed on the file contents, so the patched
+            # file cannot hit them; they are kept so validation can report the
+            # file's other bugs
+            self._remember_pre_patch_digest(filename, self._file_digest(file_path))
+            self._invalidate_spotbugs_index()
 
             # Print debug info about what we're applying
             print(
@@ -291,12 +561,12 @@ class JavaAnalysisFacade:
 
             # Calculate metrics for the applied solution
             solution_dir = os.path.join(
-                "temp_ck", f"solution_{solution_number}")
+                self.temp_ck_dir, f"solution_{solution_number}")
             metrics_data = {}
 
             try:
                 # Retrieve initial metrics from the persistent cache
-                initial_metrics = self._initial_metrics_cache.get(filename, {})
+                initial_metrics = self._initial_metrics(filename) or {}
                 if not initial_metrics:
                     print(
                         f"[WARNING] Initial metrics not found in cache for {filename}. Comparison might be inaccurate.")
@@ -361,21 +631,49 @@ class JavaAnalysisFacade:
         - other_bugs: list - Any remaining bugs in the file
         - validation_message: str - Human readable message about the validation
         """
+        self._sync_repository_state()
         try:
-            # Get validation results from validator
-            validation_results = self.validator.validate_bug(
-                filename=filename,
-                bug_line=bug_line,
-                bug_type=bug_type,
-                bug_descriptions=self.bug_descriptions,
-                original_code=original_code,
-                patched_code=patched_code,
-                tool=tool
-            )
+            uses_spotbugs = tool.lower() != 'pmd'
+            # SpotBugs validation recompiles the patched file and rewrites the
+            # repository report, so it cannot overlap a repository run
+            with self._spotbugs_run_lock if uses_spotbugs else contextlib.nullcontext():
+                # Get validation results from validator
+                validation_results = self.validator.validate_bug(
+                    filename=filename,
+                    bug_line=bug_line,
+                    bug_type=bug_type,
+                    bug_descriptions=self.bug_descriptions,
+                    original_code=original_code,
+                    patched_code=patched_code,
+                    tool=tool
+                )
+                if uses_spotbugs:
+                    self._invalidate_spotbugs_index()
+                    if validation_results.get('repository_report_updated'):
+                        # The merged report already covers the patched classes
+                        self._spotbugs_index = self.spotbugs_analyzer.parse_spotbugs_index(
+                            self._spotbugs_report_path, self.bug_descriptions)
+                        self._spotbugs_profile = BugAnalyzer.DEEP
 
             # Extract results
             bug_fixed = validation_results['bug_fixed']
             other_bugs = validation_results['other_bugs']
+            other_bugs_checked = validation_results.get('other_bugs_checked', True)
+            if not other_bugs_checked:
+                # Only the target rule or detectors ran on the patched file;
+                # report the other bugs found since it was patched if it was
+                # analyzed, else before, else the next analysis reports them
+                other_bugs = []
+                for content_digest in (self._file_digest(filename), self._pre_patch_digest(filename)):
+                    cached_bugs = None
+                    if content_digest:
+                        cached_bugs, _ = self._get_cached_data(
+                            filename, tool.lower(), content_digest=content_digest)
+                    if cached_bugs is not None:
+                        other_bugs = [bug for bug in cached_bugs
+                                      if bug.get('type', '').lower() != bug_type.lower()]
+                        other_bugs_checked = True
+                        break
 
             # Construct appropriate message
             message_parts = []
@@ -392,6 +690,8 @@ class JavaAnalysisFacade:
                 'success': bug_fixed,  # Consider the validation successful if the target bug is fixed
                 'bug_fixed': bug_fixed,
                 'other_bugs': other_bugs,
+                # False when other_bugs is empty only because no full results were at hand
+                'other_bugs_checked': other_bugs_checked,
                 'validation_message': ". ".join(message_parts)
             }
 
@@ -426,87 +726,190 @@ class JavaAnalysisFacade:
         # If it's a full path, get just the filename
         return os.path.basename(normalized)
 
-    def _get_file_bugs(self, filename: str, report_path: str) -> List[Dict]:
-        """Internal method to get bugs for a specific file from SpotBugs."""
+    def _requested_profile(self, profile: Optional[str]) -> Optional[str]:
+        """The SpotBugs profile a request asks for, or None for automatic choice."""
+        profile = (profile or self.spotbugs_profile or "auto").lower()
+        if profile == "auto":
+            return None
+        if profile not in self.spotbugs_analyzer.profiles:
+            raise ValueError(f"Unknown SpotBugs profile: {profile}")
+        return profile
+
+    def _spotbugs_lookup_profile(self, profile: Optional[str]) -> str:
+        """The profile whose cached results answer a request: deep ones answer any request."""
+        current = self._spotbugs_profile
+        if current == BugAnalyzer.DEEP or profile is None:
+            return current or BugAnalyzer.DEEP
+        return profile
+
+    def _get_spotbugs_index(self, profile: Optional[str] = None) -> Tuple[Dict[str, List[Dict]], str]:
+        """
+        Return the repository-level SpotBugs index and the profile it was
+        built with, running SpotBugs once if needed. Without a profile one is
+        chosen from the repository size; a quick pass is followed by a deep
+        pass in the background that replaces it.
+        """
+        if self._spotbugs_index is None and self._report_generation == self._spotbugs_generation:
+            self._load_spotbugs_report()
+        index, current = self._spotbugs_index, self._spotbugs_profile
+        if index is not None and (profile in (None, current) or current == BugAnalyzer.DEEP):
+            return index, current
+        chosen = profile or self.spotbugs_analyzer.choose_profile(
+            self.spotbugs_latency_target)
+        # Requests for different files still share one run and one report file
+        index, _ = self._inflight.do(
+            ("spotbugs", self._workspace_key(), self._spotbugs_generation, chosen),
+            self._run_spotbugs_index, chosen)
+        if chosen != BugAnalyzer.DEEP:
+            self._start_deep_pass()
+        return index, chosen
+
+    def _load_spotbugs_report(self):
+        """Index the deep report another worker left in the workspace instead of re-running SpotBugs."""
+        generation, self._report_generation = self._report_generation, None
+        if not os.path.exists(self._spotbugs_report_path) or os.stat(self._spotbugs_report_path).st_size == 0:
+            return
+        try:
+            index = self.spotbugs_analyzer.parse_spotbugs_index(
+                self._spotbugs_report_path, self.bug_descriptions)
+        except Exception as e:
+            print(f"[WARNING] Could not read the workspace SpotBugs report: {e}")
+            return
+        if generation == self._spotbugs_generation:
+            print("[CACHE] Using the repository SpotBugs report already in the workspace")
+            self._spotbugs_index = index
+            self._spotbugs_profile = BugAnalyzer.DEEP
+
+    def _run_spotbugs_index(self, profile: str = BugAnalyzer.DEEP) -> Dict[str, List[Dict]]:
+        generation = self._spotbugs_generation
+        # Validation merges into the deep report, so other profiles get their own
+        report_path = self._spotbugs_report_path if profile == BugAnalyzer.DEEP else os.path.join(
+            self.report_dir, f"spotbugs_repository_report_{profile}.xml")
+        # Runs for different generations would otherwise share the report file
+        with self._spotbugs_run_lock:
+            print(f"[INFO] Running repository-level SpotBugs analysis ({profile})")
+            index = self.spotbugs_analyzer.run_repository_analysis(
+                report_path, self.bug_descriptions, profile)
+        # A quick index never replaces a deep one
+        if generation == self._spotbugs_generation and not (
+                profile != BugAnalyzer.DEEP and self._spotbugs_profile == BugAnalyzer.DEEP
+                and self._spotbugs_index is not None):
+            self._spotbugs_index = index
+            self._spotbugs_profile = profile
+        return index
+
+    def _start_deep_pass(self):
+        """Run the deep profile in the background unless it is already running."""
+        with self._deep_pass_lock:
+            if self._deep_pass and self._deep_pass.is_alive():
+                return
+            self._deep_pass = threading.Thread(
+                target=self._run_deep_pass, name="spotbugs-deep-pass", daemon=True)
+            self._deep_pass.start()
+
+    def _run_deep_pass(self):
+        try:
+            self._get_spotbugs_index(BugAnalyzer.DEEP)
+            # Cached quick results no longer match the index profile, so the
+            # next lookup for each file replaces them with deep results
+            print("[SPOTBUGS] Deep pass finished, upgrading results")
+        except Exception as e:
+            print(f"[WARN] Background deep SpotBugs pass failed: {str(e)}")
+
+    def _invalidate_spotbugs_index(self):
+        """Drop the repository-level SpotBugs index so the next lookup re-runs SpotBugs."""
+        if self._spotbugs_index is not None:
+            print("[CACHE] Invalidated repository SpotBugs index")
+        self._spotbugs_index = None
+        self._spotbugs_profile = None
+        self._spotbugs_generation += 1
+
+    def _get_file_bugs(self, filename: str, reporter: Optional[ProgressReporter] = None,
+                       profile: Optional[str] = None) -> Tuple[List[Dict], str]:
+        """Internal method to get bugs for a specific file from SpotBugs, with the profile they came from."""
+        reporter = reporter or ProgressReporter()
         # Check cache first
-        cached_bugs, _ = self._get_cached_data(filename, 'spotbugs')
+        lookup_profile = self._spotbugs_lookup_profile(profile)
+        cached_bugs, _ = self._get_cached_data(
+            filename, 'spotbugs', profile=lookup_profile)
         if cached_bugs is not None:
-            return cached_bugs
+            return cached_bugs, lookup_profile
 
         try:
-            # Try SpotBugs
-            all_bugs = self.spotbugs_analyzer.parse_spotbugs_xml(
-                report_path, self.bug_descriptions
-            )
+            with reporter.stage("spotbugs", filename=filename):
+                index, used_profile = self._get_spotbugs_index(profile)
+                reporter.emit("spotbugs_profile", profile=used_profile,
+                              upgrading=used_profile != BugAnalyzer.DEEP)
         except Exception as e:
-            print(f"[WARN] Failed to parse SpotBugs results: {str(e)}")
-            return []
-
-        # Filter bugs by filename - handle different path formats
-        file_bugs = []
-        normalized_filename = self._normalize_file_path(filename)
+            print(f"[WARN] Failed to get SpotBugs results: {str(e)}")
+            return [], lookup_profile
 
-        for bug in all_bugs:
-            bug_file = bug["file"]
-            normalized_bug_file = self._normalize_file_path(bug_file)
-
-            if normalized_bug_file == normalized_filename:
-                file_bugs.append(bug)
+        file_bugs = self.spotbugs_analyzer.lookup_file_bugs(index, filename)
+        reporter.partial_results('spotbugs', filename, file_bugs)
 
         # Add code snippets
-        for bug in file_bugs:
-            bug_line = int(bug["line"])
-            bug_description = bug.get(
-                "description", "No description available")
-            file_path = os.path.join(self.output_dir, filename)
-
-            bug["code_snippet"] = self.spotbugs_analyzer.extract_code_snippet(
-                file_path=file_path,
-                line_number=bug_line,
-                bug_description=bug_description
-            )
+        with reporter.stage("snippets", filename=filename, num_bugs=len(file_bugs)):
+            for bug in file_bugs:
+                bug_line = int(bug["line"])
+                bug_description = bug.get(
+                    "description", "No description available")
+                file_path = os.path.join(self.output_dir, filename)
+
+                bug["code_snippet"] = self.spotbugs_analyzer.extract_code_snippet(
+                    file_path=file_path,
+                    line_number=bug_line,
+                    bug_description=bug_description
+                )
 
         # Cache the results
-        self._update_cache(filename, file_bugs, {}, 'spotbugs')
-        return file_bugs
+        self._update_cache(filename, file_bugs, {},
+                           'spotbugs', profile=used_profile)
+        return file_bugs, used_profile
 
-    def _get_file_bugs_pmd(self, filename: str, report_path: str) -> List[Dict]:
+    def _get_pmd_index(self) -> Dict[str, List[Dict]]:
+        """
+        Repository-wide PMD results, keyed by normalized relative path. Files
+        changed since the last call are re-run together in one PMD process;
+        concurrent callers share that run.
+        """
+        report_path = os.path.join(self.report_dir, "pmd_repository_report.xml")
+        index, _ = self._inflight.do(
+            ("pmd", self._workspace_key()), self.pmd_analyzer.analyze_repository,
+            self.output_dir, self.list_java_files(), report_path)
+        return index
+
+    def _get_file_bugs_pmd(self, filename: str, reporter: Optional[ProgressReporter] = None) -> List[Dict]:
         """Internal method to get bugs for a specific file from PMD."""
+        reporter = reporter or ProgressReporter()
         # Check cache first
         cached_bugs, _ = self._get_cached_data(filename, 'pmd')
         if cached_bugs is not None:
             return cached_bugs
 
         try:
-            # Parse the results
-            all_bugs = self.pmd_analyzer.parse_pmd_xml(report_path=report_path)
+            with reporter.stage("pmd", filename=filename):
+                index = self._get_pmd_index()
+                reporter.emit("pmd_cache", **self.pmd_analyzer.cache_stats)
         except Exception as e:
-            print(f"[WARN] Failed to parse PMD results: {str(e)}")
+            print(f"[WARN] Failed to get PMD results: {str(e)}")
             return []
 
-        # Filter bugs by filename - handle different path formats
-        file_bugs = []
-        normalized_filename = self._normalize_file_path(filename)
-
-        for bug in all_bugs:
-            bug_file = bug["file"]
-            normalized_bug_file = self._normalize_file_path(bug_file)
-
-            if normalized_bug_file == normalized_filename:
-                file_bugs.append(bug)
+        file_bugs = self.spotbugs_analyzer.lookup_file_bugs(index, filename)
+        reporter.partial_results('pmd', filename, file_bugs)
 
         # Add code snippets
-        for bug in file_bugs:
-            bug_line = int(bug["line"])
-            bug_description = bug.get(
-                "description", "No description available")
-            file_path = os.path.join(self.output_dir, filename)
-
-            bug["code_snippet"] = self.pmd_analyzer.extract_code_snippet(
-                file_path=file_path,
-                line_number=bug_line,
-                bug_description=bug_description
-            )
+        with reporter.stage("snippets", filename=filename, num_bugs=len(file_bugs)):
+            for bug in file_bugs:
+                bug_line = int(bug["line"])
+                bug_description = bug.get(
+                    "description", "No description available")
+                file_path = os.path.join(self.output_dir, filename)
+
+                bug["code_snippet"] = self.pmd_analyzer.extract_code_snippet(
+                    file_path=file_path,
+                    line_number=bug_line,
+                    bug_description=bug_description
+                )
 
         # Cache the results
         self._update_cache(filename, file_bugs, {}, 'pmd')
@@ -526,48 +929,72 @@ class JavaAnalysisFacade:
             return {}
 
 
-    def _is_cache_valid(self, filename: str, tool: str = 'spotbugs') -> bool:
-        """Check if the cached data for a file is still valid."""
-        cache_key = f"{filename}_{tool}"
-        if cache_key not in self._last_analysis_time:
-            return False
-        current_time = time.time()
-        return (current_time - self._last_analysis_time[cache_key]) < self._cache_timeout
+    def _tool_config_digest(self, tool: str, profile: Optional[str] = None) -> str:
+        """Digest of the ruleset or bug-category configuration used by a tool."""
+        if tool.lower() == 'pmd':
+            return self.pmd_analyzer.config_fingerprint()
+        return self.spotbugs_analyzer.config_fingerprint(profile)
 
-    def _update_cache(self, filename: str, bugs: List[Dict], metrics: Dict, tool: str = 'spotbugs'):
+    def _file_digest(self, filename: str, content: Optional[str] = None) -> Optional[str]:
+        """Digest of a file's contents, reading it from the output directory if needed."""
+        if content is None:
+            try:
+                with open(os.path.join(self.output_dir, filename), 'r') as f:
+                    content = f.read()
+            except OSError:
+                return None
+        return digest_text(content)
+
+    def _update_cache(self, filename: str, bugs: List[Dict], metrics: Dict, tool: str = 'spotbugs', content: Optional[str] = None,
+                      profile: Optional[str] = None):
         """Update the cache with new bugs and metrics data."""
-        cache_key = f"{filename}_{tool}"
-        self._bugs_cache[cache_key] = bugs
-        self._metrics_cache[cache_key] = metrics
-        self._last_analysis_time[cache_key] = time.time()
-
-    def _get_cached_data(self, filename: str, tool: str = 'spotbugs') -> Tuple[List[Dict], Dict]:
-        """Get cached bugs and metrics data if available and valid."""
-        cache_key = f"{filename}_{tool}"
-        if self._is_cache_valid(filename, tool):
-            return self._bugs_cache.get(cache_key, []), self._metrics_cache.get(cache_key, {})
+        content_digest = self._file_digest(filename, content)
+        if content_digest is None:
+            return
+        config_digest = self._tool_config_digest(tool, profile)
+        self.analysis_cache.set(filename, tool, content_digest,
+                                config_digest, bugs, metrics)
+        if self.analysis_store:
+            self.analysis_store.put(
+                AnalysisStore.BUGS, self.repo_name, self.ck_metrics.commit_sha,
+                filename, content_digest, tool,
+                {"bugs": bugs, "metrics": metrics}, config_digest)
+
+    def _get_cached_data(self, filename: str, tool: str = 'spotbugs', content: Optional[str] = None,
+                         profile: Optional[str] = None, content_digest: Optional[str] = None) -> Tuple[List[Dict], Dict]:
+        """
+        Get cached bugs and metrics data if the file and tool configuration
+        are unchanged. With content_digest the results for that earlier
+        version of the file are looked up instead, leaving the cached results
+        of the current version in place.
+        """
+        earlier = content_digest is not None
+        if not earlier:
+            content_digest = self._file_digest(filename, content)
+        if content_digest is None:
+            return None, None
+        config_digest = self._tool_config_digest(tool, profile)
+        cached = self.analysis_cache.get(
+            filename, tool, content_digest, config_digest, drop_stale=not earlier)
+        if cached is not None:
+            return cached
+
+        # Fall back to results stored by other workers or before a restart
+        if self.analysis_store:
+            stored = self.analysis_store.get(
+                AnalysisStore.BUGS, self.repo_name, filename, content_digest, tool, config_digest)
+            if stored is not None:
+                print(f"[STORE] Using stored {tool} results for {filename}")
+                if not earlier:
+                    self.analysis_cache.set(filename, tool, content_digest, config_digest,
+                                            stored["bugs"], stored["metrics"])
+                return stored["bugs"], stored["metrics"]
         return None, None
 
     def clear_cache_for_file(self, filename: str):
-        """Clear time-based cached data for a specific file, leaving initial metrics intact."""
-        print(f"[INFO] Clearing time-based cache for file: {filename}")
-        # Use base filename for consistency
-        base_filename = os.path.basename(filename)
-
-        # Clear bug analysis cache for different tools
-        for tool in ['spotbugs', 'pmd']:
-            # Key format used in _update_cache
-            cache_key = f"{base_filename}_{tool}"
-            if cache_key in self._bugs_cache:
-                del self._bugs_cache[cache_key]
-                print(f"[CACHE] Removed bugs cache for {cache_key}")
-            if cache_key in self._metrics_cache:  # Clear time-based metrics cache
-                del self._metrics_cache[cache_key]
-                print(
-                    f"[CACHE] Removed time-based metrics cache for {cache_key}")
-            if cache_key in self._last_analysis_time:
-                del self._last_analysis_time[cache_key]
-                print(f"[CACHE] Removed last analysis time for {cache_key}")
+        """Clear cached analysis results for a specific file, leaving initial metrics intact."""
+        print(f"[INFO] Clearing analysis cache for file: {filename}")
+        removed = self.analysis_cache.invalidate_file(filename)
+        print(f"[CACHE] Removed {removed} cached analysis entries")
 
         # We specifically DO NOT clear self._initial_metrics_cache here
-        print(f"[INFO] Time-based cache cleared for file: {base_filename}")
@@ -3,6 +3,7 @@ SpotBugs1 - A Java Bug Analysis Tool
 """
 
 from app.routes import register_routes
+from app.config import SECRET_KEY
 from flask import Flask
 __version__ = "0.1.0"
 
@@ -17,6 +18,8 @@ load_dotenv()
 def create_app():
     """Initialize the Flask app and register all routes."""
     app = Flask(__name__)
+    # Sessions carry each user's workspace id
+    app.secret_key = SECRET_KEY
     register_routes(app)  # Register blueprints from routes/
     return app
 
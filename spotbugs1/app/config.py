@@ -27,6 +27,123 @@ PMD_PATH = os.path.join(os.path.dirname(os.path.dirname(
 
 PMD_RULESET_PATH = "pmd-rules.xml"
 PMD_REPORT_PATH = "pmd_report.xml"
+# Worker threads for repository-wide PMD runs: a count, or "<n>C" per CPU core
+PMD_THREADS = os.getenv("PMD_THREADS", "1C")
 
 SPOTBUGS_PATH = os.path.join(os.path.dirname(os.path.dirname(
     __file__)), 'tools', 'spotbugs-4.8.6', 'bin', 'spotbugs.bat')
+
+# Maximum number of per-file analysis results kept in memory
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "512"))
+
+# SQLite file holding analysis results shared by all workers (empty to disable)
+ANALYSIS_STORE_PATH = os.getenv("ANALYSIS_STORE_PATH", os.path.join(
+    BASE_DIR, '..', '..', 'analysis_store', 'analysis.sqlite3')) or None
+
+# Cache backend for analysis and metrics caches: unset for in-process,
+# redis://host:port/db to share results across hosts
+CACHE_BACKEND_URL = os.getenv("CACHE_BACKEND_URL")
+
+# Time-to-live in seconds per cache namespace (0 disables expiry). Analysis
+# results are keyed on content and configuration digests, so they never
+# go stale and do not expire by default
+CACHE_NAMESPACE_TTLS = {
+    "analysis": int(os.getenv("CACHE_TTL_ANALYSIS", "0")),
+    "ck_metrics": int(os.getenv("CACHE_TTL_CK_METRICS", str(7 * 24 * 3600))),
+    "solution_metrics": int(os.getenv("CACHE_TTL_SOLUTION_METRICS", str(24 * 3600))),
+    "spotbugs_classes": int(os.getenv("CACHE_TTL_SPOTBUGS_CLASSES", str(7 * 24 * 3600))),
+}
+
+# Maximum number of per-class SpotBugs results kept in memory
+SPOTBUGS_CLASS_CACHE_MAX_ENTRIES = int(
+    os.getenv("SPOTBUGS_CLASS_CACHE_MAX_ENTRIES", "50000"))
+
+# SpotBugs profile for interactive requests: "quick", "deep", or "auto" to
+# run deep only when it is expected to finish within the latency target and
+# otherwise answer with quick and run deep in the background
+SPOTBUGS_PROFILE = os.getenv("SPOTBUGS_PROFILE", "auto")
+SPOTBUGS_LATENCY_TARGET_SECONDS = float(
+    os.getenv("SPOTBUGS_LATENCY_TARGET_SECONDS", "20"))
+SPOTBUGS_DEEP_SECONDS_PER_CLASS = float(
+    os.getenv("SPOTBUGS_DEEP_SECONDS_PER_CLASS", "0.05"))
+
+# Split large SpotBugs runs over this many parallel JVMs (1 disables), each
+# with its own heap in MB; runs over fewer classes stay in one JVM
+SPOTBUGS_SHARDS = int(os.getenv("SPOTBUGS_SHARDS", "1"))
+SPOTBUGS_SHARD_HEAP_MB = int(os.getenv("SPOTBUGS_SHARD_HEAP_MB", "1024"))
+SPOTBUGS_SHARD_MIN_CLASSES = int(
+    os.getenv("SPOTBUGS_SHARD_MIN_CLASSES", "500"))
+
+# Recompile just the edited file against the existing classes when its API
+# is unchanged, instead of running the project's full build
+INCREMENTAL_COMPILE_ENABLED = os.getenv(
+    "INCREMENTAL_COMPILE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Maven builds use the Maven Daemon (mvnd) when it is on the PATH, and go
+# offline once a repository's dependencies have been resolved
+MAVEN_USE_MVND = os.getenv("MAVEN_USE_MVND", "true").lower() in ("1", "true", "yes")
+MAVEN_OFFLINE_AFTER_RESOLVE = os.getenv(
+    "MAVEN_OFFLINE_AFTER_RESOLVE", "true").lower() in ("1", "true", "yes")
+
+# Build outcomes (classes or compiler errors) kept per source tree fingerprint
+# in each workspace, so an unchanged tree is never compiled twice (0 = off)
+BUILD_RESULT_CACHE_ENTRIES = int(os.getenv("BUILD_RESULT_CACHE_ENTRIES", "8"))
+
+# Pre-analyze every file in the background after a repository is cloned
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Background job execution for long-running requests
+JOB_MAX_WORKERS = int(os.getenv("JOB_MAX_WORKERS", "4"))
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+JOB_MAX_WAIT_SECONDS = float(os.getenv("JOB_MAX_WAIT_SECONDS", "30"))
+JOB_EVENT_HEARTBEAT_SECONDS = float(
+    os.getenv("JOB_EVENT_HEARTBEAT_SECONDS", "15"))
+
+# Per-session workspaces (clone, classes, reports, CK output) live under here
+WORKSPACE_ROOT = os.getenv("WORKSPACE_ROOT", os.path.join(
+    BASE_DIR, '..', '..', 'workspaces'))
+# Idle workspaces are deleted, least recently used first, beyond these limits (0 = no limit)
+WORKSPACE_MAX_BYTES = int(os.getenv("WORKSPACE_MAX_BYTES", str(5 * 1024 ** 3)))
+WORKSPACE_MAX_COUNT = int(os.getenv("WORKSPACE_MAX_COUNT", "20"))
+
+
+def _shared_secret_key(path):
+    """
+    A key generated once and kept at path, so every worker process signs
+    session cookies with the same key. The first process to link its key
+    into place wins; the others read it.
+    """
+    try:
+        with open(path, 'r') as f:
+            return f.read().strip()
+    except OSError:
+        pass
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}"
+    with open(tmp_path, 'w') as f:
+        f.write(os.urandom(32).hex())
+    os.chmod(tmp_path, 0o600)
+    try:
+        os.link(tmp_path, path)
+    except FileExistsError:
+        pass
+    finally:
+        os.remove(tmp_path)
+    with open(path, 'r') as f:
+        return f.read().strip()
+
+
+# Signs the session cookie that carries the workspace id. Without one, a
+# key is generated under WORKSPACE_ROOT and shared by every worker; set it
+# explicitly when workers do not share that directory
+SECRET_KEY = os.getenv("SECRET_KEY") or _shared_secret_key(
+    os.path.join(WORKSPACE_ROOT, '.secret_key'))
+
+# Long-lived JVM that runs SpotBugs, PMD, CK, the formatter and javac in-process
+TOOLHOST_ENABLED = os.getenv("TOOLHOST_ENABLED", "true").lower() in ("1", "true", "yes")
+TOOLHOST_SOURCE = os.path.join(os.path.dirname(os.path.dirname(
+    __file__)), 'tools', 'toolhost', 'ToolHost.java')
+TOOLHOST_MAX_HEAP = os.getenv("TOOLHOST_MAX_HEAP", "1536m")
+# Restart the host after this many jobs to shed state the tools leak
+TOOLHOST_MAX_JOBS = int(os.getenv("TOOLHOST_MAX_JOBS", "200"))
+TOOLHOST_START_TIMEOUT = float(os.getenv("TOOLHOST_START_TIMEOUT", "60"))
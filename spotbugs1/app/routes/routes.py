@@ -1,23 +1,203 @@
-from flask import Blueprint, request, jsonify, render_template
+from flask import Blueprint, Response, request, jsonify, render_template, session, stream_with_context, url_for
 from app.JavaAnalysisFacade import JavaAnalysisFacade
-from app.config import GITHUB_TOKEN, LLM_API_KEY
+from app.services.AnalysisCache import AnalysisCache
+from app.services.AnalysisStore import AnalysisStore
+from app.services.CacheBackend import create_cache_backend
+from app.services.ClassFindingsCache import ClassFindingsCache
+from app.services.JobManager import JobManager
+from app.services.WorkspaceManager import WorkspaceManager
+from app.config import GITHUB_TOKEN, LLM_API_KEY, JOB_MAX_WORKERS, JOB_RETENTION_SECONDS, JOB_MAX_WAIT_SECONDS, JOB_EVENT_HEARTBEAT_SECONDS
+from app.config import ANALYSIS_CACHE_MAX_ENTRIES, ANALYSIS_STORE_PATH, CACHE_BACKEND_URL, CACHE_NAMESPACE_TTLS, SPOTBUGS_CLASS_CACHE_MAX_ENTRIES
+from app.config import WORKSPACE_ROOT, WORKSPACE_MAX_BYTES, WORKSPACE_MAX_COUNT
+from contextlib import contextmanager
+import functools
 import git
+import json
 import os
+import threading
 
 # Create blueprint
 api_bp = Blueprint('api', __name__)
 
-# Initialize facade
-facade = JavaAnalysisFacade(github_token=GITHUB_TOKEN, llm_api_key=LLM_API_KEY)
+# Results store and cache backend shared by every session's facade
+analysis_store = AnalysisStore(
+    ANALYSIS_STORE_PATH) if ANALYSIS_STORE_PATH else None
+cache_backend = create_cache_backend(
+    CACHE_BACKEND_URL, CACHE_NAMESPACE_TTLS,
+    {AnalysisCache.NAMESPACE: ANALYSIS_CACHE_MAX_ENTRIES,
+     ClassFindingsCache.NAMESPACE: SPOTBUGS_CLASS_CACHE_MAX_ENTRIES})
 
+# One facade per workspace, so sessions never share clones or class files
+_facades = {}
+_facades_lock = threading.Lock()
 
 
+def _drop_facade(workspace_id: str):
+    with _facades_lock:
+        facade = _facades.pop(workspace_id, None)
+    if facade:
+        facade.warmer.stop()
+
+
+workspace_manager = WorkspaceManager(
+    WORKSPACE_ROOT, WORKSPACE_MAX_BYTES, WORKSPACE_MAX_COUNT, on_evict=_drop_facade)
+
+# Long-running operations run here instead of on the request thread; their
+# state goes to the store so any worker process can report on them
+job_manager = JobManager(JOB_MAX_WORKERS, JOB_RETENTION_SECONDS, store=analysis_store)
+
+
+def _hold_workspace(workspace_id: str):
+    """Acquire a workspace for background work; returns the function releasing it."""
+    workspace = workspace_manager.acquire(workspace_id)
+    return functools.partial(workspace_manager.release, workspace)
+
+
+def _facade_for(workspace) -> JavaAnalysisFacade:
+    with _facades_lock:
+        facade = _facades.get(workspace.id)
+        if facade is None:
+            facade = JavaAnalysisFacade(
+                github_token=GITHUB_TOKEN, llm_api_key=LLM_API_KEY, workspace=workspace,
+                analysis_store=analysis_store, cache_backend=cache_backend)
+            facade.warmer.hold = functools.partial(_hold_workspace, workspace.id)
+            _facades[workspace.id] = facade
+        return facade
+
+
+def _session_workspace_id() -> str:
+    """The caller's workspace id, assigned on the first request of a session."""
+    workspace_id = session.get("workspace_id")
+    if not workspace_id:
+        workspace_id = WorkspaceManager.new_id()
+        session["workspace_id"] = workspace_id
+    return workspace_id
+
+
+@contextmanager
+def _session_facade():
+    """Hold the caller's workspace for the block and yield its facade."""
+    with workspace_manager.use(_session_workspace_id()) as workspace:
+        yield _facade_for(workspace)
+
+
+def _uses_session_facade(view):
+    """Pass the caller's facade to a synchronous view as its first argument."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        with _session_facade() as facade:
+            return view(facade, *args, **kwargs)
+    return wrapper
+
+
+def _wants_async() -> bool:
+    """Clients opt in to a 202 + job id response with ?async=1 or Prefer: respond-async."""
+    if request.args.get("async", "").lower() in ("1", "true", "yes"):
+        return True
+    return "respond-async" in request.headers.get("Prefer", "")
+
+
+def _submit_for_session(kind: str, fn, *args, with_progress: bool = False):
+    """
+    Submit fn(facade, *args) for the caller's workspace.
+
+    The job holds the workspace until it finishes, since it usually outlives
+    the request that started it.
+    """
+    workspace = workspace_manager.acquire(_session_workspace_id())
+
+    def run(*job_args, **job_kwargs):
+        try:
+            return fn(_facade_for(workspace), *job_args, **job_kwargs)
+        finally:
+            workspace_manager.release(workspace)
+
+    try:
+        return job_manager.submit(kind, run, *args, with_progress=with_progress)
+    except Exception:
+        workspace_manager.release(workspace)
+        raise
+
+
+def _run_as_job(kind: str, fn, *args, with_progress: bool = False):
+    """
+    Submit work as a job and either return its id or wait for its result.
+    A job still running after JOB_MAX_WAIT_SECONDS is answered like an
+    asynchronous request, so long analyses do not hold a worker thread.
+    """
+    job = _submit_for_session(kind, fn, *args, with_progress=with_progress)
+    if not _wants_async():
+        job = job_manager.wait(job.id, JOB_MAX_WAIT_SECONDS) or job
+        if job.done:
+            return jsonify(job.result), job.status_code
+    response = {
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": url_for('api.get_job', job_id=job.id)
+    }
+    if with_progress:
+        response["events_url"] = url_for('api.job_events', job_id=job.id)
+    return jsonify(response), 202
+
 
 @api_bp.route('/')
 def index():
     return render_template('index.html')
 
 
+@api_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Return a job's status and, once finished, its result. ?wait=N long-polls up to N seconds."""
+    try:
+        wait = min(float(request.args.get("wait", 0)), JOB_MAX_WAIT_SECONDS)
+    except ValueError:
+        return jsonify({"error": "wait must be a number of seconds"}), 400
+
+    job = job_manager.wait(job_id, wait) if wait > 0 else job_manager.get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found or expired"}), 404
+    return jsonify(job.to_dict()), 200
+
+
+def _event_stream(job_id, start=0):
+    """Format a job's events as Server-Sent Events, with keep-alive comments while idle."""
+    for event in job_manager.iter_events(job_id, start, JOB_EVENT_HEARTBEAT_SECONDS):
+        if event is None:
+            yield ": keepalive\n\n"
+            continue
+        yield f"event: {event['event']}\nid: {event['id']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+def _sse_response(job_id, start=0):
+    return Response(stream_with_context(_event_stream(job_id, start)),
+                    mimetype='text/event-stream',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@api_bp.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """Stream a job's stage events and partial results as Server-Sent Events."""
+    if not job_manager.get(job_id):
+        return jsonify({"error": "Job not found or expired"}), 404
+    # EventSource resends the last id it saw when it reconnects
+    try:
+        start = int(request.headers.get("Last-Event-ID", -1)) + 1
+    except ValueError:
+        start = 0
+    return _sse_response(job_id, start)
+
+
+def _analyze_repository(facade, github_url, progress=None):
+    try:
+        java_files = facade.analyze_github_repository(
+            github_url, progress=progress)
+        return {
+            "message": "Files fetched successfully.",
+            "files": java_files
+        }, 200
+    except Exception as e:
+        return {"error": str(e)}, 500
+
 
 @api_bp.route("/analyze", methods=["POST"])
 def analyze_repository():
@@ -26,18 +206,22 @@ def analyze_repository():
     if not github_url:
         return jsonify({"error": "No repository URL provided"}), 400
 
+    return _run_as_job("analyze", _analyze_repository, github_url, with_progress=True)
+
+
+@api_bp.route("/warmup_status", methods=["GET"])
+@_uses_session_facade
+def warmup_status(facade):
+    """Report progress of the background pre-analysis."""
     try:
-        java_files = facade.analyze_github_repository(github_url)
-        return jsonify({
-            "message": "Files fetched successfully.",
-            "files": java_files
-        })
+        return jsonify(facade.get_warmup_status())
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
 @api_bp.route("/files", methods=["GET"])
-def list_files():
+@_uses_session_facade
+def list_files(facade):
     """List all Java files."""
     try:
         files = facade.list_java_files()
@@ -46,28 +230,22 @@ def list_files():
         return jsonify({"error": str(e)}), 500
 
 
-# In the file_content route:
-@api_bp.route('/file_content', methods=['POST'])
-def get_file_content():
-    """Get file content and bugs."""
-    data = request.get_json()
-    filename = data.get('filename')
-    tool = data.get('tool', 'spotbugs')  # Default to spotbugs if not specified
+SPOTBUGS_PROFILES = ('auto', 'quick', 'deep')
 
-    if not filename:
-        return jsonify({"success": False, "error": "Filename not provided"}), 400
 
+def _file_content(facade, filename, tool, profile=None, progress=None):
     try:
-        content, bugs, num_bugs, metrics = facade.analyze_file(filename, tool)
+        content, bugs, num_bugs, metrics = facade.analyze_file(
+            filename, tool, progress=progress, profile=profile)
 
         # Check if an error occurred in analysis
         if isinstance(metrics, dict) and "error" in metrics:
-            return jsonify({
+            return {
                 "success": False,
                 "error": metrics["error"]
-            }), 400  # Use 400 for known failures
+            }, 400  # Use 400 for known failures
 
-        return jsonify({
+        return {
             "success": True,
             "filename": filename,
             "content": content,
@@ -75,13 +253,75 @@ def get_file_content():
             "num_bugs": num_bugs,
             "metrics": metrics,
             "analysis_tool": tool.capitalize()  # Capitalize the tool name
-        }), 200
+        }, 200
 
     except Exception as e:
-        return jsonify({
+        return {
             "success": False,
             "error": f"Unexpected error during file analysis: {str(e)}"
-        }), 500
+        }, 500
+
+
+# In the file_content route:
+@api_bp.route('/file_content', methods=['POST'])
+def get_file_content():
+    """Get file content and bugs."""
+    data = request.get_json()
+    filename = data.get('filename')
+    tool = data.get('tool', 'spotbugs')  # Default to spotbugs if not specified
+    profile = data.get('profile')  # SpotBugs profile override for this request
+
+    if not filename:
+        return jsonify({"success": False, "error": "Filename not provided"}), 400
+    if profile and profile not in SPOTBUGS_PROFILES:
+        return jsonify({"success": False, "error": f"Unknown profile: {profile}"}), 400
+
+    return _run_as_job("file_content", _file_content, filename, tool, profile, with_progress=True)
+
+
+def _file_analysis(facade, filename, tools, profile=None, progress=None):
+    """Run several analyzers on one file in turn so each one's findings stream as it finishes."""
+    results = {}
+    status_code = 200
+    for tool in tools:
+        results[tool], code = _file_content(
+            facade, filename, tool, progress=progress, profile=profile)
+        status_code = max(status_code, code)
+    return {"filename": filename, "results": results}, status_code
+
+
+@api_bp.route('/file_events', methods=['GET'])
+def file_events():
+    """
+    Analyze a file and stream progress as Server-Sent Events.
+
+    Tools run in the order given (?tools=pmd,spotbugs by default), so the
+    faster PMD findings arrive while SpotBugs is still running. ?profile=
+    overrides the SpotBugs profile (auto, quick or deep).
+    """
+    filename = request.args.get('filename')
+    if not filename:
+        return jsonify({"success": False, "error": "Filename not provided"}), 400
+    tools = [t.strip().lower() for t in request.args.get(
+        'tools', 'pmd,spotbugs').split(',') if t.strip()]
+    unknown = [t for t in tools if t not in ('pmd', 'spotbugs')]
+    if unknown or not tools:
+        return jsonify({"success": False, "error": f"Unsupported tools: {', '.join(unknown) or 'none'}"}), 400
+    profile = request.args.get('profile')
+    if profile and profile not in SPOTBUGS_PROFILES:
+        return jsonify({"success": False, "error": f"Unknown profile: {profile}"}), 400
+
+    job = _submit_for_session("file_events", _file_analysis,
+                              filename, tools, profile, with_progress=True)
+    return _sse_response(job.id)
+
+
+def _generate_solutions(facade, bug_info, filename):
+    try:
+        solutions = facade.generate_bug_solutions(bug_info, filename)
+        return {"solutions": solutions}, 200
+    except Exception as e:
+        return {"error": str(e)}, 500
 
 
 @api_bp.route('/send_to_llm', methods=['POST'])
@@ -91,18 +331,15 @@ def generate_solutions():
     if not data:
         return jsonify({"error": "No bug data provided"}), 400
 
-    try:
-        bug_info = {"bug": data.get(
-            'bug'), "file_content": data.get('file_content')}
-        filename = data.get('file_name')
-        solutions = facade.generate_bug_solutions(bug_info, filename)
-        return jsonify({"solutions": solutions})
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    bug_info = {"bug": data.get(
+        'bug'), "file_content": data.get('file_content')}
+    filename = data.get('file_name')
+    return _run_as_job("send_to_llm", _generate_solutions, bug_info, filename)
 
 
 @api_bp.route('/update_solution', methods=['POST'])
-def update_solution():
+@_uses_session_facade
+def update_solution(facade):
     """Update a solution based on user feedback."""
     try:
         data = request.get_json()
@@ -154,7 +391,8 @@ def update_solution():
         display_snippet = updated_solution['snippet']
 
         # Only clear this specific solution's metrics from cache
-        solution_cache_key = f"{os.path.basename(filename)}_{solution_number}"
+        solution_cache_key = facade.solution_metrics.metrics_cache.generate_key(
+            os.path.basename(filename), solution_number)
         if facade.solution_metrics.metrics_cache.has(solution_cache_key):
             facade.solution_metrics.metrics_cache.clear()
 
@@ -175,7 +413,8 @@ def update_solution():
 
 
 @api_bp.route('/apply_solution', methods=['POST'])
-def apply_solution():
+@_uses_session_facade
+def apply_solution(facade):
     """Apply a solution to fix a bug."""
     data = request.get_json()
     if not data:
@@ -200,7 +439,8 @@ def apply_solution():
 
 
 @api_bp.route('/calculate_metrics', methods=['POST'])
-def calculate_metrics():
+@_uses_session_facade
+def calculate_metrics(facade):
     """Calculate metrics for a specific solution without applying it."""
     data = request.get_json()
     if not data:
@@ -214,7 +454,8 @@ def calculate_metrics():
 
     try:
         # Try to get the solution directory
-        solution_dir = os.path.join("temp_ck", f"solution_{solution_number}")
+        solution_dir = os.path.join(
+            facade.temp_ck_dir, f"solution_{solution_number}")
 
         if not os.path.exists(solution_dir):
             return jsonify({"error": f"Solution directory not found: {solution_dir}"}), 404
@@ -255,25 +496,8 @@ def calculate_metrics():
         return jsonify({"error": f"Error calculating metrics: {str(e)}"}), 500
 
 
-@api_bp.route('/validate_patch', methods=['POST'])
-def validate_patch():
+def _validate_patch(facade, filename, bug_line, bug_type, original_code, patched_code, tool):
     try:
-        data = request.get_json()
-
-        filename = data.get("filename")
-        bug_line = data.get("bug_line")
-        bug_type = data.get("bug_type")
-        original_code = data.get("original_code")
-        patched_code = data.get("patched_code")
-        tool = data.get("tool", "spotbugs")
-
-        if not all([filename, bug_line, bug_type, original_code, patched_code]):
-            return jsonify({
-                "bug_fixed": False,
-                "message": "Missing required fields",
-                "other_bugs": []
-            }), 400
-
         # Get validation results
         validation_results = facade.validate_bug(
             filename=filename,
@@ -288,24 +512,48 @@ def validate_patch():
         # 422 Unprocessable Entity when bug still exists
         status_code = 200 if is_bug_fixed else 422
 
-        return jsonify({
+        return {
             "bug_fixed": is_bug_fixed,
             "message": "Target bug was successfully fixed" if is_bug_fixed else "Target bug still exists",
             # Keep this for frontend reference but don't show in message
-            "other_bugs": validation_results.get('other_bugs', [])
-        }), status_code
+            "other_bugs": validation_results.get('other_bugs', []),
+            "other_bugs_checked": validation_results.get('other_bugs_checked', True)
+        }, status_code
 
     except Exception as e:
         error_msg = f"Error during validation: {str(e)}"
-        return jsonify({
+        return {
             "bug_fixed": False,
             "message": error_msg,
             "other_bugs": []
-        }), 500
+        }, 500
+
+
+@api_bp.route('/validate_patch', methods=['POST'])
+def validate_patch():
+    data = request.get_json() or {}
+
+    filename = data.get("filename")
+    bug_line = data.get("bug_line")
+    bug_type = data.get("bug_type")
+    original_code = data.get("original_code")
+    patched_code = data.get("patched_code")
+    tool = data.get("tool", "spotbugs")
+
+    if not all([filename, bug_line, bug_type, original_code, patched_code]):
+        return jsonify({
+            "bug_fixed": False,
+            "message": "Missing required fields",
+            "other_bugs": []
+        }), 400
+
+    return _run_as_job("validate_patch", _validate_patch, filename, bug_line,
+                       bug_type, original_code, patched_code, tool)
 
 
 @api_bp.route('/commit_changes', methods=['POST'])
-def commit_changes():
+@_uses_session_facade
+def commit_changes(facade):
     """Commit and push changes to GitHub."""
     try:
         repo_path = facade.github_fetcher.local_repo_path
@@ -0,0 +1,103 @@
+import hashlib
+import os
+from typing import Dict, List, Optional, Tuple
+
+from app.services.CacheBackend import CacheBackend, InMemoryCacheBackend
+
+
+def digest_text(text: str) -> str:
+    """Return a stable digest of a piece of text, such as a source file."""
+    return hashlib.sha256(text.encode('utf-8', errors='replace')).hexdigest()
+
+
+class AnalysisCache:
+    """
+    Cache of per-file analysis results.
+
+    An entry is keyed on (file, tool) and remembers the digest of the file
+    contents and of the tool configuration it was computed from. A lookup
+    with different digests drops the entry instead of returning it, so
+    results never go stale while the inputs match and never outlive a change.
+    Storage is delegated to a CacheBackend; the default in-process backend
+    is bounded with LRU eviction. Keys are prefixed with scope, so
+    workspaces sharing a backend never see or invalidate each other's entries.
+    """
+
+    NAMESPACE = "analysis"
+
+    def __init__(self, max_entries: int = 512, backend: Optional[CacheBackend] = None, scope: str = ""):
+        self.max_entries = max_entries
+        self.backend = backend or InMemoryCacheBackend(
+            max_entries={self.NAMESPACE: max_entries})
+        self.scope = scope
+
+    def _key(self, filename: str, tool: str) -> str:
+        path = filename.replace('\\', '/').strip('/').lower()
+        key = f"{tool.lower()}|{path}"
+        return f"{self.scope}:{key}" if self.scope else key
+
+    def _path_in_scope(self, key: str) -> Optional[str]:
+        """The file path of a key of this cache's scope, or None for other scopes."""
+        if self.scope:
+            if not key.startswith(f"{self.scope}:"):
+                return None
+            key = key[len(self.scope) + 1:]
+        tool, separator, path = key.partition('|')
+        if not separator or ':' in tool:
+            return None
+        return path
+
+    def _scoped_keys(self) -> List[str]:
+        return [key for key in self.backend.keys(self.NAMESPACE)
+                if self._path_in_scope(key) is not None]
+
+    def get(self, filename: str, tool: str, content_digest: str, config_digest: str,
+            drop_stale: bool = True) -> Optional[Tuple[List[Dict], Dict]]:
+        """
+        Return (bugs, metrics) for matching inputs, or None on a miss. An
+        entry for other inputs is dropped unless drop_stale is False, as for
+        lookups of an earlier version of the file.
+        """
+        key = self._key(filename, tool)
+        entry = self.backend.get(self.NAMESPACE, key)
+        if entry is None:
+            return None
+        if entry["content_digest"] != content_digest or entry["config_digest"] != config_digest:
+            if not drop_stale:
+                return None
+            self.backend.delete(self.NAMESPACE, key)
+            print(f"[CACHE] Dropped stale entry {key}")
+            return None
+        return entry["bugs"], entry["metrics"]
+
+    def set(self, filename: str, tool: str, content_digest: str, config_digest: str, bugs: List[Dict], metrics: Dict):
+        """Store results for a file."""
+        self.backend.set(self.NAMESPACE, self._key(filename, tool), {
+            "content_digest": content_digest,
+            "config_digest": config_digest,
+            "bugs": bugs,
+            "metrics": metrics
+        })
+
+    def invalidate_file(self, filename: str) -> int:
+        """Remove every entry of this scope for a file, matching on the bare filename as well."""
+        target = self._key(filename, '').split('|', 1)[1]
+        target_base = target.rsplit('/', 1)[-1]
+        removed = 0
+        for key in self._scoped_keys():
+            path = self._path_in_scope(key)
+            if path == target or path.rsplit('/', 1)[-1] == target_base:
+                self.backend.delete(self.NAMESPACE, key)
+                removed += 1
+        return removed
+
+    def clear(self):
+        """Remove all entries of this scope."""
+        if not self.scope:
+            self.backend.clear(self.NAMESPACE)
+            return
+        for key in self._scoped_keys():
+            self.backend.delete(self.NAMESPACE, key)
+
+    def __len__(self):
+        return len(self._scoped_keys())
@@ -0,0 +1,174 @@
+import json
+import os
+import time
+from typing import Any, Optional
+
+from sqlalchemy import (Column, Float, Index, Integer, MetaData, String, Table,
+                        Text, UniqueConstraint, create_engine, event, select)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+
+metadata = MetaData()
+
+analysis_results = Table(
+    "analysis_results", metadata,
+    Column("id", Integer, primary_key=True),
+    # One of AnalysisStore.KINDS
+    Column("kind", String(32), nullable=False),
+    Column("repo", String(255), nullable=False),
+    Column("commit_sha", String(64), nullable=False, default=""),
+    Column("file_path", String(1024), nullable=False),
+    Column("content_hash", String(64), nullable=False),
+    Column("tool", String(32), nullable=False),
+    Column("config_hash", String(64), nullable=False, default=""),
+    Column("payload", Text, nullable=False),
+    Column("created_at", Float, nullable=False),
+    UniqueConstraint("kind", "repo", "file_path", "content_hash", "tool", "config_hash",
+                     name="uq_analysis_results_lookup"),
+    Index("ix_analysis_results_commit", "repo", "commit_sha"),
+)
+
+# Background job state, so any worker can answer for a job another one runs
+jobs = Table(
+    "jobs", metadata,
+    Column("id", String(32), primary_key=True),
+    Column("payload", Text, nullable=False),
+    Column("updated_at", Float, nullable=False),
+    # Set once the job has finished, for purging
+    Column("finished_at", Float, nullable=True),
+)
+
+
+class AnalysisStore:
+    """
+    On-disk store of analysis results shared by every worker process.
+
+    Results are looked up by repository, file, file content hash, tool and
+    tool configuration. The commit SHA is recorded with each row so results
+    can be traced back (and purged) per commit, but it is not part of the
+    lookup: identical file contents give identical results on any commit.
+    """
+
+    BUGS = "bugs"
+    CK_CLASS_METRICS = "ck_class_metrics"
+    SOLUTION_METRICS = "solution_metrics"
+    KINDS = (BUGS, CK_CLASS_METRICS, SOLUTION_METRICS)
+
+    def __init__(self, db_path: str):
+        self.db_path = os.path.abspath(db_path)
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self.engine = create_engine(
+            f"sqlite:///{self.db_path}",
+            connect_args={"timeout": 30, "check_same_thread": False}
+        )
+        event.listen(self.engine, "connect", self._configure_connection)
+        metadata.create_all(self.engine)
+
+    @staticmethod
+    def _configure_connection(dbapi_connection, connection_record):
+        """Use WAL so readers in other workers never block on a writer."""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+    @staticmethod
+    def _normalize(file_path: str) -> str:
+        return file_path.replace('\\', '/').strip('/').lower()
+
+    def get(self, kind: str, repo: str, file_path: str, content_hash: str, tool: str, config_hash: str = "") -> Optional[Any]:
+        """Return the stored payload for the given inputs, or None."""
+        query = select(analysis_results.c.payload).where(
+            analysis_results.c.kind == kind,
+            analysis_results.c.repo == (repo or ""),
+            analysis_results.c.file_path == self._normalize(file_path),
+            analysis_results.c.content_hash == content_hash,
+            analysis_results.c.tool == tool.lower(),
+            analysis_results.c.config_hash == config_hash
+        )
+        try:
+            with self.engine.connect() as connection:
+                row = connection.execute(query).first()
+        except Exception as e:
+            print(f"[STORE] Lookup failed: {e}")
+            return None
+        return json.loads(row[0]) if row else None
+
+    def put(self, kind: str, repo: str, commit_sha: Optional[str], file_path: str, content_hash: str, tool: str, payload: Any, config_hash: str = ""):
+        """Insert or replace the payload for the given inputs."""
+        values = {
+            "kind": kind,
+            "repo": repo or "",
+            "commit_sha": commit_sha or "",
+            "file_path": self._normalize(file_path),
+            "content_hash": content_hash,
+            "tool": tool.lower(),
+            "config_hash": config_hash,
+            "payload": json.dumps(payload, separators=(',', ':')),
+            "created_at": time.time()
+        }
+        statement = sqlite_insert(analysis_results).values(**values)
+        statement = statement.on_conflict_do_update(
+            index_elements=["kind", "repo", "file_path",
+                            "content_hash", "tool", "config_hash"],
+            set_={"payload": statement.excluded.payload,
+                  "commit_sha": statement.excluded.commit_sha,
+                  "created_at": statement.excluded.created_at}
+        )
+        try:
+            with self.engine.begin() as connection:
+                connection.execute(statement)
+        except Exception as e:
+            print(f"[STORE] Write failed: {e}")
+
+    def purge_repo(self, repo: str, commit_sha: Optional[str] = None) -> int:
+        """Delete stored results for a repository, optionally only for one commit."""
+        statement = analysis_results.delete().where(
+            analysis_results.c.repo == repo)
+        if commit_sha:
+            statement = statement.where(
+                analysis_results.c.commit_sha == commit_sha)
+        with self.engine.begin() as connection:
+            return connection.execute(statement).rowcount
+
+    def put_job(self, job_id: str, payload: Any, finished_at: Optional[float] = None):
+        """Insert or replace the state of a background job."""
+        values = {
+            "id": job_id,
+            "payload": json.dumps(payload, separators=(',', ':')),
+            "updated_at": time.time(),
+            "finished_at": finished_at
+        }
+        statement = sqlite_insert(jobs).values(**values)
+        statement = statement.on_conflict_do_update(
+            index_elements=["id"],
+            set_={"payload": statement.excluded.payload,
+                  "updated_at": statement.excluded.updated_at,
+                  "finished_at": statement.excluded.finished_at}
+        )
+        try:
+            with self.engine.begin() as connection:
+                connection.execute(statement)
+        except Exception as e:
+            print(f"[STORE] Job write failed: {e}")
+
+    def get_job(self, job_id: str) -> Optional[Any]:
+        """Return the stored state of a background job, or None."""
+        query = select(jobs.c.payload).where(jobs.c.id == job_id)
+        try:
+            with self.engine.connect() as connection:
+                row = connection.execute(query).first()
+        except Exception as e:
+            print(f"[STORE] Job lookup failed: {e}")
+            return None
+        return json.loads(row[0]) if row else None
+
+    def purge_jobs(self, finished_before: float) -> int:
+        """Delete jobs that finished before the given time."""
+        statement = jobs.delete().where(jobs.c.finished_at < finished_before)
+        try:
+            with self.engine.begin() as connection:
+                return connection.execute(statement).rowcount
+        except Exception as e:
+            print(f"[STORE] Job purge failed: {e}")
+            return 0
@@ -1,69 +1,568 @@
 import os
+import hashlib
+import json
 import subprocess
 import xml.etree.ElementTree as ET
+from contextlib import ExitStack
+from lxml import etree
 import openai
 import re
 import glob
-from typing import List, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 import shutil
+from concurrent.futures import ThreadPoolExecutor
+from app.config import SPOTBUGS_DEEP_SECONDS_PER_CLASS, SPOTBUGS_SHARDS, SPOTBUGS_SHARD_HEAP_MB, SPOTBUGS_SHARD_MIN_CLASSES
+from app.services.ClassFindingsCache import ClassFindingsCache, digest_file
+from app.services.DetectorCatalog import DetectorCatalog
+from app.services.ToolHostClient import ToolHostClient, jar_classpath, run_tool
+
+
+def normalize_source_path(file_path: str) -> str:
+    """Normalize a source path so report paths and UI paths compare equal."""
+    return file_path.replace('\\', '/').strip().strip('/').lower()
 
 
 class BugAnalyzer:
-    def __init__(self, output_dir: str, bin_dir: str, spotbugs_path: str, repo_root_dir: str):
+    MAIN_CLASS = "edu.umd.cs.findbugs.FindBugs2"
+    QUICK = "quick"
+    DEEP = "deep"
+    # Whole-repository report that incremental runs are merged into
+    REPOSITORY_REPORT_NAME = "spotbugs_repository_report.xml"
+
+    def __init__(self, output_dir: str, bin_dir: str, spotbugs_path: str, repo_root_dir: str,
+                 tool_host: Optional[ToolHostClient] = None,
+                 class_cache: Optional[ClassFindingsCache] = None):
         """Initialize the BugAnalyzer with necessary paths."""
         # Convert all paths to absolute paths
         self.output_dir = os.path.abspath(output_dir)
         self.bin_dir = os.path.abspath(bin_dir)
         self.spotbugs_path = os.path.abspath(spotbugs_path)
         self.repo_root_dir = os.path.abspath(repo_root_dir)
-
-    def run_spotbugs_analysis(self, report_path):
-        if os.path.exists(report_path):
-            os.remove(report_path)
-
-        # Check if there are any .class files to analyze
-        class_files = []
+        # Runs SpotBugs in a warm JVM when available
+        self.tool_host = tool_host
+        # Findings per class bytecode, so unchanged classes are not re-analyzed
+        self.class_cache = class_cache
+        spotbugs_home = os.path.dirname(os.path.dirname(self.spotbugs_path))
+        self.classpath = jar_classpath(os.path.join(spotbugs_home, 'lib'))
+        # Bug pattern -> detectors, for runs that check a single pattern
+        self.detector_catalog = DetectorCatalog.for_distribution(spotbugs_home)
+
+        # Named analysis settings: a fast pass for interactive requests and
+        # the full-precision pass that validation and the index converge on
+        self.profiles = {
+            self.QUICK: {
+                "effort": "min",
+                "priority": "-medium",  # High and medium priority only
+                "bug_categories": ["CORRECTNESS"]
+            },
+            self.DEEP: {
+                "effort": "max",  # Maximum precision analysis
+                "priority": "-low",
+                "bug_categories": ["BAD_PRACTICE", "CORRECTNESS", "PERFORMANCE", "SECURITY"]
+            }
+        }
+        # Omit visitors that often give false positives
+        self.omit_visitors = [
+            "FindDeadLocalStores", "FindUnrelatedTypesInGenericContainer"]
+        # Estimated cost of one uncached class in a deep pass, for choose_profile
+        self.deep_seconds_per_class = SPOTBUGS_DEEP_SECONDS_PER_CLASS
+        # Parallel SpotBugs processes for runs over at least shard_min_classes classes
+        self.shards = SPOTBUGS_SHARDS
+        self.shard_heap_mb = SPOTBUGS_SHARD_HEAP_MB
+        self.shard_min_classes = SPOTBUGS_SHARD_MIN_CLASSES
+        # Above this many classes a run targets bin_dir instead of listing class files
+        self.max_explicit_targets = 100
+        # Classes outside bin_dir that the analyzed ones refer to, such as the
+        # other modules of a multi-module build
+        self.aux_classpath: List[str] = []
+        # Source directories of the build's modules, to resolve the
+        # package-relative source paths in reports against
+        self.source_roots: List[str] = []
+
+    def _profile(self, profile: Optional[str]) -> Dict:
+        profile = profile or self.DEEP
+        if profile not in self.profiles:
+            raise ValueError(f"Unknown SpotBugs profile: {profile}")
+        return self.profiles[profile]
+
+    def config_fingerprint(self, profile: Optional[str] = None) -> str:
+        """Digest of the settings that influence which bugs SpotBugs reports."""
+        settings = dict(self._profile(profile), omit_visitors=self.omit_visitors)
+        return hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()
+
+    def _class_files(self) -> Dict[str, str]:
+        """Map every class name in bin_dir to its .class file."""
+        class_files = {}
         for root, _, files in os.walk(self.bin_dir):
             for file in files:
                 if file.endswith(".class"):
-                    class_files.append(os.path.join(root, file))
+                    rel_path = os.path.relpath(os.path.join(root, file), self.bin_dir)
+                    class_files[rel_path[:-len(".class")].replace(os.sep, ".")] = os.path.join(root, file)
+        return class_files
+
+    def choose_profile(self, latency_target: float) -> str:
+        """
+        Pick the deep profile when the classes it would still have to analyze
+        (those not in the class cache) fit the latency target, else quick.
+        """
+        class_files = self._class_files()
+        pending = len(class_files)
+        if self.class_cache is not None:
+            config_digest = self.config_fingerprint(self.DEEP)
+            pending = sum(1 for name, path in class_files.items()
+                          if self.class_cache.get(name, digest_file(path), config_digest) is None)
+        estimate = pending * self.deep_seconds_per_class
+        profile = self.DEEP if estimate <= latency_target else self.QUICK
+        print(
+            f"[SPOTBUGS] {pending} of {len(class_files)} classes need a deep pass (~{estimate:.0f}s); using {profile}")
+        return profile
+
+    def run_spotbugs_analysis(self, report_path, profile: Optional[str] = None):
+        # Check if there are any .class files to analyze
+        class_files = self._class_files()
 
         if not class_files:
             raise RuntimeError(
                 f"No compiled .class files found in {self.bin_dir}")
 
-        spotbugs_command = [
+        self._analyze_classes(class_files, report_path, whole_bin=True, profile=profile)
+
+    def _analyze_classes(self, class_files: Dict[str, str], report_path: str, whole_bin: bool = False,
+                         profile: Optional[str] = None):
+        """
+        Write a report covering class_files. Classes whose bytecode is in the
+        class cache are not re-analyzed; when all of them are, SpotBugs is not
+        started at all. A class's findings are keyed on its own bytecode only.
+        """
+        if os.path.exists(report_path):
+            os.remove(report_path)
+
+        config_digest = self.config_fingerprint(profile)
+        digests = {name: digest_file(path) for name, path in class_files.items()}
+        cached = {}
+        if self.class_cache is not None:
+            for name, class_digest in digests.items():
+                entry = self.class_cache.get(name, class_digest, config_digest)
+                if entry is not None:
+                    cached[name] = entry
+        misses = sorted(name for name in class_files if name not in cached)
+
+        if not misses:
+            print(
+                f"[SPOTBUGS] Bytecode unchanged for all {len(class_files)} classes, reusing cached findings")
+            self._write_report(report_path, ET.Element('BugCollection'),
+                               self._cached_instances(cached))
+            return
+
+        if self.shards > 1 and len(misses) >= self.shard_min_classes:
+            self._run_sharded({name: class_files[name] for name in misses}, report_path, profile)
+        elif whole_bin and not cached:
+            aux_args = ["-auxclasspath", os.pathsep.join(self.aux_classpath)] if self.aux_classpath else []
+            spotbugs_command = self._base_command(report_path, profile) + aux_args + [self.bin_dir]
+            self._run_spotbugs(spotbugs_command)
+        else:
+            print(
+                f"[SPOTBUGS] Analyzing {len(misses)} changed classes, {len(cached)} from cache")
+            spotbugs_command = self._base_command(report_path, profile) + self._scope_args(
+                {name: class_files[name] for name in misses})
+            self._run_spotbugs(spotbugs_command)
+
+        if self.class_cache is None:
+            return
+        fresh = self._stream_fresh_findings(report_path, misses, cached)
+        # Classes without findings are cached too, as an empty list
+        for name, bug_instances in fresh.items():
+            self.class_cache.set(name, digests[name], config_digest, bug_instances)
+
+    def _stream_fresh_findings(self, report_path: str, misses: List[str],
+                               cached: Dict[str, List[str]]) -> Dict[str, List[str]]:
+        """
+        Serialized BugInstances per class in misses, read from the report in
+        one streaming pass like parse_spotbugs_index. With cached findings the
+        report is rewritten in the same pass, the cached BugInstances going
+        after SpotBugs' own, so it is never held in memory as a whole.
+        """
+        fresh = {name: [] for name in misses}
+        if not os.path.exists(report_path) or os.stat(report_path).st_size == 0:
+            if cached:
+                self._write_report(report_path, ET.Element('BugCollection'),
+                                   self._cached_instances(cached))
+            return fresh
+
+        tmp_path = report_path + ".tmp"
+        pending = [bug_instance for name in sorted(cached) for bug_instance in cached[name]]
+        with ExitStack() as stack:
+            writer = None
+            if cached:
+                writer = stack.enter_context(etree.xmlfile(tmp_path, encoding='utf-8'))
+                writer.write_declaration()
+            depth = 0
+            for event, element in etree.iterparse(report_path, events=('start', 'end')):
+                if event == 'start':
+                    if depth == 0 and writer is not None:
+                        stack.enter_context(writer.element(element.tag, dict(element.attrib)))
+                    depth += 1
+                    continue
+                depth -= 1
+                if depth != 1:
+                    continue
+                if element.tag == 'BugInstance':
+                    class_name = self._primary_class(element)
+                    if class_name in fresh:
+                        fresh[class_name].append(
+                            etree.tostring(element, encoding='unicode', with_tail=False))
+                if writer is not None:
+                    # SpotBugs writes BugInstances right after Project, ahead of the summary elements
+                    if pending and element.tag not in ('Project', 'BugInstance'):
+                        for bug_instance in pending:
+                            writer.write(etree.fromstring(bug_instance))
+                        pending = []
+                    writer.write(element, with_tail=False)
+                # Free the element and the already-processed siblings before it
+                element.clear()
+                while element.getprevious() is not None:
+                    del element.getparent()[0]
+            for bug_instance in pending:
+                writer.write(etree.fromstring(bug_instance))
+        if cached:
+            os.replace(tmp_path, report_path)
+        return fresh
+
+    @staticmethod
+    def _cached_instances(cached: Dict[str, List[str]]) -> List[ET.Element]:
+        return [ET.fromstring(bug_instance) for name in sorted(cached) for bug_instance in cached[name]]
+
+    @staticmethod
+    def _write_report(report_path: str, root: ET.Element, bug_instances: List[ET.Element]):
+        """Add BugInstances to a BugCollection root and write it to report_path."""
+        # SpotBugs writes BugInstances right after Project, ahead of the summary elements
+        anchors = [i for i, child in enumerate(root) if child.tag in ('Project', 'BugInstance')]
+        position = anchors[-1] + 1 if anchors else 0
+        for offset, bug_instance in enumerate(bug_instances):
+            root.insert(position + offset, bug_instance)
+        tmp_path = report_path + ".tmp"
+        ET.ElementTree(root).write(tmp_path, encoding='utf-8', xml_declaration=True)
+        os.replace(tmp_path, report_path)
+
+    def _base_command(self, report_path: str, profile: Optional[str] = None,
+                      visitors: Optional[List[str]] = None) -> List[str]:
+        settings = self._profile(profile)
+        detector_args = ["-visitors", ",".join(visitors)] if visitors else [
+            "-omitVisitors", ",".join(self.omit_visitors)]
+        return [
             self.spotbugs_path,
             "-textui",
-            "-effort:max",  # Maximum precision analysis
-            "-low",      # Only report medium and high priority bugs
+            f"-effort:{settings['effort']}",
+            settings["priority"],
             "-xml",        # XML output
             "-output", report_path,
-            # Omit visitors that often give false positives
-            "-omitVisitors", "FindDeadLocalStores,FindUnrelatedTypesInGenericContainer",
-            # Only analyze specific bug categories
-            "-bugCategories", "BAD_PRACTICE,CORRECTNESS,PERFORMANCE,SECURITY",
-            self.bin_dir
+            *detector_args,
+            "-bugCategories", ",".join(settings["bug_categories"])
         ]
 
+    def _run_spotbugs(self, spotbugs_command: List[str]):
         try:
-            subprocess.run(spotbugs_command, check=True)
+            # The launcher's -textui just selects FindBugs2, which the host calls directly
+            run_tool(self.tool_host, "spotbugs", spotbugs_command[2:], spotbugs_command,
+                     classpath=self.classpath, main_class=self.MAIN_CLASS, check=True)
         except subprocess.CalledProcessError as e:
             raise RuntimeError(f"SpotBugs analysis failed: {e}")
 
+    def _scope_args(self, class_files: Dict[str, str]) -> List[str]:
+        """
+        Arguments restricting a run to class_files, with the rest of bin_dir
+        (and aux_classpath) on the aux classpath. Small sets are passed as
+        explicit targets; large ones name whole packages as "pkg.*" (which,
+        unlike "pkg.-", leaves out subpackages) where possible and target
+        bin_dir, since the Windows launcher cannot take arbitrarily long
+        command lines.
+        """
+        names = sorted(class_files)
+        aux_classpath = os.pathsep.join([self.bin_dir, *self.aux_classpath])
+        if len(names) <= self.max_explicit_targets:
+            return ["-onlyAnalyze", ",".join(names), "-auxclasspath", aux_classpath,
+                    *[class_files[name] for name in names]]
+
+        by_package = {}
+        for name in self._class_files():
+            by_package.setdefault(name.rpartition('.')[0], set()).add(name)
+        patterns = []
+        for package, package_classes in sorted(by_package.items()):
+            selected = package_classes.intersection(class_files)
+            if package and selected == package_classes:
+                patterns.append(f"{package}.*")
+            else:
+                patterns.extend(sorted(selected))
+        return ["-onlyAnalyze", ",".join(patterns), "-auxclasspath", aux_classpath, self.bin_dir]
+
+    def partition_classes(self, class_files: Dict[str, str], shards: int) -> List[Dict[str, str]]:
+        """
+        Split classes into at most `shards` partitions of similar total bytecode
+        size. Packages stay together unless one alone outweighs a shard, in which
+        case it is split by top-level class; nested classes always stay with
+        their top-level class.
+        """
+        packages = {}
+        for name, path in class_files.items():
+            package, _, simple_name = name.rpartition('.')
+            outer = simple_name.split('$')[0]
+            packages.setdefault(package, {}).setdefault(outer, {})[name] = path
+
+        def size(classes):
+            return sum(os.path.getsize(path) for path in classes.values())
+
+        units = []
+        for outers in packages.values():
+            groups = [(size(classes), classes) for classes in outers.values()]
+            units.append((sum(s for s, _ in groups),
+                          {n: p for _, classes in groups for n, p in classes.items()}, groups))
+        target = sum(unit[0] for unit in units) / max(1, shards)
+        balanced = []
+        for package_size, classes, groups in units:
+            if package_size > target and len(groups) > 1:
+                balanced.extend(groups)
+            else:
+                balanced.append((package_size, classes))
+
+        # Largest first onto the lightest shard
+        partitions = [[0, {}] for _ in range(max(1, shards))]
+        for unit_size, classes in sorted(balanced, key=lambda unit: (-unit[0], min(unit[1]))):
+            lightest = min(partitions, key=lambda partition: partition[0])
+            lightest[0] += unit_size
+            lightest[1].update(classes)
+        return [classes for _, classes in partitions if classes]
+
+    def _run_sharded(self, class_files: Dict[str, str], report_path: str, profile: Optional[str] = None):
+        """
+        Analyze classes in parallel SpotBugs processes, one per partition, each
+        with the whole bin_dir on its aux classpath and its own heap, then
+        merge the shard reports into report_path.
+        """
+        partitions = self.partition_classes(class_files, self.shards)
+        print(
+            f"[SPOTBUGS] Analyzing {len(class_files)} classes in {len(partitions)} shards")
+        shard_reports = [f"{report_path}.shard{i}" for i in range(len(partitions))]
+
+        def run_shard(i):
+            classes = partitions[i]
+            command = self._base_command(shard_reports[i], profile) + self._scope_args(classes)
+            # Launcher options go before the FindBugs2 arguments
+            command[2:2] = ["-maxHeap", str(self.shard_heap_mb)]
+            try:
+                # Separate JVMs are the point here, so the shared tool host is bypassed
+                run_tool(None, "spotbugs", command[2:], command, check=True)
+            except subprocess.CalledProcessError as e:
+                raise RuntimeError(f"SpotBugs shard {i} failed: {e}")
+
+        try:
+            with ThreadPoolExecutor(max_workers=len(partitions),
+                                    thread_name_prefix="spotbugs-shard") as executor:
+                list(executor.map(run_shard, range(len(partitions))))
+            self.merge_shard_reports(shard_reports, report_path)
+        finally:
+            for shard_report in shard_reports:
+                if os.path.exists(shard_report):
+                    os.remove(shard_report)
+
+    @staticmethod
+    def _instance_key(bug_instance) -> Tuple:
+        lines = tuple((line.get('sourcepath'), line.get('start'), line.get('end'))
+                      for line in bug_instance.iter('SourceLine'))
+        methods = tuple((method.get('classname'), method.get('name'), method.get('signature'))
+                        for method in bug_instance.findall('Method'))
+        return (bug_instance.get('type'), BugAnalyzer._primary_class(bug_instance), methods, lines)
+
+    def merge_shard_reports(self, shard_reports: List[str], report_path: str):
+        """Combine shard reports into one, dropping BugInstances reported by more than one shard."""
+        root = None
+        seen = set()
+        bug_instances = []
+        for shard_report in shard_reports:
+            if not os.path.exists(shard_report) or os.stat(shard_report).st_size == 0:
+                continue
+            shard_root = ET.parse(shard_report).getroot()
+            for bug_instance in shard_root.findall('BugInstance'):
+                shard_root.remove(bug_instance)
+                key = self._instance_key(bug_instance)
+                if key not in seen:
+                    seen.add(key)
+                    bug_instances.append(bug_instance)
+            if root is None:
+                # The first shard's Project and pattern metadata stand for the whole run
+                root = shard_root
+        self._write_report(report_path, root if root is not None else ET.Element('BugCollection'),
+                           bug_instances)
+
+    def class_files_for_source(self, source_path: str) -> Dict[str, str]:
+        """
+        Map the class names compiled from a source file (the top-level class
+        and its nested/anonymous classes) to their .class files in bin_dir.
+        """
+        class_name = os.path.splitext(os.path.basename(source_path))[0]
+        package = ""
+        try:
+            with open(source_path, 'r', encoding='utf-8', errors='replace') as f:
+                match = re.search(r'^\s*package\s+([\w.]+)\s*;', f.read(), re.M)
+            if match:
+                package = match.group(1)
+        except OSError:
+            pass
+
+        package_dir = os.path.join(self.bin_dir, *package.split('.')) if package else self.bin_dir
+        if not os.path.exists(os.path.join(package_dir, class_name + ".class")):
+            # Builds that ignore the package layout; find the class anywhere in bin_dir
+            package_dir = next((root for root, _, files in os.walk(self.bin_dir)
+                                if class_name + ".class" in files), None)
+            if package_dir is None:
+                return {}
+            rel_dir = os.path.relpath(package_dir, self.bin_dir)
+            package = "" if rel_dir == "." else rel_dir.replace(os.sep, ".")
+
+        prefix = f"{package}." if package else ""
+        class_files = {}
+        for file in os.listdir(package_dir):
+            name = file[:-len(".class")]
+            if file.endswith(".class") and (name == class_name or name.startswith(class_name + "$")):
+                class_files[prefix + name] = os.path.join(package_dir, file)
+        return class_files
+
+    def run_incremental_analysis(self, source_path: str, report_path: str,
+                                 repository_report_path: str) -> List[str]:
+        """
+        Re-analyze only the classes compiled from one source file and merge
+        the findings into the repository report, replacing that file's old
+        findings. The rest of bin_dir goes on the aux classpath so cross-class
+        lookups still resolve. Returns the re-analyzed class names.
+        """
+        class_files = self.class_files_for_source(source_path)
+        if not class_files:
+            raise RuntimeError(
+                f"No compiled .class files found for {source_path} in {self.bin_dir}")
+        class_names = sorted(class_files)
+        print(
+            f"[SPOTBUGS] Incremental analysis of {len(class_names)} classes from {os.path.basename(source_path)}")
+        self._analyze_classes(class_files, report_path)
+        self.merge_reports(repository_report_path, report_path, class_names)
+        return class_names
+
+    def run_targeted_analysis(self, source_path: str, report_path: str, bug_pattern: str) -> bool:
+        """
+        Check the classes compiled from one source file for a single bug
+        pattern, running only the detectors that can report it. The report
+        holds nothing else, so it is neither cached nor merged into the
+        repository report. Returns False, without running SpotBugs, when the
+        pattern has no enabled detectors or the file has no classes.
+        """
+        reporting = [d for d in self.detector_catalog.reporting_detectors(bug_pattern)
+                     if d not in self.omit_visitors]
+        class_files = self.class_files_for_source(source_path)
+        if not reporting or not class_files:
+            return False
+
+        visitors = self.detector_catalog.detectors_for(bug_pattern)
+        visitors = [d for d in visitors if d not in self.omit_visitors]
+        print(f"[SPOTBUGS] Checking {len(class_files)} classes from {os.path.basename(source_path)} "
+              f"for {bug_pattern} with {', '.join(reporting)}")
+        if os.path.exists(report_path):
+            os.remove(report_path)
+        self._run_spotbugs(self._base_command(report_path, self.DEEP, visitors)
+                           + self._scope_args(class_files))
+        return True
+
+    @staticmethod
+    def _primary_class(bug_instance) -> Optional[str]:
+        classes = bug_instance.findall('Class')
+        primary = next((c for c in classes if c.get('primary') == 'true'),
+                       classes[0] if classes else None)
+        return primary.get('classname') if primary is not None else None
+
+    def merge_reports(self, repository_report_path: str, fresh_report_path: str, class_names: List[str]):
+        """
+        Replace the BugInstances for class_names in the repository report with
+        those from a fresh report. Without a repository report the fresh one
+        is copied as-is.
+        """
+        if not os.path.exists(repository_report_path) or os.stat(repository_report_path).st_size == 0:
+            shutil.copyfile(fresh_report_path, repository_report_path)
+            return
+
+        reanalyzed = set(class_names)
+        root = ET.parse(repository_report_path).getroot()
+        removed = 0
+        for bug_instance in root.findall('BugInstance'):
+            if self._primary_class(bug_instance) in reanalyzed:
+                root.remove(bug_instance)
+                removed += 1
+
+        fresh = []
+        if os.path.exists(fresh_report_path) and os.stat(fresh_report_path).st_size > 0:
+            fresh = ET.parse(fresh_report_path).getroot().findall('BugInstance')
+        self._write_report(repository_report_path, root, fresh)
+        print(
+            f"[SPOTBUGS] Merged report: replaced {removed} findings with {len(fresh)} for {len(reanalyzed)} classes")
+
+    def run_repository_analysis(self, report_path, bug_descriptions,
+                                profile: Optional[str] = None) -> Dict[str, List[Dict]]:
+        """Run SpotBugs once over the whole bin directory and index the bugs by source file."""
+        self.run_spotbugs_analysis(report_path, profile)
+        index = self.parse_spotbugs_index(report_path, bug_descriptions)
+        print(
+            f"[SPOTBUGS] Indexed {sum(len(bugs) for bugs in index.values())} bugs across {len(index)} files")
+        return index
+
+    def index_bugs_by_file(self, bugs: List[Dict]) -> Dict[str, List[Dict]]:
+        """Group parsed bugs by their normalized source path."""
+        index = {}
+        for bug in bugs:
+            key = normalize_source_path(bug.get("file", ""))
+            index.setdefault(key, []).append(bug)
+        return index
+
+    def lookup_file_bugs(self, index: Dict[str, List[Dict]], filename: str) -> List[Dict]:
+        """Return copies of the indexed bugs for one file."""
+        key = normalize_source_path(filename)
+        bugs = index.get(key)
+        if bugs is None:
+            # Fall back to matching on the bare filename, as reports may use
+            # paths relative to a source root rather than the repository root
+            base_name = os.path.basename(key)
+            bugs = [bug for path, path_bugs in index.items()
+                    if os.path.basename(path) == base_name
+                    for bug in path_bugs]
+        return [dict(bug) for bug in bugs]
+
     def parse_spotbugs_xml(self, report_path, bug_descriptions):
         """Parse the SpotBugs XML report and return a list of bugs."""
-
+        index = self.parse_spotbugs_index(report_path, bug_descriptions)
+        return [bug for bugs in index.values() for bug in bugs]
+
+    def _source_files(self) -> set:
+        """Relative paths of every file under output_dir, for resolving report paths without stat calls."""
+        files = set()
+        for root, dirs, filenames in os.walk(self.output_dir):
+            dirs[:] = [d for d in dirs if d != '.git']
+            rel_root = os.path.relpath(root, self.output_dir)
+            for filename in filenames:
+                files.add(os.path.normpath(os.path.join(rel_root, filename)))
+        return files
+
+    def parse_spotbugs_index(self, report_path, bug_descriptions) -> Dict[str, List[Dict]]:
+        """
+        Parse a SpotBugs XML report into bugs grouped by normalized source path.
+
+        The report is streamed and each BugInstance is discarded once read,
+        so memory stays flat however large the report is.
+        """
         if not os.path.exists(report_path) or os.stat(report_path).st_size == 0:
-            return []
+            return {}
 
-        issues = []
+        index = {}
         unique_bugs = set()
+        source_files = self._source_files()
+        source_roots = [os.path.relpath(root, self.output_dir) for root in self.source_roots]
+        resolved_paths = {}
 
-        tree = ET.parse(report_path)
-        root = tree.getroot()
-
-        for bug_instance in root.findall('BugInstance'):
+        for _, bug_instance in etree.iterparse(report_path, events=('end',), tag='BugInstance'):
             category = bug_instance.get('category')
             severity = bug_instance.get('priority')
             bug_type = bug_instance.get('type')
@@ -71,12 +570,13 @@ class BugAnalyzer:
                 bug_type, "No description available.")
 
             file_path = None
+            line_number = None
             assign_line = None
             propagation_line = None
             deref_line = None
 
             # Process all SourceLine elements
-            for source_line in bug_instance.findall('SourceLine'):
+            for source_line in bug_instance.iterfind('SourceLine'):
                 file_path = source_line.get('sourcepath')
                 line_number = source_line.get('start')
                 role = source_line.get('role')
@@ -94,29 +594,20 @@ class BugAnalyzer:
                     if deref_line is None:
                         deref_line = line_number
 
+            # Free the element and the already-processed siblings before it
+            bug_instance.clear()
+            while bug_instance.getprevious() is not None:
+                del bug_instance.getparent()[0]
+
             # If dereference line not found for NP bugs, fallback
             if not deref_line:
                 deref_line = assign_line or propagation_line or line_number
 
             # Normalize file path
-            if file_path:
-                file_path = file_path.strip('/')
-                file_path = file_path.replace('/', os.sep)
-
-                possible_paths = [
-                    file_path,
-                    os.path.join('src', 'main', 'java', file_path),
-                    os.path.basename(file_path)
-                ]
-
-                for path in possible_paths:
-                    if os.path.exists(os.path.join(self.output_dir, path)):
-                        file_path = path
-                        break
-                else:
-                    file_path = "Unknown file"
-            else:
-                file_path = "Unknown file"
+            if file_path not in resolved_paths:
+                resolved_paths[file_path] = self._resolve_source_path(
+                    file_path, source_files, source_roots)
+            file_path = resolved_paths[file_path]
 
             # Generate description
             if bug_type.startswith("NP_"):
@@ -135,7 +626,7 @@ class BugAnalyzer:
 
             if bug_key not in unique_bugs:
                 unique_bugs.add(bug_key)
-                issues.append({
+                index.setdefault(normalize_source_path(file_path), []).append({
                     "file": file_path,
                     "line": deref_line,
                     "category": category,
@@ -144,7 +635,29 @@ class BugAnalyzer:
                     "description": context_description
                 })
 
-        return issues
+        return index
+
+    @staticmethod
+    def _resolve_source_path(file_path: Optional[str], source_files: set,
+                             source_roots: Sequence[str] = ()) -> str:
+        """
+        Map a report sourcepath onto a file in the repository, or "Unknown
+        file". source_roots are the modules' source directories relative to
+        the repository, tried in order before the single-module layout.
+        """
+        if not file_path:
+            return "Unknown file"
+        file_path = file_path.strip('/').replace('/', os.sep)
+        possible_paths = [
+            file_path,
+            *(os.path.join(root, file_path) for root in source_roots),
+            os.path.join('src', 'main', 'java', file_path),
+            os.path.basename(file_path)
+        ]
+        for path in possible_paths:
+            if os.path.normpath(path) in source_files:
+                return path
+        return "Unknown file"
 
     def extract_code_snippet(self, file_path, line_number, bug_description):
         try:
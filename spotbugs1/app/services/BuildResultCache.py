@@ -0,0 +1,255 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+from typing import Dict, List, Optional, Sequence
+
+from app.config import BUILD_RESULT_CACHE_ENTRIES
+from app.services.ClassFindingsCache import digest_file
+
+# Files besides .java sources whose changes can change what a build produces
+BUILD_FILES = {'pom.xml', 'build.gradle', 'build.gradle.kts', 'settings.gradle',
+               'settings.gradle.kts', 'gradle.properties', 'libs.versions.toml'}
+# Build output directories, skipped when they sit next to a build file
+# (generated sources in them change on every build)
+_OUTPUT_DIRS = {'target', 'build', 'bin', 'out'}
+
+_MAVEN_ERROR = re.compile(r'^\[ERROR\]\s+(?P<file>.+?\.java):\[(?P<line>\d+),(?P<column>\d+)\]\s*(?P<message>.*)$')
+_JAVAC_ERROR = re.compile(r'^(?P<file>.+?\.java):(?P<line>\d+): error: (?P<message>.*)$')
+
+
+def parse_compiler_errors(lines: Sequence[str], root: Optional[str] = None) -> List[Dict]:
+    """
+    Compiler errors in javac, Gradle or Maven output, as dicts with file
+    (relative to root when under it), line, column (Maven only) and message.
+    Maven repeats its errors in the build summary; each is kept once.
+    """
+    errors = []
+    for line in lines:
+        line = line.rstrip()
+        match = _MAVEN_ERROR.match(line) or _JAVAC_ERROR.match(line)
+        if not match:
+            continue
+        file_path = match.group('file').strip()
+        if root and os.path.isabs(file_path) and os.path.abspath(file_path).startswith(os.path.abspath(root) + os.sep):
+            file_path = os.path.relpath(file_path, root)
+        error = {
+            "file": file_path.replace(os.sep, '/'),
+            "line": int(match.group('line')),
+            "column": int(match.group('column')) if 'column' in match.groupdict() else None,
+            "message": match.group('message').strip()
+        }
+        if error not in errors:
+            errors.append(error)
+    return errors
+
+
+class BuildResultCache:
+    """
+    Build outcomes keyed on a fingerprint of the source tree and build
+    files. A successful build keeps the classes it left in bin_dir, so an
+    unchanged tree is never compiled twice even after bin_dir was cleaned or
+    replaced by another module's classes. A failed build keeps its compiler
+    errors, so a tree known not to compile fails at once.
+
+    Class files are stored once per content under objects/, each successful
+    build recording which of them it produced, so a build that changed a few
+    classes only adds those. Entries are kept in index.json under cache_dir,
+    the least recently used beyond max_entries being dropped along with the
+    class files no other entry needs. File digests are kept by size and
+    mtime in states.json, so after a restart unchanged files are not re-read.
+    """
+
+    def __init__(self, cache_dir: str, max_entries: int = BUILD_RESULT_CACHE_ENTRIES):
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_entries = max_entries
+        self.index_path = os.path.join(self.cache_dir, 'index.json')
+        self.states_path = os.path.join(self.cache_dir, 'states.json')
+        self.objects_dir = os.path.join(self.cache_dir, 'objects')
+        # Path -> ((mtime, size), digest) of the sources at the previous
+        # fingerprint and of the class files at the previous success
+        self._file_states = {}
+        self._output_states = {}
+        self._entries = {}
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            pass
+        try:
+            with open(self.states_path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            self._file_states = {p: (tuple(s), d) for p, (s, d) in saved["sources"].items()}
+            self._output_states = {p: (tuple(s), d) for p, (s, d) in saved["outputs"].items()}
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    @staticmethod
+    def _file_state(path: str, previous: Optional[tuple]) -> Optional[tuple]:
+        """(stat, digest) of a file, reusing the previous digest if the stat is unchanged."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if previous and previous[0] == signature:
+            return previous
+        return signature, digest_file(path)
+
+    def fingerprint(self, root: str) -> str:
+        """
+        Digest of the paths and contents of the .java sources and build files
+        under root. Files are only re-read when their size or mtime changed
+        since the last call, so touching a file without editing it keeps the
+        fingerprint.
+        """
+        root = os.path.abspath(root)
+        states = {}
+        for dir_path, dirs, files in os.walk(root):
+            next_to_build_file = any(f in BUILD_FILES for f in files)
+            dirs[:] = [d for d in dirs if not d.startswith('.')
+                       and not (next_to_build_file and d in _OUTPUT_DIRS)]
+            for file in files:
+                if file.endswith('.java') or file in BUILD_FILES:
+                    path = os.path.join(dir_path, file)
+                    state = self._file_state(path, self._file_states.get(path))
+                    if state is not None:
+                        states[path] = state
+        if states != self._file_states:
+            self._file_states = states
+            self._save_states()
+
+        digest = hashlib.sha256()
+        for path in sorted(states):
+            digest.update(os.path.relpath(path, root).replace(os.sep, '/').encode())
+            digest.update(states[path][1].encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """The stored outcome for key: {"ok": bool, "errors": [...], ...}, or None."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry["used"] = time.time()
+        return entry
+
+    def store_failure(self, key: str, errors: List[Dict], source: Optional[str] = None):
+        """Remember that the tree did not compile; source is the file compiled, for builds of single files."""
+        self._entries[key] = {"ok": False, "errors": errors, "source": source, "used": time.time()}
+        self._save()
+
+    def store_success(self, key: str, bin_dir: str, aux_classpath: Sequence[str] = (),
+                      sources: Optional[Sequence[str]] = None):
+        """
+        Remember that the tree built, storing the classes now in bin_dir that
+        are not stored yet. sources lists the files compiled so far when the
+        build does not compile the whole tree.
+        """
+        files = {}
+        states = {}
+        added = 0
+        for root, _, names in os.walk(bin_dir):
+            for name in names:
+                path = os.path.join(root, name)
+                state = self._file_state(path, self._output_states.get(path))
+                if state is None:
+                    continue
+                states[path] = state
+                files[os.path.relpath(path, bin_dir).replace(os.sep, '/')] = state[1]
+                stored = self._object_path(state[1])
+                if not os.path.exists(stored):
+                    os.makedirs(os.path.dirname(stored), exist_ok=True)
+                    shutil.copy2(path, stored + '.tmp')
+                    os.replace(stored + '.tmp', stored)
+                    added += 1
+        if added:
+            print(f"[BUILD] Stored {added} new of {len(files)} class files")
+        self._output_states = states
+        self._entries[key] = {"ok": True, "aux_classpath": list(aux_classpath), "files": files,
+                              "sources": None if sources is None else sorted(sources),
+                              "outputs": self._outputs(bin_dir), "used": time.time()}
+        self._save()
+        self._save_states()
+
+    def matches(self, key: str, bin_dir: str) -> bool:
+        """Whether bin_dir still holds exactly the classes of key's successful build."""
+        entry = self._entries.get(key)
+        return bool(entry and entry["ok"] and self._outputs(bin_dir) == entry["outputs"])
+
+    def restore(self, key: str, bin_dir: str) -> Optional[int]:
+        """
+        Make bin_dir hold exactly the classes of key's successful build,
+        copying only those whose contents differ. Returns how many files
+        were replaced, added or removed, or None when the build's classes
+        are no longer stored.
+        """
+        entry = self._entries.get(key)
+        files = entry.get("files") if entry else None
+        if files is None or not all(os.path.exists(self._object_path(d)) for d in files.values()):
+            self._entries.pop(key, None)
+            return None
+        kept = set()
+        changed = 0
+        for root, _, names in os.walk(bin_dir):
+            for name in names:
+                path = os.path.join(root, name)
+                rel_path = os.path.relpath(path, bin_dir).replace(os.sep, '/')
+                state = self._file_state(path, self._output_states.get(path))
+                if state is not None and files.get(rel_path) == state[1]:
+                    kept.add(rel_path)
+                    continue
+                os.remove(path)
+                if rel_path not in files:
+                    changed += 1
+        for rel_path, digest in files.items():
+            if rel_path in kept:
+                continue
+            target = os.path.join(bin_dir, *rel_path.split('/'))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copy2(self._object_path(digest), target)
+            changed += 1
+        # The stored copy of a class may come from another build, with another mtime
+        entry["outputs"] = self._outputs(bin_dir)
+        self._save()
+        return changed
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    @staticmethod
+    def _outputs(bin_dir: str) -> Dict[str, List[int]]:
+        outputs = {}
+        for root, _, files in os.walk(bin_dir):
+            for file in files:
+                if file.endswith('.class'):
+                    path = os.path.join(root, file)
+                    stat = os.stat(path)
+                    outputs[os.path.relpath(path, bin_dir).replace(os.sep, '/')] = [stat.st_mtime_ns, stat.st_size]
+        return outputs
+
+    def _save(self):
+        evicted = sorted(self._entries, key=lambda k: self._entries[k]["used"])[:-self.max_entries or None]
+        for key in evicted:
+            del self._entries[key]
+        if evicted:
+            self._remove_unused_objects()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._entries, f)
+        os.replace(tmp_path, self.index_path)
+
+    def _remove_unused_objects(self):
+        used = {digest for entry in self._entries.values() for digest in entry.get("files", {}).values()}
+        for root, _, files in os.walk(self.objects_dir):
+            for file in files:
+                if file not in used:
+                    os.remove(os.path.join(root, file))
+
+    def _save_states(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self.states_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"sources": self._file_states, "outputs": self._output_states}, f)
+        os.replace(tmp_path, self.states_path)
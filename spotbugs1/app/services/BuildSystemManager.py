@@ -2,18 +2,68 @@ import os
 import subprocess
 import re
 import glob
+import hashlib
+import json
 import shutil
-from typing import Tuple, List, Optional
+import tempfile
+import threading
+from collections import deque
+from typing import Dict, Tuple, List, Optional
+from app.config import (BUILD_RESULT_CACHE_ENTRIES, INCREMENTAL_COMPILE_ENABLED,
+                        MAVEN_OFFLINE_AFTER_RESOLVE, MAVEN_USE_MVND)
+from app.services.BuildResultCache import BuildResultCache, parse_compiler_errors
+from app.services.ClassFileSignature import api_signature
+from app.services.JavaSymbolIndex import JavaSymbolIndex
+from app.services.ProjectModules import BuildModule, ProjectModules
+from app.services.ProgressReporter import as_reporter
+from app.services.ToolHostClient import ToolHostClient, run_tool
 
 
 class BuildSystemManager:
-    def __init__(self, output_dir: str, bin_dir: str, spotbugs_path: str, repo_root_dir: str):
+    def __init__(self, output_dir: str, bin_dir: str, spotbugs_path: str, repo_root_dir: str,
+                 tool_host: Optional[ToolHostClient] = None, build_cache_dir: Optional[str] = None):
         """Initialize the BugAnalyzer with necessary paths."""
         # Convert all paths to absolute paths
         self.output_dir = os.path.abspath(output_dir)
         self.bin_dir = os.path.abspath(bin_dir)
         self.spotbugs_path = os.path.abspath(spotbugs_path)
         self.repo_root_dir = os.path.abspath(repo_root_dir)
+        # Runs javac in a warm JVM when available
+        self.tool_host = tool_host
+        self.incremental = INCREMENTAL_COMPILE_ENABLED
+        # Class files (relative to bin_dir) each incrementally compiled source produced
+        self._source_outputs = {}
+        # Resolved dependency classpath per project, with the build files it came from
+        self._dependency_classpaths = {}
+        self.use_mvnd = MAVEN_USE_MVND
+        self.maven_offline = MAVEN_OFFLINE_AFTER_RESOLVE
+        # Local Gradle build cache and init script, kept across builds of this workspace
+        self.build_cache_dir = os.path.abspath(
+            build_cache_dir or os.path.join(os.path.dirname(self.bin_dir), 'build_cache'))
+        # Modules per multi-module project, with the build files they were read from
+        self._project_modules = {}
+        # Class directories of the modules not in bin_dir, for code that
+        # analyzes bin_dir (updated in place so it can be shared)
+        self.aux_classpath: List[str] = []
+        # Source directories of the modules, the built one first, for mapping
+        # the source paths in reports back onto files (also shared in place)
+        self.source_roots: List[str] = []
+        # Build outcomes per source tree fingerprint; builds run one at a time
+        # since they share bin_dir
+        self.build_results = BuildResultCache(
+            os.path.join(self.build_cache_dir, 'results')) if BUILD_RESULT_CACHE_ENTRIES > 0 else None
+        self._build_lock = threading.Lock()
+        # Types declared and used by each source, for javac builds without a build tool
+        self.symbol_index = JavaSymbolIndex(
+            self.output_dir, os.path.join(self.build_cache_dir, 'symbol_index.json'))
+        # Output of the failing build steps, the errors parsed from it, and
+        # whether the last compile_java_files call changed bin_dir
+        self._build_output: List[str] = []
+        self.last_errors: List[Dict] = []
+        self.outputs_changed = False
+        # Whether the last build failed in an incremental compile, whose
+        # errors are not remembered for the source tree
+        self._incremental_failed = False
 
     """Handles build system detection and operations."""
 
@@ -26,38 +76,52 @@ class BuildSystemManager:
             return 'gradle'
         return 'none'
 
-    def _compile_maven_project(self, project_dir: str) -> bool:
-        """Compile a Maven project and copy classes from target directories."""
+    # Written to target/ after an online Maven build resolved every dependency
+    MAVEN_RESOLVED_MARKER = ".spotbugs-dependencies-resolved"
+
+    def _compile_maven_project(self, project_dir: str, reporter=None,
+                               module: Optional[BuildModule] = None) -> bool:
+        """
+        Compile a Maven project and copy classes from target directories.
+
+        target/ is kept between builds so the compiler plugin only recompiles
+        stale sources. Once a build has resolved the dependencies of the
+        current pom files, later builds run offline; an offline failure is
+        retried online in case something new needs downloading. With a
+        module, only it and the modules it depends on are built, and only
+        its classes are copied.
+        """
         try:
             project_dir = os.path.abspath(project_dir)
             print(f"Starting Maven project compilation in {project_dir}")
 
-            # Use Maven wrapper if available, otherwise fall back to global mvn
-            wrapper_name = 'mvnw.bat' if os.name == 'nt' else './mvnw'
-            wrapper_path = os.path.join(project_dir, wrapper_name)
-
-            if os.path.exists(wrapper_path):
-                cmd = [wrapper_name, 'clean', 'compile', '-DskipTests']
-                print(
-                    f"Found Maven wrapper at {wrapper_path}, using it for compilation")
-            else:
-                print("Maven wrapper not found, falling back to system's Maven command")
-                cmd = ['mvn', 'clean', 'compile', '-DskipTests']
+            poms_digest = self._maven_poms_digest(project_dir)
+            marker = os.path.join(project_dir, 'target', self.MAVEN_RESOLVED_MARKER)
+            offline = self.maven_offline and self._read_marker(marker) == poms_digest
 
+            module_args = ['-pl', module.name, '-am'] if module else []
+            cmd = [*self._maven_command(project_dir, offline), 'compile', '-DskipTests', *module_args]
             print(f"Running Maven command: {' '.join(cmd)}")
             print(f"Working directory: {project_dir}")
+            returncode, output = self._run_streaming(cmd, project_dir, "MAVEN", reporter)
 
-            result = subprocess.run(
-                cmd,
-                cwd=project_dir,
-                capture_output=True,
-                text=True,
-                shell=(os.name == 'nt')
-            )
+            if returncode != 0 and offline:
+                print("[MAVEN] Offline build failed, retrying online")
+                cmd = [*self._maven_command(project_dir, False), 'compile', '-DskipTests', *module_args]
+                returncode, output = self._run_streaming(cmd, project_dir, "MAVEN", reporter)
+                offline = False
 
-            if result.returncode != 0:
-                print(f"Maven compilation failed with error: {result.stderr}")
+            if returncode != 0:
+                print("Maven compilation failed with error:\n" + "\n".join(output))
+                self._build_output.extend(output)
                 return False
+            if not offline:
+                os.makedirs(os.path.dirname(marker), exist_ok=True)
+                with open(marker, 'w') as f:
+                    f.write(poms_digest)
+
+            if module:
+                return self._copy_module_classes(module.output_dirs)
 
             # Find all target/classes directories
             class_dirs = []
@@ -83,8 +147,111 @@ class BuildSystemManager:
             print(f"Error during Maven project compilation: {str(e)}")
             return False
 
-    def _compile_gradle_project(self, project_dir: str) -> bool:
-        """Compile a Gradle project."""
+    @staticmethod
+    def _read_marker(path: str) -> Optional[str]:
+        try:
+            with open(path, 'r') as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    @staticmethod
+    def _maven_poms_digest(project_dir: str) -> str:
+        """Digest of every pom.xml under the project, so new dependencies force an online build."""
+        digest = hashlib.sha256()
+        for pom in sorted(glob.glob(os.path.join(project_dir, '**', 'pom.xml'), recursive=True)):
+            digest.update(os.path.relpath(pom, project_dir).encode())
+            with open(pom, 'rb') as f:
+                digest.update(f.read())
+        return digest.hexdigest()
+
+    def _maven_command(self, project_dir: str, offline: bool = False) -> List[str]:
+        """Maven executable and common flags: batch mode, no download progress, optionally offline."""
+        cmd = [self._maven_executable(project_dir), '-B', '-ntp']
+        if offline:
+            cmd.append('-o')
+        return cmd
+
+    def _maven_executable(self, project_dir: str) -> str:
+        """Prefer the Maven Daemon, then the project's Maven wrapper, then global mvn."""
+        if self.use_mvnd and shutil.which('mvnd'):
+            print("Found the Maven Daemon (mvnd), using it for compilation")
+            return 'mvnd'
+        wrapper_name = 'mvnw.bat' if os.name == 'nt' else './mvnw'
+        wrapper_path = os.path.join(project_dir, wrapper_name)
+        if os.path.exists(wrapper_path):
+            print(f"Found Maven wrapper at {wrapper_path}, using it for compilation")
+            return wrapper_name
+        print("Maven wrapper not found, falling back to system's Maven command")
+        return 'mvn'
+
+    @staticmethod
+    def _run_streaming(cmd: List[str], cwd: str, tag: str, reporter=None,
+                       env: Optional[Dict[str, str]] = None, keep_lines: int = 200) -> Tuple[int, List[str]]:
+        """
+        Run a build command, printing its output (stdout and stderr merged) as
+        it arrives and passing each line to the reporter as a build_output
+        event. Returns the exit code and the last keep_lines lines.
+        """
+        reporter = as_reporter(reporter)
+        tail = deque(maxlen=keep_lines)
+        process = subprocess.Popen(
+            cmd, cwd=cwd, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            text=True, errors='replace', bufsize=1, shell=(os.name == 'nt'))
+        with process:
+            for line in process.stdout:
+                line = line.rstrip()
+                tail.append(line)
+                print(f"[{tag}] {line}")
+                reporter.emit("build_output", tool=tag.lower(), line=line)
+        return process.returncode, list(tail)
+
+    # Printed by the init script's task for every Java project's class output directory
+    GRADLE_CLASSES_DIR_PREFIX = "SPOTBUGS_CLASSES_DIR="
+    GRADLE_INIT_SCRIPT = """\
+settingsEvaluated { settings ->
+    settings.buildCache {
+        local {
+            enabled = true
+            directory = new File('%(cache_dir)s')
+        }
+    }
+}
+
+allprojects {
+    plugins.withId('java') {
+        tasks.register('spotbugsClassesDirs') {
+            def classesDirs = project.sourceSets.main.output.classesDirs
+            doLast {
+                classesDirs.files.each { println '%(prefix)s' + it.absolutePath }
+            }
+        }
+    }
+}
+"""
+
+    def _gradle_init_script(self) -> str:
+        """Write the init script that points the build cache here and reports class output directories."""
+        os.makedirs(self.build_cache_dir, exist_ok=True)
+        path = os.path.join(self.build_cache_dir, 'spotbugs-init.gradle')
+        content = self.GRADLE_INIT_SCRIPT % {
+            'cache_dir': os.path.join(self.build_cache_dir, 'gradle').replace('\\', '/'),
+            'prefix': self.GRADLE_CLASSES_DIR_PREFIX}
+        # Rewriting an unchanged script would invalidate the configuration cache
+        if self._read_marker(path) != content.strip():
+            with open(path, 'w') as f:
+                f.write(content)
+        return path
+
+    def _compile_gradle_project(self, project_dir: str, reporter=None,
+                                module: Optional[BuildModule] = None) -> bool:
+        """
+        Compile a Gradle project in a warm daemon, without clean, with the
+        build cache (in build_cache_dir) and the configuration cache, so a
+        repeat build only recompiles what changed. Class output directories
+        are read from the build rather than assumed. With a module, only its
+        compileJava (and the projects it depends on) runs.
+        """
         try:
             project_dir = os.path.abspath(project_dir)
             print(f"Starting Gradle project compilation in {project_dir}")
@@ -97,6 +264,8 @@ class BuildSystemManager:
             wrapper_name = 'gradlew.bat' if os.name == 'nt' else './gradlew'
             wrapper_path = os.path.join(project_dir, wrapper_name)
 
+            env = None
+            jvm_args = []
             if os.path.exists(wrapper_path):
                 # Try to find compatible Java version
                 java_home = self._find_compatible_java(required_version)
@@ -104,46 +273,55 @@ class BuildSystemManager:
                     print(f"Using Java installation found at: {java_home}")
                     env = os.environ.copy()
                     env['JAVA_HOME'] = java_home
-                    # Use only common JVM arguments
-                    cmd = [wrapper_name, 'clean', 'compileJava', '-x', 'test',
-                           '-Dorg.gradle.java.home=' + java_home,
-                           '-Dorg.gradle.jvmargs=-Xmx2048m']
+                    # The same arguments on every build let Gradle reuse its daemon
+                    jvm_args = ['-Dorg.gradle.java.home=' + java_home,
+                                '-Dorg.gradle.jvmargs=-Xmx2048m']
                 else:
                     print(
                         "No compatible Java version found. Attempting to use system default Java")
-                    cmd = [wrapper_name, 'clean', 'compileJava', '-x', 'test']
+                executable = wrapper_name
             else:
                 print(
                     "Gradle wrapper not found. Trying to use system's Gradle installation")
-                cmd = ['gradle', 'compileJava', '-x', 'test']
-
-            print(f"Running Gradle command: {' '.join(cmd)}")
-            print(f"Working directory: {project_dir}")
+                executable = 'gradle'
 
-            result = subprocess.run(
-                cmd,
-                cwd=project_dir,
-                capture_output=True,
-                text=True,
-                shell=(os.name == 'nt'),
-                env=env if 'env' in locals() else None
-            )
+            prefix = module.name.rstrip(':') + ':' if module else ''
+            cmd = [executable, prefix + 'compileJava', prefix + 'spotbugsClassesDirs', '-x', 'test',
+                   '--daemon', '--console=plain', '--build-cache',
+                   '--init-script', self._gradle_init_script(), *jvm_args]
+            cache_options = ['--configuration-cache', '--configuration-cache-problems=warn']
 
-            if result.returncode != 0:
-                error_msg = f"Gradle compilation failed with error: {result.stderr}"
+            print(f"Running Gradle command: {' '.join(cmd + cache_options)}")
+            print(f"Working directory: {project_dir}")
+            returncode, output = self._run_streaming(
+                cmd + cache_options, project_dir, "GRADLE", reporter, env=env)
+            if returncode != 0 and any("Unknown command-line option" in line for line in output):
+                # Gradle before 6.6 has no configuration cache
+                print("[GRADLE] Configuration cache not supported, building without it")
+                returncode, output = self._run_streaming(cmd, project_dir, "GRADLE", reporter, env=env)
+
+            if returncode != 0:
+                error_msg = "Gradle compilation failed with error:\n" + "\n".join(output)
                 print(error_msg)
+                self._build_output.extend(output)
                 raise RuntimeError(error_msg)
 
-            # Find the build/classes directory
-            build_dir = os.path.join(
-                project_dir, 'build', 'classes', 'java', 'main')
-            if not os.path.exists(build_dir):
-                print(
-                    f"Gradle build directory not found at expected location: {build_dir}")
+            class_dirs = [line[len(self.GRADLE_CLASSES_DIR_PREFIX):].strip() for line in output
+                          if line.startswith(self.GRADLE_CLASSES_DIR_PREFIX)]
+            if not class_dirs:
+                class_dirs = module.output_dirs if module else [
+                    os.path.join(project_dir, 'build', 'classes', 'java', 'main')]
+            if module:
+                return self._copy_module_classes(class_dirs)
+            class_dirs = [d for d in dict.fromkeys(class_dirs) if os.path.isdir(d)]
+            if not class_dirs:
+                print(f"No Gradle class output directories found in {project_dir}")
                 return False
 
             # Copy compiled classes to our bin directory
-            self._copy_compiled_classes(build_dir)
+            for class_dir in class_dirs:
+                print(f"Copying compiled classes from {class_dir}")
+                self._copy_compiled_classes(class_dir)
             return True
 
         except Exception as e:
@@ -279,42 +457,103 @@ class BuildSystemManager:
         except Exception as e:
             print(f"Error while copying compiled classes: {str(e)}")
 
-    def _find_build_files(self, start_dir: str) -> Tuple[str, str]:
-        """Find build files (pom.xml, build.gradle) in the directory and its subdirectories."""
+    def _copy_module_classes(self, class_dirs: List[str]) -> bool:
+        """
+        Make bin_dir hold exactly the classes in class_dirs (one module's
+        output), so classes of a previously built module do not linger.
+        """
+        class_dirs = [d for d in dict.fromkeys(class_dirs) if os.path.isdir(d)]
+        if not class_dirs:
+            print(f"No class output directories found among {class_dirs}")
+            return False
+        for entry in os.listdir(self.bin_dir):
+            path = os.path.join(self.bin_dir, entry)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+        self._source_outputs.clear()
+        for class_dir in class_dirs:
+            print(f"Copying compiled classes from {class_dir}")
+            self._copy_compiled_classes(class_dir)
+        return True
+
+    def _modules(self, project_dir: str, build_tool: str) -> ProjectModules:
+        """The project's modules, re-read when one of its build files changes."""
+        patterns = {'maven': ['**/pom.xml'], 'gradle': ['settings.gradle', 'settings.gradle.kts']}
+        build_files = sorted(path for pattern in patterns.get(build_tool, [])
+                             for path in glob.glob(os.path.join(project_dir, pattern), recursive=True))
+        stamp = tuple((path, os.path.getmtime(path)) for path in build_files)
+        cached = self._project_modules.get((project_dir, build_tool))
+        if cached and cached[0] == stamp:
+            return cached[1]
+        modules = ProjectModules(project_dir, build_tool)
+        if modules.is_multi_module:
+            print(f"[BUILD] Found {len(modules.modules)} {build_tool} modules in {project_dir}")
+        self._project_modules[(project_dir, build_tool)] = (stamp, modules)
+        return modules
+
+    def project_modules(self) -> List[BuildModule]:
+        """Every module of every build in the repository, single-module builds included."""
+        modules = []
+        for project_dir, build_tool in self._builds(self.repo_root_dir):
+            modules.extend(self._modules(project_dir, build_tool).modules)
+        return modules
+
+    def _find_build_files(self, start_dir: str, file_path: Optional[str] = None) -> Tuple[str, str]:
+        """
+        Find build files (pom.xml, build.gradle) in the directory and its
+        subdirectories. When the root has none and several separate builds
+        do, the one containing file_path is preferred.
+        """
         try:
-            # First check the root directory
-            root_pom = os.path.join(start_dir, 'pom.xml')
-            root_gradle = os.path.join(start_dir, 'build.gradle')
-            root_gradle_kts = os.path.join(start_dir, 'build.gradle.kts')
-
-            if os.path.exists(root_pom):
-                return start_dir, 'maven'
-            if os.path.exists(root_gradle) or os.path.exists(root_gradle_kts):
-                return start_dir, 'gradle'
-
-            # If not found in root, search in subdirectories
-            for root, _, files in os.walk(start_dir):
-                # Skip .git directory
-                if '.git' in root:
-                    continue
-
-                pom_path = os.path.join(root, 'pom.xml')
-                gradle_path = os.path.join(root, 'build.gradle')
-                gradle_kts_path = os.path.join(root, 'build.gradle.kts')
-
-                if os.path.exists(pom_path):
-                    print(f"Found Maven's pom.xml in subdirectory: {root}")
-                    return root, 'maven'
-                if os.path.exists(gradle_path) or os.path.exists(gradle_kts_path):
-                    print(f"Found Gradle's build file in subdirectory: {root}")
-                    return root, 'gradle'
-
-            return None, None
+            found = self._builds(start_dir)
+            if file_path:
+                file_path = os.path.abspath(file_path)
+                for root, build_tool in found:
+                    if file_path.startswith(os.path.abspath(root) + os.sep):
+                        return root, build_tool
+            return found[0] if found else (None, None)
 
         except Exception as e:
             print(f"Error while searching for build files: {str(e)}")
             return None, None
 
+    def _builds(self, start_dir: str) -> List[Tuple[str, str]]:
+        """(project dir, build tool) of the build at start_dir, or else of the topmost builds below it."""
+        # First check the root directory
+        root_pom = os.path.join(start_dir, 'pom.xml')
+        root_gradle = os.path.join(start_dir, 'build.gradle')
+        root_gradle_kts = os.path.join(start_dir, 'build.gradle.kts')
+
+        if os.path.exists(root_pom):
+            return [(start_dir, 'maven')]
+        if os.path.exists(root_gradle) or os.path.exists(root_gradle_kts):
+            return [(start_dir, 'gradle')]
+
+        # If not found in root, search in subdirectories
+        found = []
+        for root, dirs, files in os.walk(start_dir):
+            # Skip .git directory
+            if '.git' in root:
+                continue
+
+            pom_path = os.path.join(root, 'pom.xml')
+            gradle_path = os.path.join(root, 'build.gradle')
+            gradle_kts_path = os.path.join(root, 'build.gradle.kts')
+
+            if os.path.exists(pom_path):
+                print(f"Found Maven's pom.xml in subdirectory: {root}")
+                found.append((root, 'maven'))
+            elif os.path.exists(gradle_path) or os.path.exists(gradle_kts_path):
+                print(f"Found Gradle's build file in subdirectory: {root}")
+                found.append((root, 'gradle'))
+            else:
+                continue
+            # Build files below belong to this build's modules
+            dirs[:] = []
+        return found
+
     def _find_project_root(self, file_path: str) -> str:
         """Find the project root directory by looking for build files in parent directories.
 
@@ -345,8 +584,23 @@ class BuildSystemManager:
         print("No build files found in any parent directories")
         return None
 
-    def compile_java_files(self, file_path: str, bin_dir: str) -> bool:
-        """Compile Java files with proper classpath handling and dependency resolution."""
+    def compile_java_files(self, file_path: str, bin_dir: str, progress=None) -> bool:
+        """
+        Compile Java files with proper classpath handling and dependency resolution.
+
+        A source tree that was built before is not compiled again: its
+        classes are reused (restored into bin_dir if needed), or, if it
+        failed to compile, False is returned with the earlier compiler
+        errors in last_errors. outputs_changed tells whether bin_dir changed.
+        """
+        reporter = as_reporter(progress)
+        with self._build_lock:
+            self._build_output = []
+            self.last_errors = []
+            self.outputs_changed = False
+            return self._compile_java_files(file_path, bin_dir, reporter)
+
+    def _compile_java_files(self, file_path: str, bin_dir: str, reporter) -> bool:
         try:
             print(f"Starting compilation process for {file_path}")
 
@@ -361,7 +615,7 @@ class BuildSystemManager:
 
             # Search for build files in root and subdirectories
             project_dir, build_tool = self._find_build_files(
-                self.repo_root_dir)
+                self.repo_root_dir, file_path)
 
             if not project_dir:
                 print("No build tool found in repository root or subdirectories")
@@ -378,13 +632,114 @@ class BuildSystemManager:
 
             print(f"Build tool detected: {build_tool}")
             print(f"Project root directory: {project_dir}")
+            reporter.emit("build_tool_detected",
+                          build_tool=build_tool, project_dir=project_dir)
+
+            # In a multi-module build only the file's module is built into bin_dir
+            modules = self._modules(project_dir, build_tool)
+            module = modules.module_for(file_path) if modules.is_multi_module else None
+            if module:
+                print(f"[BUILD] {os.path.basename(file_path)} belongs to module {module.name}")
+                reporter.emit("build_module", module=module.name)
+                self.aux_classpath[:] = modules.other_output_dirs(module)
+            else:
+                self.aux_classpath[:] = []
+            ordered_modules = ([module] if module else []) + [m for m in modules.modules if m is not module]
+            self.source_roots[:] = [d for m in ordered_modules for d in m.source_dirs]
+
+            key = None
+            # javac builds compile the file and what it uses, so their classes
+            # only cover the files compiled so far
+            source = os.path.relpath(os.path.abspath(file_path), self.repo_root_dir).replace(
+                os.sep, '/') if build_tool == 'none' else None
+            if self.build_results is not None:
+                key = self._build_key(project_dir, build_tool, module)
+                if self._reuse_build(key, reporter, source):
+                    return not self.last_errors
+
+            self.outputs_changed = True
+            self._incremental_failed = False
+            built = self._run_build(file_path, bin_dir, project_dir, build_tool, reporter, module)
+            if module:
+                # The build may just have produced the classes of modules it depends on
+                self.aux_classpath[:] = modules.other_output_dirs(module)
+
+            if built:
+                if key is not None:
+                    sources = None
+                    if source is not None:
+                        cached = self.build_results.get(key)
+                        sources = {source}
+                        if cached and cached["ok"]:
+                            sources.update(cached.get("sources") or ())
+                    self.build_results.store_success(key, self.bin_dir, self.aux_classpath, sources)
+                return True
+            self.last_errors = parse_compiler_errors(self._build_output, self.repo_root_dir)
+            if self.last_errors:
+                reporter.emit("compile_errors", errors=self.last_errors, cached=False)
+                # Only compiler errors of a full build are remembered: a missing
+                # tool or a network failure may not happen again, and an
+                # incremental compile may have failed on stale classes in bin_dir
+                if key is not None and not self._incremental_failed:
+                    self.build_results.store_failure(key, self.last_errors, source)
+            return False
+        except Exception as e:
+            print(f"Error during compilation: {str(e)}")
+            return False
+
+    def _build_key(self, project_dir: str, build_tool: str, module: Optional[BuildModule]) -> str:
+        """Key of a build's outcome: the source tree fingerprint and what gets built from it."""
+        scope = [self.build_results.fingerprint(self.repo_root_dir), os.path.abspath(project_dir),
+                 build_tool, module.name if module else None]
+        return hashlib.sha256(json.dumps(scope).encode()).hexdigest()
 
-            if build_tool == 'maven':
-                if not self._compile_maven_project(project_dir):
+    def _reuse_build(self, key: str, reporter, source: Optional[str] = None) -> bool:
+        """
+        Answer from an earlier build of the same source tree: fail with its
+        compiler errors, or make sure bin_dir holds its classes. Returns
+        False when the tree, or for javac builds the source file, has to be
+        built; its earlier classes are then already in bin_dir.
+        """
+        cached = self.build_results.get(key)
+        if cached is None:
+            return False
+        if not cached["ok"]:
+            if cached.get("source") != source:
+                return False
+            self.last_errors = cached["errors"]
+            print(f"[BUILD] Source tree unchanged since a failed build ({len(self.last_errors)} compiler errors)")
+            reporter.emit("compile_errors", errors=self.last_errors, cached=True)
+            return True
+        if not self.build_results.matches(key, self.bin_dir):
+            restored = self.build_results.restore(key, self.bin_dir)
+            if restored is None:
+                return False
+            if restored:
+                print(f"[BUILD] Restored {restored} class files of an earlier build of this source tree")
+                self._source_outputs.clear()
+                self.outputs_changed = True
+        if source is not None and source not in (cached.get("sources") or ()):
+            return False
+        print("[BUILD] Source tree unchanged since the last build, nothing to compile")
+        self.aux_classpath[:] = cached["aux_classpath"]
+        reporter.emit("build_cached", restored=self.outputs_changed)
+        return True
+
+    def _run_build(self, file_path: str, bin_dir: str, project_dir: str, build_tool: str,
+                   reporter, module: Optional[BuildModule] = None) -> bool:
+        try:
+            incremental = self._compile_incremental(
+                file_path, bin_dir, project_dir, build_tool)
+            if incremental is not None:
+                if not incremental:
+                    self._incremental_failed = True
+                    return False
+            elif build_tool == 'maven':
+                if not self._compile_maven_project(project_dir, reporter, module):
                     return False
             elif build_tool == 'gradle':
                 try:
-                    if not self._compile_gradle_project(project_dir):
+                    if not self._compile_gradle_project(project_dir, reporter, module):
                         return False
                 except RuntimeError as e:
                     raise e
@@ -412,6 +767,155 @@ class BuildSystemManager:
             print(f"Error during compilation: {str(e)}")
             return False
 
+    def _compile_incremental(self, file_path: str, bin_dir: str, project_dir: str,
+                             build_tool: str) -> Optional[bool]:
+        """
+        Recompile only file_path against the classes already in bin_dir and
+        the project's dependency classpath, replacing the file's previous
+        class files and deleting ones it no longer produces (e.g. removed
+        inner classes).
+
+        Returns None when a full build is needed instead: the file was never
+        compiled into bin_dir, its API changed so dependents may need
+        recompiling, or javac failed without a resolved dependency classpath.
+        """
+        if not self.incremental:
+            return None
+        file_path = os.path.abspath(file_path)
+        bin_dir = os.path.abspath(bin_dir)
+        previous = self._previous_outputs(file_path, bin_dir)
+        if not previous:
+            return None
+
+        dependencies = self._dependency_classpath(project_dir, build_tool)
+        with tempfile.TemporaryDirectory(prefix="javac_") as out_dir:
+            cmd = [
+                "javac",
+                "-d", out_dir,
+                "-cp", os.pathsep.join([bin_dir, *self.aux_classpath, *(dependencies or [])]),
+                "-encoding", "UTF-8",
+                "-implicit:none",  # Never write classes for other sources
+                "-proc:none",
+                "-nowarn"
+            ]
+            if build_tool == 'none':
+                # Without a build tool nothing else names the other sources, and
+                # ones never compiled into bin_dir would otherwise not resolve;
+                # the full javac build uses the same source path
+                cmd += ["-sourcepath", self.output_dir]
+            cmd.append(file_path)
+            print(f"[BUILD] Incremental compile of {os.path.basename(file_path)}")
+            result = run_tool(self.tool_host, "javac", cmd[1:], cmd,
+                              capture_output=True, text=True, check=False)
+            if result.returncode != 0:
+                if dependencies is None:
+                    print("[BUILD] Incremental compile failed without a resolved classpath, running a full build")
+                    return None
+                print(f"[BUILD] Incremental compile failed:\n{result.stderr}")
+                self._build_output.extend(result.stderr.splitlines())
+                return False
+
+            fresh = {}
+            for root, _, files in os.walk(out_dir):
+                for file in files:
+                    if file.endswith('.class'):
+                        path = os.path.join(root, file)
+                        fresh[os.path.relpath(path, out_dir)] = path
+            if not fresh or self._api_changed(previous, fresh):
+                print("[BUILD] API of the edited file changed, running a full build")
+                return None
+
+            stale = set(previous) - set(fresh)
+            for rel_path in stale:
+                os.remove(previous[rel_path])
+            for rel_path, path in fresh.items():
+                target = os.path.join(bin_dir, rel_path)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.copy2(path, target)
+
+        self._source_outputs[file_path] = set(fresh)
+        print(f"[BUILD] Replaced {len(fresh)} class files, removed {len(stale)} stale ones")
+        return True
+
+    def _previous_outputs(self, file_path: str, bin_dir: str) -> Dict[str, str]:
+        """
+        Class files in bin_dir compiled from file_path, by path relative to
+        bin_dir: Name.class and Name$*.class in its package directory, plus
+        whatever an earlier incremental compile recorded for it.
+        """
+        name = os.path.splitext(os.path.basename(file_path))[0]
+        try:
+            with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+                match = re.search(r'^\s*package\s+([\w.]+)\s*;', f.read(), re.M)
+        except OSError:
+            return {}
+        package_dir = os.path.join(*match.group(1).split('.')) if match else ''
+
+        outputs = {}
+        absolute_dir = os.path.join(bin_dir, package_dir)
+        if os.path.isdir(absolute_dir):
+            for file in os.listdir(absolute_dir):
+                if file == name + '.class' or (file.startswith(name + '$') and file.endswith('.class')):
+                    outputs[os.path.join(package_dir, file)] = os.path.join(absolute_dir, file)
+        for rel_path in self._source_outputs.get(file_path, ()):
+            if os.path.exists(os.path.join(bin_dir, rel_path)):
+                outputs[rel_path] = os.path.join(bin_dir, rel_path)
+        return outputs
+
+    @staticmethod
+    def _api_changed(previous: Dict[str, str], fresh: Dict[str, str]) -> bool:
+        """Whether code compiled against the previous classes could break with the fresh ones."""
+        for rel_path, old_path in previous.items():
+            try:
+                old = api_signature(old_path)
+                new = api_signature(fresh[rel_path]) if rel_path in fresh else None
+            except (OSError, ValueError):
+                return True
+            if old != new:
+                return True
+        return False
+
+    def _dependency_classpath(self, project_dir: str, build_tool: str) -> Optional[List[str]]:
+        """
+        Jars and class directories the project compiles against, or None when
+        they could not be resolved. Maven projects are resolved once per
+        version of their pom files.
+        """
+        if build_tool == 'none':
+            return list(getattr(self, 'external_deps', None) or [])
+        if build_tool != 'maven':
+            return None
+
+        poms = sorted(glob.glob(os.path.join(project_dir, '**', 'pom.xml'), recursive=True))
+        stamp = tuple((pom, os.path.getmtime(pom)) for pom in poms)
+        cached = self._dependency_classpaths.get(project_dir)
+        if cached and cached[0] == stamp:
+            return cached[1]
+
+        output_name = 'spotbugs-classpath.txt'
+        cmd = [*self._maven_command(project_dir), '-q', 'dependency:build-classpath',
+               f'-Dmdep.outputFile=target/{output_name}']
+        print(f"[BUILD] Resolving the Maven dependency classpath in {project_dir}")
+        try:
+            result = subprocess.run(cmd, cwd=project_dir, capture_output=True, text=True,
+                                    shell=(os.name == 'nt'))
+        except OSError as e:
+            print(f"[BUILD] Could not run Maven: {e}")
+            return None
+        if result.returncode != 0:
+            print(f"[BUILD] Could not resolve the Maven classpath: {result.stdout[-2000:]}")
+            return None
+
+        classpath = []
+        for pom in poms:
+            output = os.path.join(os.path.dirname(pom), 'target', output_name)
+            if os.path.exists(output):
+                with open(output, 'r', encoding='utf-8') as f:
+                    classpath.extend(p for p in f.read().strip().split(os.pathsep)
+                                     if p and p not in classpath)
+        self._dependency_classpaths[project_dir] = (stamp, classpath)
+        return classpath
+
     def _compile_with_javac(self, file_path: str, bin_dir: str) -> bool:
         """Compile Java files directly using javac."""
         try:
@@ -462,8 +966,8 @@ class BuildSystemManager:
             print(f"Running javac command: {' '.join(cmd)}")
 
             # Run the compilation
-            result = subprocess.run(
-                cmd,
+            result = run_tool(
+                self.tool_host, "javac", cmd[1:], cmd,
                 capture_output=True,
                 text=True,
                 check=False  # Don't raise exception on non-zero exit
@@ -474,6 +978,7 @@ class BuildSystemManager:
                 print(
                     f"Javac compilation failed with return code {result.returncode}")
                 print(f"Compiler error output:\n{result.stderr}")
+                self._build_output.extend(result.stderr.splitlines())
                 return False
 
             # Verify that .class files were created
@@ -494,69 +999,16 @@ class BuildSystemManager:
             return False
 
     def _find_dependent_files(self, file_path: str) -> List[str]:
-        """Find all Java files that the target file depends on."""
+        """Find the Java files declaring the types the target file uses, from the symbol index."""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-
-            # Find all import statements
-            import_pattern = r'import\s+([^;]+);'
-            imports = re.findall(import_pattern, content)
-            print(f"Found {len(imports)} imports in {file_path}")
-
-            # Get the package name of the target file
-            package_pattern = r'package\s+([^;]+);'
-            package_match = re.search(package_pattern, content)
-            target_package = package_match.group(1) if package_match else ""
-            print(f"Source file package: {target_package}")
-
-            # Find all Java files in the project
-            all_java_files = []
-            for root, _, files in os.walk(self.output_dir):
-                for file in files:
-                    if file.endswith('.java'):
-                        all_java_files.append(os.path.join(root, file))
-
-            # Find files that contain the imported classes
-            dependent_files = []
-            for java_file in all_java_files:
-                if java_file == file_path:
-                    continue
-
-                with open(java_file, 'r', encoding='utf-8') as f:
-                    file_content = f.read()
-
-                # Get the package of this file
-                file_package_match = re.search(package_pattern, file_content)
-                file_package = file_package_match.group(
-                    1) if file_package_match else ""
-                print(
-                    f"Checking dependency: {os.path.basename(java_file)} in package {file_package}")
-
-                # Check if this file contains any of the imported classes
-                for imp in imports:
-                    # Convert import to class name
-                    class_name = imp.split('.')[-1]
-                    # Look for class declaration
-                    if f"class {class_name}" in file_content:
-                        print(
-                            f"Found dependency: {os.path.basename(java_file)} contains imported class {class_name}")
-                        dependent_files.append(java_file)
-                        break
-
-                # If files are in the same package, check for direct references
-                if file_package == target_package:
-                    # Look for class declarations that are referenced in the target file
-                    class_decl_pattern = r'class\s+(\w+)'
-                    class_decls = re.findall(class_decl_pattern, file_content)
-                    for decl in class_decls:
-                        if decl in content:
-                            print(
-                                f"Found same-package dependency: {os.path.basename(java_file)} contains class {decl}")
-                            dependent_files.append(java_file)
-                            break
-
-            return list(set(dependent_files))  # Remove duplicates
+            if not self.symbol_index.built:
+                self.symbol_index.refresh()
+            else:
+                # The file being compiled is usually the one that was just edited
+                self.symbol_index.update_file(file_path)
+            dependent_files = self.symbol_index.dependencies(file_path)
+            print(f"Found {len(dependent_files)} files declaring types used by {os.path.basename(file_path)}")
+            return dependent_files
 
         except Exception as e:
             print(f"Error while finding dependencies: {str(e)}")
@@ -0,0 +1,167 @@
+import json
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+
+def serialize_value(value: Any) -> bytes:
+    """Encode a JSON-compatible value as compressed compact JSON."""
+    return zlib.compress(json.dumps(value, separators=(',', ':')).encode('utf-8'))
+
+
+def deserialize_value(data: bytes) -> Any:
+    """Decode a value produced by serialize_value."""
+    return json.loads(zlib.decompress(data).decode('utf-8'))
+
+
+class CacheBackend:
+    """
+    Key/value storage used by the analysis and metrics caches.
+
+    Keys live in namespaces (e.g. "analysis", "ck_metrics"); each namespace
+    may have its own time-to-live in seconds, where None means no expiry.
+    Values must be JSON-compatible.
+    """
+
+    def __init__(self, ttls: Optional[Dict[str, Optional[int]]] = None):
+        self.ttls = dict(ttls or {})
+
+    def ttl_for(self, namespace: str) -> Optional[int]:
+        """Return the TTL configured for a namespace, if any."""
+        ttl = self.ttls.get(namespace)
+        return ttl if ttl else None
+
+    def get(self, namespace: str, key: str) -> Any:
+        raise NotImplementedError
+
+    def set(self, namespace: str, key: str, value: Any):
+        raise NotImplementedError
+
+    def delete(self, namespace: str, key: str):
+        raise NotImplementedError
+
+    def keys(self, namespace: str) -> List[str]:
+        raise NotImplementedError
+
+    def clear(self, namespace: str):
+        raise NotImplementedError
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """Process-local backend with per-namespace TTLs and optional LRU bounds."""
+
+    def __init__(self, ttls: Optional[Dict[str, Optional[int]]] = None, max_entries: Optional[Dict[str, int]] = None):
+        super().__init__(ttls)
+        self.max_entries = dict(max_entries or {})
+        self._namespaces = {}
+        self._lock = threading.Lock()
+
+    def _entries(self, namespace: str) -> OrderedDict:
+        return self._namespaces.setdefault(namespace, OrderedDict())
+
+    def get(self, namespace: str, key: str) -> Any:
+        with self._lock:
+            entries = self._entries(namespace)
+            entry = entries.get(key)
+            if entry is None:
+                return None
+            data, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del entries[key]
+                return None
+            entries.move_to_end(key)
+        return deserialize_value(data)
+
+    def set(self, namespace: str, key: str, value: Any):
+        ttl = self.ttl_for(namespace)
+        expires_at = time.time() + ttl if ttl else None
+        data = serialize_value(value)
+        with self._lock:
+            entries = self._entries(namespace)
+            entries[key] = (data, expires_at)
+            entries.move_to_end(key)
+            limit = self.max_entries.get(namespace)
+            while limit and len(entries) > limit:
+                evicted, _ = entries.popitem(last=False)
+                print(f"[CACHE] Evicted {namespace}:{evicted}")
+
+    def delete(self, namespace: str, key: str):
+        with self._lock:
+            self._entries(namespace).pop(key, None)
+
+    def keys(self, namespace: str) -> List[str]:
+        with self._lock:
+            return list(self._entries(namespace).keys())
+
+    def clear(self, namespace: str):
+        with self._lock:
+            self._entries(namespace).clear()
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Backend shared by every host pointing at the same Redis server.
+
+    The client may be any object implementing the redis-py calls used here
+    (get, set, delete, scan_iter), such as redis.Redis or fakeredis.FakeRedis.
+    """
+
+    def __init__(self, client, ttls: Optional[Dict[str, Optional[int]]] = None, prefix: str = "spotbugs1"):
+        super().__init__(ttls)
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, ttls: Optional[Dict[str, Optional[int]]] = None, prefix: str = "spotbugs1"):
+        """Connect to a redis:// URL, or an in-memory server for fakeredis:// URLs."""
+        if url.startswith("fakeredis://"):
+            try:
+                import fakeredis
+            except ImportError:
+                raise RuntimeError(
+                    "fakeredis:// cache URLs require the fakeredis package")
+            client = fakeredis.FakeRedis()
+        else:
+            import redis
+            client = redis.Redis.from_url(url)
+        return cls(client, ttls, prefix)
+
+    def _full_key(self, namespace: str, key: str) -> str:
+        return f"{self.prefix}:{namespace}:{key}"
+
+    def get(self, namespace: str, key: str) -> Any:
+        data = self.client.get(self._full_key(namespace, key))
+        return deserialize_value(data) if data is not None else None
+
+    def set(self, namespace: str, key: str, value: Any):
+        self.client.set(self._full_key(namespace, key),
+                        serialize_value(value), ex=self.ttl_for(namespace))
+
+    def delete(self, namespace: str, key: str):
+        self.client.delete(self._full_key(namespace, key))
+
+    def keys(self, namespace: str) -> List[str]:
+        start = len(self._full_key(namespace, ""))
+        keys = []
+        for full_key in self.client.scan_iter(match=self._full_key(namespace, "*")):
+            if isinstance(full_key, bytes):
+                full_key = full_key.decode('utf-8')
+            keys.append(full_key[start:])
+        return keys
+
+    def clear(self, namespace: str):
+        for key in self.keys(namespace):
+            self.delete(namespace, key)
+
+
+def create_cache_backend(url: Optional[str] = None, ttls: Optional[Dict[str, Optional[int]]] = None,
+                         max_entries: Optional[Dict[str, int]] = None) -> CacheBackend:
+    """Build the backend named by a cache URL; no URL means an in-process backend."""
+    if not url or url.startswith("memory://"):
+        return InMemoryCacheBackend(ttls, max_entries)
+    if url.startswith(("redis://", "rediss://", "unix://", "fakeredis://")):
+        print(f"[CACHE] Using Redis cache backend at {url.split('@')[-1]}")
+        return RedisCacheBackend.from_url(url, ttls)
+    raise ValueError(f"Unsupported cache backend URL: {url}")
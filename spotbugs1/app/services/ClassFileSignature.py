@@ -0,0 +1,122 @@
+import struct
+from typing import List, Optional, Tuple
+
+ACC_PUBLIC = 0x0001
+ACC_PRIVATE = 0x0002
+ACC_PROTECTED = 0x0004
+ACC_STATIC = 0x0008
+ACC_FINAL = 0x0010
+ACC_INTERFACE = 0x0200
+ACC_ABSTRACT = 0x0400
+ACC_SYNTHETIC = 0x1000
+ACC_ANNOTATION = 0x2000
+ACC_ENUM = 0x4000
+
+# Flags that change what code compiled against a member or type may do
+_MEMBER_FLAGS = ACC_PUBLIC | ACC_PRIVATE | ACC_PROTECTED | ACC_STATIC | ACC_FINAL | ACC_ABSTRACT
+_CLASS_FLAGS = ACC_PUBLIC | ACC_FINAL | ACC_INTERFACE | ACC_ABSTRACT | ACC_ANNOTATION | ACC_ENUM
+
+# Constant pool entry sizes in bytes after the tag, for the fixed-size kinds
+_CONSTANT_SIZES = {3: 4, 4: 4, 5: 8, 6: 8, 7: 2, 8: 2, 9: 4, 10: 4, 11: 4,
+                   12: 4, 15: 3, 16: 2, 17: 4, 18: 4, 19: 2, 20: 2}
+
+
+class _Reader:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = 0
+
+    def take(self, size: int) -> bytes:
+        if self.pos + size > len(self.data):
+            raise ValueError("truncated class file")
+        chunk = self.data[self.pos:self.pos + size]
+        self.pos += size
+        return chunk
+
+    def u2(self) -> int:
+        return struct.unpack(">H", self.take(2))[0]
+
+    def u4(self) -> int:
+        return struct.unpack(">I", self.take(4))[0]
+
+
+def _read_constant_pool(reader: _Reader) -> List:
+    pool = [None]
+    count = reader.u2()
+    while len(pool) < count:
+        tag = reader.take(1)[0]
+        if tag == 1:
+            pool.append((tag, reader.take(reader.u2()).decode("utf-8", "replace")))
+        elif tag in _CONSTANT_SIZES:
+            pool.append((tag, reader.take(_CONSTANT_SIZES[tag])))
+            if tag in (5, 6):
+                # Longs and doubles take two slots
+                pool.append(None)
+        else:
+            raise ValueError(f"unknown constant pool tag {tag}")
+    return pool
+
+
+def _class_name(pool: List, index: int) -> Optional[str]:
+    if not index:
+        return None
+    return pool[struct.unpack(">H", pool[index][1])[0]][1]
+
+
+def _read_attributes(reader: _Reader, pool: List) -> dict:
+    attributes = {}
+    for _ in range(reader.u2()):
+        name = pool[reader.u2()][1]
+        attributes[name] = reader.take(reader.u4())
+    return attributes
+
+
+def api_signature(path: str) -> Optional[Tuple]:
+    """
+    What other classes can compile against in a .class file: the type's
+    flags, supertypes, and its non-private, non-synthetic fields and
+    methods with their descriptors (plus the values of compile-time
+    constants, which javac inlines into callers).
+
+    Returns None for classes nothing outside their source file can name:
+    private nested classes and anonymous or local classes. Raises
+    ValueError for a file that is not a readable class file.
+    """
+    with open(path, "rb") as f:
+        reader = _Reader(f.read())
+    if reader.u4() != 0xCAFEBABE:
+        raise ValueError(f"{path} is not a class file")
+    reader.take(4)  # minor and major version
+    pool = _read_constant_pool(reader)
+
+    access = reader.u2()
+    this_index = reader.u2()
+    this_name = _class_name(pool, this_index)
+    super_name = _class_name(pool, reader.u2())
+    interfaces = sorted(_class_name(pool, reader.u2()) for _ in range(reader.u2()))
+
+    members = []
+    for kind in ("field", "method"):
+        for _ in range(reader.u2()):
+            member_access = reader.u2()
+            name = pool[reader.u2()][1]
+            descriptor = pool[reader.u2()][1]
+            attributes = _read_attributes(reader, pool)
+            if member_access & (ACC_PRIVATE | ACC_SYNTHETIC):
+                continue
+            constant = None
+            if "ConstantValue" in attributes:
+                constant = pool[struct.unpack(">H", attributes["ConstantValue"])[0]]
+            members.append((kind, name, descriptor, member_access & _MEMBER_FLAGS, constant))
+
+    inner_classes = _read_attributes(reader, pool).get("InnerClasses")
+    if inner_classes:
+        inner = _Reader(inner_classes)
+        for _ in range(inner.u2()):
+            inner_index, outer_index, name_index, inner_access = (
+                inner.u2(), inner.u2(), inner.u2(), inner.u2())
+            # Anonymous and local classes have no outer class entry
+            if inner_index == this_index and (not outer_index or inner_access & ACC_PRIVATE):
+                return None
+
+    return (this_name, access & _CLASS_FLAGS, super_name, tuple(interfaces), tuple(sorted(members, key=repr)))
@@ -0,0 +1,50 @@
+import hashlib
+from typing import List, Optional
+
+from app.services.CacheBackend import CacheBackend, InMemoryCacheBackend
+
+
+def digest_file(path: str) -> str:
+    """Return a stable digest of a file's bytes, such as a compiled class."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ClassFindingsCache:
+    """
+    SpotBugs findings per compiled class, keyed on the class name, the
+    digest of its bytecode and the analysis configuration.
+
+    Values are the class's BugInstance elements serialized as XML strings
+    (an empty list when SpotBugs found nothing), so a report can be
+    rebuilt from cached classes without running SpotBugs. Entries are
+    content-addressed and never go stale, so one cache can be shared by
+    every caller and every workspace.
+    """
+
+    NAMESPACE = "spotbugs_classes"
+
+    def __init__(self, backend: Optional[CacheBackend] = None, max_entries: int = 50000):
+        self.backend = backend or InMemoryCacheBackend(
+            max_entries={self.NAMESPACE: max_entries})
+
+    @staticmethod
+    def _key(class_name: str, class_digest: str, config_digest: str) -> str:
+        return f"{config_digest[:16]}|{class_name}|{class_digest}"
+
+    def get(self, class_name: str, class_digest: str, config_digest: str) -> Optional[List[str]]:
+        """Return the serialized BugInstances for a class, or None on a miss."""
+        return self.backend.get(self.NAMESPACE, self._key(class_name, class_digest, config_digest))
+
+    def set(self, class_name: str, class_digest: str, config_digest: str, bug_instances: List[str]):
+        self.backend.set(self.NAMESPACE, self._key(
+            class_name, class_digest, config_digest), bug_instances)
+
+    def clear(self):
+        self.backend.clear(self.NAMESPACE)
+
+    def __len__(self):
+        return len(self.backend.keys(self.NAMESPACE))
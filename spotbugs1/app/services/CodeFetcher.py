@@ -97,15 +97,15 @@ class CodeFetcher:
 
     def clone_repo(self):
         """Clone the repository (either forked or user's own)."""
-        clone_dir = os.path.join("cloned_repo")
+        clone_dir = self.output_dir
 
         def force_remove_readonly(func, path, excinfo):
             os.chmod(path, stat.S_IWRITE)
             func(path)
 
-        # Forcefully remove the existing cloned_repo directory
+        # Forcefully remove the existing clone directory
         if os.path.exists(clone_dir):
-            print("[CLEANUP] Removing existing cloned_repo...")
+            print(f"[CLEANUP] Removing existing clone at {clone_dir}...")
             try:
                 shutil.rmtree(clone_dir, onerror=force_remove_readonly)
             except Exception as e:
@@ -167,6 +167,16 @@ class CodeFetcher:
         print(f"[INFO] Found {len(java_files)} Java files in repository")
         return java_files
 
+    def current_commit_sha(self):
+        """Return the SHA of the checked-out commit, or None if there is no clone."""
+        try:
+            if not self.repo and self.local_repo_path:
+                self.repo = git.Repo(self.local_repo_path)
+            return self.repo.head.commit.hexsha if self.repo else None
+        except Exception as e:
+            print(f"[WARNING] Could not read current commit: {e}")
+            return None
+
     @staticmethod
     def extract_repo_details(github_url):
         """Extract repository details from GitHub URL.
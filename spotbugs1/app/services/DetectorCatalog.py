@@ -0,0 +1,71 @@
+import os
+import zipfile
+from typing import Dict, List, Sequence, Set
+
+from lxml import etree
+
+
+class DetectorCatalog:
+    """
+    Which SpotBugs detectors can report each bug pattern, read from the
+    findbugs.xml plugin descriptors in the SpotBugs distribution (the core
+    spotbugs.jar and any plugin jars).
+
+    Detectors that report nothing themselves but build databases other
+    detectors use are kept as support detectors, so a run limited to the
+    reporting detectors of one pattern still sees the same facts.
+    Detectors that a plugin disables by default are left out, since a
+    normal run would not use them either.
+    """
+
+    def __init__(self, jars: Sequence[str]):
+        self.jars = list(jars)
+        self._pattern_detectors = None
+        self._support_detectors = None
+
+    def _load(self):
+        pattern_detectors: Dict[str, Set[str]] = {}
+        support_detectors: Set[str] = set()
+        for jar in self.jars:
+            try:
+                with zipfile.ZipFile(jar) as archive:
+                    root = etree.fromstring(archive.read("findbugs.xml"))
+            except (KeyError, OSError, zipfile.BadZipFile, etree.XMLSyntaxError):
+                continue
+            for detector in root.iterfind("Detector"):
+                if detector.get("disabled") == "true":
+                    continue
+                # -visitors takes the detector's simple class name
+                name = detector.get("class", "").rpartition(".")[2]
+                patterns = [p.strip() for p in detector.get("reports", "").split(",") if p.strip()]
+                if not patterns:
+                    support_detectors.add(name)
+                for pattern in patterns:
+                    pattern_detectors.setdefault(pattern, set()).add(name)
+        print(f"[SPOTBUGS] Loaded detectors for {len(pattern_detectors)} bug patterns")
+        self._pattern_detectors = pattern_detectors
+        self._support_detectors = support_detectors
+
+    def reporting_detectors(self, bug_pattern: str) -> List[str]:
+        """Detectors that can report bug_pattern; empty for an unknown pattern."""
+        if self._pattern_detectors is None:
+            self._load()
+        return sorted(self._pattern_detectors.get(bug_pattern.strip().upper(), ()))
+
+    def detectors_for(self, bug_pattern: str) -> List[str]:
+        """
+        The detectors to enable to check for bug_pattern: its reporting
+        detectors plus the support detectors. Empty for an unknown pattern.
+        """
+        reporting = self.reporting_detectors(bug_pattern)
+        if not reporting:
+            return []
+        return sorted(set(reporting) | self._support_detectors)
+
+    @classmethod
+    def for_distribution(cls, spotbugs_home: str) -> "DetectorCatalog":
+        """Catalog for a SpotBugs install: its spotbugs.jar and plugin directory."""
+        plugin_dir = os.path.join(spotbugs_home, "plugin")
+        plugins = sorted(os.path.join(plugin_dir, f) for f in os.listdir(plugin_dir)
+                         if f.endswith(".jar")) if os.path.isdir(plugin_dir) else []
+        return cls([os.path.join(spotbugs_home, "lib", "spotbugs.jar"), *plugins])
@@ -0,0 +1,193 @@
+import json
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Set
+
+_COMMENTS_AND_STRINGS = re.compile(
+    r'//[^\n]*|/\*.*?\*/|"""(?:\\.|[^\\])*?"""|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'', re.S)
+_PACKAGE = re.compile(r'^\s*package\s+([\w.]+)\s*;', re.M)
+_IMPORT = re.compile(r'^\s*import\s+(static\s+)?([\w.]+?)(\.\*)?\s*;', re.M)
+_DECLARATION = re.compile(r'\b(?:class|interface|enum|record)\s+([A-Za-z_$][\w$]*)')
+# Type names by convention start with a capital letter
+_TYPE_REFERENCE = re.compile(r'\b[A-Z][\w$]*')
+
+
+def parse_java_symbols(source: str) -> Dict:
+    """
+    The package of a Java source, the types it declares (nested ones
+    included), its imports and the capitalized identifiers it uses, which
+    is where its type references are. Comments and string literals are
+    ignored.
+    """
+    code = _COMMENTS_AND_STRINGS.sub(lambda m: '\n' * m.group(0).count('\n'), source)
+    package_match = _PACKAGE.search(code)
+    imports, on_demand = {}, []
+    for static, name, wildcard in _IMPORT.findall(code):
+        if static:
+            # import static a.b.Type.member; and import static a.b.Type.*; both need a.b.Type
+            name = name if wildcard else name.rpartition('.')[0]
+            imports[name.rpartition('.')[2]] = name
+        elif wildcard:
+            on_demand.append(name)
+        else:
+            imports[name.rpartition('.')[2]] = name
+    body = _IMPORT.sub('', _PACKAGE.sub('', code))
+    return {
+        "package": package_match.group(1) if package_match else "",
+        "declares": sorted(set(_DECLARATION.findall(body))),
+        "imports": imports,
+        "on_demand": on_demand,
+        "references": sorted(set(_TYPE_REFERENCE.findall(body)))
+    }
+
+
+class JavaSymbolIndex:
+    """
+    Which types each .java file under root declares and refers to, so the
+    files a source depends on are found with dictionary lookups instead of
+    reading the whole tree.
+
+    refresh() brings the whole index up to date, re-reading only files
+    whose size or mtime changed; update_file() does the same for one file.
+    With an index_path the index is saved there and reloaded, so a restart
+    does not re-read unchanged files.
+    """
+
+    def __init__(self, root: str, index_path: Optional[str] = None):
+        self.root = os.path.abspath(root)
+        self.index_path = index_path
+        # Relative path -> parsed symbols plus the stat they were read at
+        self._files: Dict[str, Dict] = {}
+        # Package -> simple type name -> relative paths declaring it
+        self._packages: Dict[str, Dict[str, Set[str]]] = {}
+        self._lock = threading.Lock()
+        # Whether refresh() has checked every file since the tree was last replaced
+        self.built = False
+        if index_path:
+            try:
+                with open(index_path, 'r', encoding='utf-8') as f:
+                    saved = json.load(f)
+                if saved.get("root") == self.root:
+                    for rel_path, record in saved["files"].items():
+                        self._add(rel_path, record)
+            except (OSError, ValueError, KeyError):
+                pass
+
+    def invalidate(self):
+        """Make the next lookup check every file, e.g. after a new clone into root."""
+        self.built = False
+
+    def refresh(self) -> int:
+        """Re-read new and changed files, drop deleted ones; returns how many were read."""
+        with self._lock:
+            seen = set()
+            changed = 0
+            for dir_path, dirs, files in os.walk(self.root):
+                dirs[:] = [d for d in dirs if not d.startswith('.')]
+                for file in files:
+                    if file.endswith('.java'):
+                        rel_path = os.path.relpath(os.path.join(dir_path, file), self.root).replace(os.sep, '/')
+                        seen.add(rel_path)
+                        changed += self._update(rel_path)
+            for rel_path in set(self._files) - seen:
+                self._remove(rel_path)
+                changed += 1
+            self.built = True
+            if changed:
+                print(f"[SYMBOLS] Indexed {changed} changed files, {len(self._files)} in total")
+                self._save()
+            return changed
+
+    def update_file(self, path: str) -> bool:
+        """Re-read one file if it changed (or drop it if deleted); returns whether it changed."""
+        rel_path = self._relative(path)
+        if rel_path is None:
+            return False
+        # Not saved: after a restart refresh() re-reads the file anyway, as its stat changed
+        with self._lock:
+            return bool(self._update(rel_path))
+
+    def files_declaring(self, package: str, name: str) -> List[str]:
+        """Absolute paths of the files declaring type name in package."""
+        return sorted(os.path.join(self.root, p) for p in self._packages.get(package, {}).get(name, ()))
+
+    def dependencies(self, path: str) -> List[str]:
+        """
+        Absolute paths of the files declaring the types the file at path uses:
+        its single-type imports, and the names it references that resolve in
+        its own package or a package it imports on demand.
+        """
+        rel_path = self._relative(path)
+        record = self._files.get(rel_path) if rel_path else None
+        if record is None:
+            return []
+        found = set()
+        for qualified_name in record["imports"].values():
+            found.update(self._declaring_qualified(qualified_name))
+        for name in record["references"]:
+            if name in record["imports"]:
+                continue
+            for package in (record["package"], *record["on_demand"]):
+                found.update(self._packages.get(package, {}).get(name, ()))
+        found.discard(rel_path)
+        return sorted(os.path.join(self.root, p) for p in found)
+
+    def _declaring_qualified(self, qualified_name: str) -> Set[str]:
+        # a.b.Outer.Inner is declared in the file of a.b.Outer
+        parts = qualified_name.split('.')
+        for i in range(len(parts) - 1, 0, -1):
+            files = self._packages.get('.'.join(parts[:i]), {}).get(parts[i])
+            if files:
+                return files
+        return set()
+
+    def _relative(self, path: str) -> Optional[str]:
+        path = os.path.abspath(path)
+        if not path.startswith(self.root + os.sep):
+            return None
+        return os.path.relpath(path, self.root).replace(os.sep, '/')
+
+    def _update(self, rel_path: str) -> int:
+        path = os.path.join(self.root, rel_path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            if rel_path in self._files:
+                self._remove(rel_path)
+                return 1
+            return 0
+        signature = [stat.st_mtime_ns, stat.st_size]
+        previous = self._files.get(rel_path)
+        if previous and previous["stat"] == signature:
+            return 0
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            record = parse_java_symbols(f.read())
+        record["stat"] = signature
+        if previous:
+            self._remove(rel_path)
+        self._add(rel_path, record)
+        return 1
+
+    def _add(self, rel_path: str, record: Dict):
+        self._files[rel_path] = record
+        types = self._packages.setdefault(record["package"], {})
+        for name in record["declares"]:
+            types.setdefault(name, set()).add(rel_path)
+
+    def _remove(self, rel_path: str):
+        record = self._files.pop(rel_path)
+        types = self._packages.get(record["package"], {})
+        for name in record["declares"]:
+            types.get(name, set()).discard(rel_path)
+            if not types.get(name):
+                types.pop(name, None)
+
+    def _save(self):
+        if not self.index_path:
+            return
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"root": self.root, "files": self._files}, f)
+        os.replace(tmp_path, self.index_path)
@@ -0,0 +1,241 @@
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, Optional
+
+
+class Job:
+    """A unit of long-running work and its eventual HTTP-style result."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+    def __init__(self, kind: str, on_change: Optional[Callable[["Job"], None]] = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = self.QUEUED
+        self.result = None
+        self.status_code = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.events = []
+        self._done = threading.Event()
+        self._events_changed = threading.Condition()
+        self._on_change = on_change
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Dict) -> "Job":
+        """A read-only copy of a job from its snapshot(), e.g. one run by another worker."""
+        job = cls(snapshot["kind"])
+        job.id = snapshot["job_id"]
+        for field in ("status", "result", "status_code", "error",
+                      "created_at", "started_at", "finished_at", "events"):
+            setattr(job, field, snapshot[field])
+        if job.status in (cls.SUCCEEDED, cls.FAILED):
+            job._done.set()
+        return job
+
+    def emit(self, event_type: str, data: Dict):
+        """Record a progress event; usable directly as a ProgressReporter listener."""
+        with self._events_changed:
+            self.events.append({
+                "id": len(self.events),
+                "event": event_type,
+                "data": data
+            })
+            self._events_changed.notify_all()
+        self.changed()
+
+    def changed(self):
+        """Publish the job's current state to whoever tracks it across workers."""
+        if self._on_change:
+            self._on_change(self)
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def to_dict(self) -> Dict:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "result": self.result,
+            "status_code": self.status_code,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+    def snapshot(self) -> Dict:
+        """to_dict() plus the events so far."""
+        with self._events_changed:
+            return dict(self.to_dict(), events=list(self.events))
+
+
+class JobManager:
+    """
+    Runs long operations on a bounded thread pool so request threads return at once.
+
+    Job functions return a (payload, status_code) tuple, the same shape the
+    routes send back, so a synchronous route can simply wait on its job.
+    Finished jobs are kept for retention_seconds and then discarded.
+
+    With a store (an AnalysisStore), every state change and event is also
+    written there, so with several worker processes a job can be polled or
+    streamed from any of them, not only the one running it. Jobs of other
+    workers are read back by polling the store every poll_seconds.
+    """
+
+    def __init__(self, max_workers: int = 4, retention_seconds: int = 3600,
+                 store=None, poll_seconds: float = 0.5):
+        self.retention_seconds = retention_seconds
+        self.store = store
+        self.poll_seconds = poll_seconds
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="analysis-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, fn: Callable, *args, with_progress: bool = False, **kwargs) -> Job:
+        """
+        Queue fn(*args, **kwargs) and return its job immediately.
+
+        With with_progress, fn also receives progress=job.emit so it can
+        publish stage events for /jobs/<id>/events.
+        """
+        self.purge_expired()
+        job = Job(kind, on_change=self._publish)
+        if with_progress:
+            kwargs["progress"] = job.emit
+        with self._lock:
+            self._jobs[job.id] = job
+        job.changed()
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        print(f"[JOBS] Queued {kind} job {job.id}")
+        return job
+
+    def _run(self, job: Job, fn: Callable, args, kwargs):
+        job.status = Job.RUNNING
+        job.started_at = time.time()
+        job.changed()
+        try:
+            job.result, job.status_code = fn(*args, **kwargs)
+            job.status = Job.SUCCEEDED
+        except Exception as e:
+            traceback.print_exc()
+            job.error = str(e)
+            job.result = {"error": str(e)}
+            job.status_code = 500
+            job.status = Job.FAILED
+        finally:
+            job.finished_at = time.time()
+            job.emit("result", {"status": job.status,
+                                "status_code": job.status_code, "result": job.result})
+            job._done.set()
+            print(
+                f"[JOBS] {job.kind} job {job.id} {job.status} in {job.finished_at - job.started_at:.2f}s")
+
+    def _publish(self, job: Job):
+        if self.store:
+            self.store.put_job(job.id, job.snapshot(), job.finished_at)
+
+    def _local(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _stored(self, job_id: str) -> Optional[Job]:
+        snapshot = self.store.get_job(job_id) if self.store else None
+        return Job.from_snapshot(snapshot) if snapshot else None
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """The job, whether this process runs it or another worker does."""
+        return self._local(job_id) or self._stored(job_id)
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Job]:
+        """Block until the job finishes or the timeout elapses, then return it."""
+        job = self._local(job_id)
+        if job:
+            job._done.wait(timeout)
+            return job
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self._stored(job_id)
+            if job is None or job.done:
+                return job
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return job
+            time.sleep(self.poll_seconds if remaining is None else min(self.poll_seconds, remaining))
+
+    def iter_events(self, job_id: str, start: int = 0, heartbeat_seconds: float = 15.0) -> Iterator[Optional[Dict]]:
+        """
+        Yield a job's events from index start until its final result event.
+
+        None is yielded whenever heartbeat_seconds pass without an event, so
+        streaming callers can keep idle connections alive.
+        """
+        job = self._local(job_id)
+        if not job:
+            yield from self._iter_stored_events(job_id, start, heartbeat_seconds)
+            return
+        position = start
+        while True:
+            with job._events_changed:
+                if position >= len(job.events) and not job.done:
+                    job._events_changed.wait(heartbeat_seconds)
+                pending = job.events[position:]
+            if not pending:
+                if job.done:
+                    return
+                yield None
+                continue
+            for event in pending:
+                yield event
+            position += len(pending)
+            if pending[-1]["event"] == "result":
+                return
+
+    def _iter_stored_events(self, job_id: str, start: int, heartbeat_seconds: float) -> Iterator[Optional[Dict]]:
+        position = start
+        last_yield = time.monotonic()
+        while True:
+            job = self._stored(job_id)
+            if job is None:
+                return
+            pending = job.events[position:]
+            for event in pending:
+                yield event
+            position += len(pending)
+            if pending:
+                if pending[-1]["event"] == "result":
+                    return
+                last_yield = time.monotonic()
+            elif job.done:
+                return
+            elif time.monotonic() - last_yield >= heartbeat_seconds:
+                yield None
+                last_yield = time.monotonic()
+            time.sleep(self.poll_seconds)
+
+    def purge_expired(self) -> int:
+        """Drop finished jobs older than the retention period."""
+        cutoff = time.time() - self.retention_seconds
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.done and job.finished_at < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+        if self.store:
+            self.store.purge_jobs(cutoff)
+        return len(expired)
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
@@ -4,34 +4,48 @@ import csv
 import shutil
 import glob
 import re
+import threading
 from app.config import BASE_DIR
+from app.services.AnalysisCache import digest_text
+from app.services.AnalysisStore import AnalysisStore
+from app.services.CacheBackend import CacheBackend, InMemoryCacheBackend
+from app.services.ToolHostClient import ToolHostClient, run_tool
 
 
 class MetricsCache:
     """Cache for storing metrics to avoid redundant calculations."""
 
-    def __init__(self):
-        self._cache = {}
+    def __init__(self, backend: CacheBackend = None, namespace="metrics", scope=""):
+        self.backend = backend or InMemoryCacheBackend()
+        self.namespace = namespace
+        # Keeps workspaces that share a backend from reading each other's entries
+        self.scope = scope
 
     def get(self, key):
         """Get cached metrics for a given key."""
-        return self._cache.get(key)
+        return self.backend.get(self.namespace, key)
 
     def set(self, key, metrics):
         """Store metrics in the cache."""
-        self._cache[key] = metrics
+        self.backend.set(self.namespace, key, metrics)
 
     def has(self, key):
         """Check if metrics exist in cache."""
-        return key in self._cache
+        return self.get(key) is not None
 
     def clear(self):
         """Clear the cache."""
-        self._cache.clear()
+        if not self.scope:
+            self.backend.clear(self.namespace)
+            return
+        for key in self.backend.keys(self.namespace):
+            if key.startswith(f"{self.scope}:"):
+                self.backend.delete(self.namespace, key)
 
     def generate_key(self, filename, solution_number):
         """Generate a unique cache key based on filename and solution number."""
-        return f"{filename}_{solution_number}"
+        key = f"{filename}_{solution_number}"
+        return f"{self.scope}:{key}" if self.scope else key
 
 
 # Global instance of the metrics cache
@@ -68,11 +82,46 @@ def organize_ck_outputs(output_root="ck_output_solutions"):
 
 
 class BaseCKAnalyzer:
-    def __init__(self, ck_jar_path=None):
+    def __init__(self, ck_jar_path=None, store: AnalysisStore = None, tool_host: ToolHostClient = None):
         self.ck_jar_path = ck_jar_path or os.path.abspath(os.path.join(
             BASE_DIR, '..', 'tools', 'ck', 'CKMetrics.jar'))
+        # Runs CK in a warm JVM when available
+        self.tool_host = tool_host
+        # Optional on-disk store shared across worker processes
+        self.store = store
+        self.repo_name = ""
+        self.commit_sha = None
+        # CK writes fixed file names next to its output path
+        self._run_lock = threading.Lock()
+
+    def _source_digest(self, source_path):
+        """Digest of a source file's contents, or None if it cannot be read."""
+        try:
+            with open(source_path, 'r', encoding='utf-8') as f:
+                return digest_text(f.read())
+        except OSError:
+            return None
+
+    def _load_stored_metrics(self, kind, filename, source_path):
+        """Return (metrics, digest) from the on-disk store; metrics is None on a miss."""
+        if not self.store:
+            return None, None
+        digest = self._source_digest(source_path)
+        if digest is None:
+            return None, None
+        return self.store.get(kind, self.repo_name, filename, digest, "ck"), digest
+
+    def _save_stored_metrics(self, kind, filename, digest, metrics):
+        """Persist metrics for a source digest obtained from _load_stored_metrics."""
+        if self.store and digest and metrics:
+            self.store.put(kind, self.repo_name, self.commit_sha,
+                           filename, digest, "ck", metrics)
 
     def run_ck_metrics(self, source_dir, output_dir):
+        with self._run_lock:
+            return self._run_ck_metrics(source_dir, output_dir)
+
+    def _run_ck_metrics(self, source_dir, output_dir):
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
 
@@ -87,21 +136,20 @@ class BaseCKAnalyzer:
         ]
 
         try:
-            subprocess.run(cmd, check=True)
+            run_tool(self.tool_host, "ck", cmd[3:], cmd,
+                     classpath=[self.ck_jar_path], check=True)
+            # CK names its output by appending "class.csv" to the output path,
+            # which lands next to output_dir, or inside it with a trailing separator
+            dest_csv = os.path.join(output_dir, "ck_outputclass.csv")
             generated_csv = next(
-                (os.path.join(root, file)
-                 for root, _, files in os.walk(os.getcwd())
-                 for file in files
-                 if file == "ck_outputclass.csv"),
+                (path for path in (os.path.abspath(output_dir) + "class.csv",
+                                   os.path.join(output_dir, "class.csv"))
+                 if os.path.isfile(path)),
                 None
             )
-
             if generated_csv:
-                dest_csv = os.path.join(output_dir, "ck_outputclass.csv")
                 shutil.move(generated_csv, dest_csv)
-                return self._parse_class_metrics(output_dir)
-            else:
-                return []
+            return self._parse_class_metrics(output_dir)
 
         except subprocess.CalledProcessError:
             return []
@@ -118,6 +166,10 @@ class BaseCKAnalyzer:
 
     def get_metrics_for_file(self, filename, source_dir, output_dir):
         all_metrics = self.run_ck_metrics(source_dir, output_dir)
+        return self.select_metrics_for_file(all_metrics, filename)
+
+    def select_metrics_for_file(self, all_metrics, filename):
+        """Pick the class rows belonging to one file out of a full CK run."""
         target_file = os.path.basename(filename).strip().lower()
         # Remove extension to get class name
         target_class = os.path.splitext(target_file)[0]
@@ -149,13 +201,15 @@ class BaseCKAnalyzer:
 
 
 class CKMetricsAnalyzer(BaseCKAnalyzer):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, store: AnalysisStore = None, cache_backend: CacheBackend = None,
+                 src_dir=None, output_dir=None, cache_scope="", tool_host: ToolHostClient = None):
+        super().__init__(store=store, tool_host=tool_host)
         self.src_dir = os.path.abspath(
-            os.path.join(BASE_DIR, '..', '..', 'cloned_repo'))
+            src_dir or os.path.join(BASE_DIR, '..', '..', 'cloned_repo'))
         self.output_dir = os.path.abspath(
-            os.path.join(BASE_DIR, '..', '..', 'ck_output'))
-        self.metrics_cache = MetricsCache()  # Initialize own cache instance
+            output_dir or os.path.join(BASE_DIR, '..', '..', 'ck_output'))
+        self.metrics_cache = MetricsCache(
+            cache_backend, "ck_metrics", cache_scope)  # Initialize own cache instance
 
     def get_original_metrics(self, filename):
         """Get metrics for the original file."""
@@ -165,6 +219,13 @@ class CKMetricsAnalyzer(BaseCKAnalyzer):
         if cached_metrics:
             return cached_metrics
 
+        # Check results computed by other workers or earlier runs
+        stored_metrics, digest = self._load_stored_metrics(
+            AnalysisStore.CK_CLASS_METRICS, filename, os.path.join(self.src_dir, filename))
+        if stored_metrics:
+            self.metrics_cache.set(cache_key, stored_metrics)
+            return stored_metrics
+
         # Calculate metrics if not cached
         metrics = self.get_metrics_for_file(
             filename, self.src_dir, self.output_dir)
@@ -172,20 +233,38 @@ class CKMetricsAnalyzer(BaseCKAnalyzer):
         # Cache the results
         if metrics:
             self.metrics_cache.set(cache_key, metrics)
+            self._save_stored_metrics(
+                AnalysisStore.CK_CLASS_METRICS, filename, digest, metrics)
 
         return metrics
 
+    def prime_original_metrics(self, all_metrics, filenames):
+        """Fill the cache for many files from a single repository-wide CK run."""
+        primed = 0
+        for filename in filenames:
+            cache_key = self.metrics_cache.generate_key(filename, "original")
+            if self.metrics_cache.has(cache_key):
+                continue
+            metrics = self.select_metrics_for_file(all_metrics, filename)
+            if metrics:
+                self.metrics_cache.set(cache_key, metrics)
+                primed += 1
+        return primed
+
 
 class SolutionMetricsAnalyzer(BaseCKAnalyzer):
-    def __init__(self):
-        super().__init__()
-        self.metrics_cache = MetricsCache()  # Initialize own cache instance
+    def __init__(self, store: AnalysisStore = None, cache_backend: CacheBackend = None,
+                 output_root="ck_output_solutions", cache_scope="", tool_host: ToolHostClient = None):
+        super().__init__(store=store, tool_host=tool_host)
+        self.output_root = output_root
+        self.metrics_cache = MetricsCache(
+            cache_backend, "solution_metrics", cache_scope)  # Initialize own cache instance
 
     def calculate_metrics_for_applied_solution(self, filename, solution_dir, solution_number):
         """Calculate metrics for an applied solution."""
         # Create output folder for metrics
         solution_output_dir = os.path.join(
-            "ck_output_solutions", f"solution_{solution_number}")
+            self.output_root, f"solution_{solution_number}")
         os.makedirs(solution_output_dir, exist_ok=True)
 
         # Check cache first
@@ -194,11 +273,19 @@ class SolutionMetricsAnalyzer(BaseCKAnalyzer):
         if cached_metrics:
             return cached_metrics
 
+        # Check results computed by other workers or earlier runs
+        stored_metrics, digest = self._load_stored_metrics(
+            AnalysisStore.SOLUTION_METRICS, filename,
+            os.path.join(solution_dir, os.path.basename(filename)))
+        if stored_metrics:
+            self.metrics_cache.set(cache_key, stored_metrics)
+            return stored_metrics
+
         # Run CK metrics if not cached
         self.run_ck_metrics(solution_dir, solution_output_dir)
 
         # Organize CK output files
-        organize_ck_outputs()
+        organize_ck_outputs(self.output_root)
 
         # Parse metrics
         metrics = self._parse_class_metrics(solution_output_dir)
@@ -217,6 +304,8 @@ class SolutionMetricsAnalyzer(BaseCKAnalyzer):
         # Cache the results
         if file_metrics:
             self.metrics_cache.set(cache_key, file_metrics)
+            self._save_stored_metrics(
+                AnalysisStore.SOLUTION_METRICS, filename, digest, file_metrics)
 
         return file_metrics
 
@@ -1,16 +1,130 @@
 import subprocess
 import os
-import xml.etree.ElementTree as ET
+import contextlib
+import hashlib
+import json
+import re
 import tempfile
+import threading
+import zipfile
+from typing import Dict, List, Optional, Sequence
+from lxml import etree
+from app.config import PMD_THREADS
+from app.services.BugAnalyzer import normalize_source_path
+from app.services.ClassFindingsCache import digest_file
+from app.services.ToolHostClient import ToolHostClient, jar_classpath, run_tool
 
 
 class PMDAnalyzer:
-    def __init__(self, pmd_path: str, ruleset_path: str, report_path: str):
+    MAIN_CLASS = "net.sourceforge.pmd.cli.PmdCli"
+    RULESET_NS = "http://pmd.sourceforge.net/ruleset/2.0.0"
+
+    def __init__(self, pmd_path: str, ruleset_path: str, report_path: str,
+                 tool_host: Optional[ToolHostClient] = None, cache_dir: Optional[str] = None):
         self.pmd_path = os.path.abspath(pmd_path)
         self.ruleset_path = os.path.abspath(ruleset_path)
         self.report_path = os.path.abspath(report_path)
+        # Runs PMD in a warm JVM when available
+        self.tool_host = tool_host
+        self.classpath = jar_classpath(os.path.join(
+            os.path.dirname(os.path.dirname(self.pmd_path)), 'lib'))
+        self.version = self._pmd_version()
+        # PMD's incremental analysis cache, one file per ruleset (None disables it)
+        self.cache_dir = os.path.abspath(cache_dir) if cache_dir else None
+        self.cache_stats = {"runs": 0, "hits": 0, "misses": 0}
+        self._stats_lock = threading.Lock()
+        self._cache_locks = {}
+        self._cache_dir_lock = threading.Lock()
+        # Rule names defined by each built-in category ruleset, read on demand
+        self._category_rules = {}
+        # Repository-wide results by normalized relative path, and the
+        # (stat, digest) of each file's content when it was analyzed
+        self.threads = PMD_THREADS
+        self._repository_index = {}
+        self._analyzed_files = {}
+        self._index_fingerprint = None
+        self._index_lock = threading.Lock()
+
+    def _pmd_version(self) -> str:
+        for jar in self.classpath:
+            match = re.match(r'pmd-core-(.+)\.jar$', os.path.basename(jar))
+            if match:
+                return match.group(1)
+        return "unknown"
+
+    def _ruleset_digest(self, ruleset_path: str) -> str:
+        digest = hashlib.sha256(self.version.encode())
+        try:
+            with open(ruleset_path, 'rb') as f:
+                digest.update(f.read())
+        except OSError:
+            digest.update(ruleset_path.encode())
+        return digest.hexdigest()
+
+    def config_fingerprint(self) -> str:
+        """Digest of the ruleset file and PMD version, so cached results follow ruleset edits and upgrades."""
+        return self._ruleset_digest(self.ruleset_path)
+
+    def rule_element(self, rule_name: str) -> Optional[etree._Element]:
+        """
+        Return the <rule> configuration that enables rule_name in the
+        ruleset, or None when the ruleset does not enable it. A rule pulled
+        in through a whole category reference gets a reference of its own.
+        """
+        try:
+            rules = etree.parse(self.ruleset_path).getroot().findall("{*}rule")
+        except (OSError, etree.XMLSyntaxError):
+            return None
+
+        # A rule configured on its own wins over the category it belongs to
+        for rule in rules:
+            ref = rule.get("ref", "")
+            if rule.get("name") == rule_name or (
+                    not ref.endswith(".xml") and ref.rsplit("/", 1)[-1] == rule_name):
+                return rule
+        for rule in rules:
+            ref = rule.get("ref", "")
+            excluded = {e.get("name") for e in rule.iterfind("{*}exclude")}
+            if ref.endswith(".xml") and rule_name not in excluded \
+                    and rule_name in self._rules_in_category(ref):
+                return etree.Element(f"{{{self.RULESET_NS}}}rule", ref=f"{ref}/{rule_name}")
+        return None
 
-    def run_pmd_analysis(self, source_file: str, report_path: str = None) -> None:
+    def _rules_in_category(self, category_ref: str) -> set:
+        """Names of the rules a category ruleset (e.g. category/java/design.xml) defines."""
+        if category_ref not in self._category_rules:
+            names = set()
+            for jar in self.classpath:
+                try:
+                    with zipfile.ZipFile(jar) as archive:
+                        root = etree.fromstring(archive.read(category_ref))
+                except (KeyError, OSError, zipfile.BadZipFile, etree.XMLSyntaxError):
+                    continue
+                names = {rule.get("name") for rule in root.iterfind("{*}rule")}
+                break
+            self._category_rules[category_ref] = names
+        return self._category_rules[category_ref]
+
+    def write_rule_ruleset(self, rule_name: str, ruleset_path: str) -> bool:
+        """
+        Write a ruleset that enables only rule_name, configured as in the
+        full ruleset. Returns False, writing nothing, when the rule is not
+        part of the full ruleset.
+        """
+        rule = self.rule_element(rule_name)
+        if rule is None:
+            return False
+
+        root = etree.Element(f"{{{self.RULESET_NS}}}ruleset", name=f"Single rule {rule_name}",
+                             nsmap={None: self.RULESET_NS})
+        etree.SubElement(root, f"{{{self.RULESET_NS}}}description").text = \
+            f"Only {rule_name} from {os.path.basename(self.ruleset_path)}"
+        root.append(etree.fromstring(etree.tostring(rule)))
+        etree.ElementTree(root).write(ruleset_path, xml_declaration=True, encoding="UTF-8")
+        return True
+
+    def run_pmd_analysis(self, source_file: str, report_path: str = None,
+                         ruleset_path: str = None) -> None:
         if report_path is None:
             report_path = self.report_path
 
@@ -18,37 +132,184 @@ class PMDAnalyzer:
         if not os.path.exists(source_file):
             return
 
+        self._run_pmd([source_file], report_path, ruleset_path)
+
+    def _run_pmd(self, source_files: Sequence[str], report_path: str,
+                 ruleset_path: str = None, extra_args: Sequence[str] = (),
+                 partial: bool = True) -> bool:
+        """
+        Run PMD over source_files into report_path; False if PMD failed.
+
+        PMD writes back to its cache only the files it analyzed, so runs over
+        part of the repository (partial) use a cache file of their own and
+        leave the one of whole-repository runs intact for the next restart.
+        """
+        if ruleset_path is None:
+            ruleset_path = self.ruleset_path
+        if not self.cache_dir:
+            return self._invoke_pmd(source_files, report_path, ruleset_path, extra_args)
+
+        cache_path = self._cache_file(ruleset_path, partial)
+        with self._cache_dir_lock:
+            lock = self._cache_locks.setdefault(cache_path, threading.Lock())
+        # PMD rewrites the whole cache file at the end of a run
+        with lock:
+            manifest_path = cache_path + ".json"
+            manifest = {}
+            if os.path.exists(cache_path):
+                try:
+                    with open(manifest_path, 'r', encoding='utf-8') as f:
+                        manifest = json.load(f)
+                except (OSError, ValueError):
+                    pass
+            digests = {os.path.abspath(path): digest_file(path)
+                       for path in source_files if os.path.exists(path)}
+            hits = sum(1 for path, digest in digests.items() if manifest.get(path) == digest)
+
+            ok = self._invoke_pmd(source_files, report_path, ruleset_path,
+                                  [*extra_args, "--cache", cache_path])
+            # The cache now holds the files of this run alone
+            if ok:
+                with open(manifest_path, 'w', encoding='utf-8') as f:
+                    json.dump(digests, f)
+            else:
+                with contextlib.suppress(OSError):
+                    os.remove(manifest_path)
+            with self._stats_lock:
+                self.cache_stats["runs"] += 1
+                self.cache_stats["hits"] += hits
+                self.cache_stats["misses"] += len(digests) - hits
+            print(f"[PMD] Analysis cache: {hits} hits, {len(digests) - hits} misses")
+            return ok
+
+    def _cache_file(self, ruleset_path: str, partial: bool = False) -> str:
+        """
+        The PMD cache file for a ruleset and kind of run. Every cache in
+        cache_dir is dropped when the main ruleset or the PMD version changes.
+        """
+        with self._cache_dir_lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            stamp_path = os.path.join(self.cache_dir, "fingerprint")
+            fingerprint = self.config_fingerprint()
+            try:
+                with open(stamp_path, 'r') as f:
+                    current = f.read().strip()
+            except OSError:
+                current = None
+            if current != fingerprint:
+                if current is not None:
+                    print("[PMD] Ruleset or PMD version changed, clearing analysis caches")
+                for name in os.listdir(self.cache_dir):
+                    with contextlib.suppress(OSError):
+                        os.remove(os.path.join(self.cache_dir, name))
+                with open(stamp_path, 'w') as f:
+                    f.write(fingerprint)
+        suffix = ".partial.cache" if partial else ".cache"
+        return os.path.join(self.cache_dir, f"{self._ruleset_digest(ruleset_path)[:16]}{suffix}")
+
+    def _invoke_pmd(self, source_files: Sequence[str], report_path: str, ruleset_path: str,
+                    extra_args: Sequence[str] = ()) -> bool:
         # Delete old report if exists
         if os.path.exists(report_path):
             os.remove(report_path)
 
         with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.txt') as temp_file_list:
-            temp_file_list.write(source_file + "\n")
+            temp_file_list.write("".join(f + "\n" for f in source_files))
             temp_file_list_path = temp_file_list.name
 
         command = [
             self.pmd_path, "check",
             "--file-list", temp_file_list_path,
-            "--rulesets", self.ruleset_path,
+            "--rulesets", ruleset_path,
             "--format", "xml",
-            "--report-file", report_path
+            "--report-file", report_path,
+            *extra_args
         ]
 
         try:
-            result = subprocess.run(
-                command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+            result = run_tool(
+                self.tool_host, "pmd", command[1:], command,
+                classpath=self.classpath, main_class=self.MAIN_CLASS,
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
             )
 
-            if result.returncode != 0 and result.returncode != 4:
-                return
+            # 4 means violations were found
+            return result.returncode in (0, 4)
 
         except Exception as e:
-            pass
+            print(f"[PMD] Run failed: {e}")
+            return False
 
         finally:
             if os.path.exists(temp_file_list_path):
                 os.remove(temp_file_list_path)
 
+    @staticmethod
+    def _file_state(path: str, previous: Optional[tuple]) -> Optional[tuple]:
+        """(stat, digest) of a file, reusing the previous digest if the stat is unchanged."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if previous and previous[0] == signature:
+            return previous
+        return signature, digest_file(path)
+
+    def analyze_repository(self, source_root: str, source_files: Sequence[str],
+                           report_path: str) -> Dict[str, List[Dict]]:
+        """
+        Bring the repository-wide PMD index up to date and return it.
+
+        source_files are paths relative to source_root. Every file whose
+        content changed since it was last analyzed (all of them on the first
+        call, or after a ruleset edit) goes into one multi-threaded PMD run;
+        unchanged files keep their indexed results and deleted files are
+        dropped. The index is keyed by normalize_source_path of the relative
+        path and must not be modified by callers.
+        """
+        with self._index_lock:
+            fingerprint = self.config_fingerprint()
+            if fingerprint != self._index_fingerprint:
+                self._repository_index = {}
+                self._analyzed_files = {}
+                self._index_fingerprint = fingerprint
+
+            current = {normalize_source_path(f): f for f in source_files}
+            for key in set(self._analyzed_files) - set(current):
+                del self._analyzed_files[key]
+                self._repository_index.pop(key, None)
+
+            changed = {}
+            for key, rel_path in current.items():
+                state = self._file_state(os.path.join(source_root, rel_path),
+                                         self._analyzed_files.get(key))
+                if state is not None and state != self._analyzed_files.get(key):
+                    changed[key] = state
+            if not changed:
+                return self._repository_index
+
+            paths = {key: os.path.abspath(os.path.join(source_root, current[key])) for key in changed}
+            fresh = None
+            # An unreadable report is run again once rather than indexed as "no issues"
+            for attempt in range(2):
+                print(f"[PMD] Analyzing {len(paths)} of {len(current)} files with --threads {self.threads}")
+                if not self._run_pmd(sorted(paths.values()), report_path,
+                                     extra_args=["--threads", str(self.threads)],
+                                     partial=len(paths) < len(current)):
+                    raise RuntimeError(f"PMD repository analysis failed for {len(paths)} files")
+                fresh = self.parse_pmd_index(report_path)
+                if fresh is not None:
+                    break
+            if fresh is None:
+                raise RuntimeError(f"PMD report {report_path} could not be parsed")
+            for key, path in paths.items():
+                self._repository_index[key] = fresh.get(
+                    normalize_source_path(os.path.normpath(path)), [])
+                # A file edited during the run is picked up by the next call
+                self._analyzed_files[key] = changed[key]
+            return self._repository_index
+
     def extract_code_snippet(self, file_path: str, line_number: int, bug_description: str) -> str:
         """Extract a code snippet around the bug location."""
         try:
@@ -67,27 +328,33 @@ class PMDAnalyzer:
 
     def parse_pmd_xml(self, report_path: str = None) -> list:
         """Parse the PMD report and extract detected issues."""
+        index = self.parse_pmd_index(report_path)
+        if index is None:
+            raise RuntimeError(f"PMD report {report_path or self.report_path} could not be parsed")
+        return [issue for issues in index.values() for issue in issues]
+
+    def parse_pmd_index(self, report_path: str = None) -> Optional[Dict[str, List[Dict]]]:
+        """
+        Parse the PMD report into issues grouped by normalized file path.
+        The report is streamed and each <file> element is discarded once read.
+        Returns None if the report cannot be read, so a truncated or corrupt
+        report is never taken for a partial list of issues.
+        """
         if report_path is None:
             report_path = self.report_path
 
-        issues = []
+        index = {}
 
         if not os.path.exists(report_path):
-            return issues
+            return index
 
         try:
-            tree = ET.parse(report_path)
-            root = tree.getroot()
-
-            # Extract the namespace URI from the root tag
-            ns_uri = root.tag.split('}')[0].strip('{')
-            ns = {"pmd": ns_uri}
-
-            for file in root.findall("pmd:file", ns):
+            for _, file in etree.iterparse(report_path, events=('end',), tag='{*}file'):
                 filename = file.get("name")
                 file_path = os.path.normpath(filename)
+                issues = index.setdefault(normalize_source_path(file_path), [])
 
-                for violation in file.findall("pmd:violation", ns):
+                for violation in file.iterfind("{*}violation"):
                     line_number = int(violation.get("beginline"))
                     message = violation.text.strip() if violation.text else "No message"
                     ruleset = violation.get("ruleset", "Unknown")
@@ -103,9 +370,12 @@ class PMDAnalyzer:
                         "description": message
                     })
 
-        except ET.ParseError as e:
-            pass
-        except Exception as e:
-            pass
+                file.clear()
+                while file.getprevious() is not None:
+                    del file.getparent()[0]
+
+        except (etree.XMLSyntaxError, OSError, ValueError) as e:
+            print(f"[PMD] Failed to parse {report_path}: {e}")
+            return None
 
-        return issues
+        return index
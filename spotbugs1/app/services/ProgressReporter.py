@@ -0,0 +1,51 @@
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+
+class ProgressReporter:
+    """
+    Reports pipeline stages and partial results to an optional listener.
+
+    The listener is called as listener(event_type, data). Without one, every
+    call is a no-op, so services can report progress unconditionally.
+    """
+
+    def __init__(self, listener: Optional[Callable[[str, Dict], None]] = None):
+        self.listener = listener
+        self._started_at = time.time()
+
+    def emit(self, event_type: str, **data):
+        if not self.listener:
+            return
+        data["elapsed"] = round(time.time() - self._started_at, 3)
+        try:
+            self.listener(event_type, data)
+        except Exception as e:
+            print(f"[PROGRESS] Listener failed for {event_type}: {e}")
+
+    @contextmanager
+    def stage(self, name: str, **data):
+        """Emit stage_started/stage_finished (or stage_failed) around a block, with its duration."""
+        self.emit("stage_started", stage=name, **data)
+        start = time.time()
+        try:
+            yield
+        except Exception as e:
+            self.emit("stage_failed", stage=name, error=str(e),
+                      duration=round(time.time() - start, 3))
+            raise
+        self.emit("stage_finished", stage=name,
+                  duration=round(time.time() - start, 3))
+
+    def partial_results(self, tool: str, filename: str, bugs):
+        """Send the bugs one analyzer found before later stages finish."""
+        self.emit("partial_results", tool=tool, filename=filename,
+                  bugs=bugs, num_bugs=len(bugs))
+
+
+def as_reporter(progress) -> ProgressReporter:
+    """Accept either a ProgressReporter, a bare listener callable, or None."""
+    if isinstance(progress, ProgressReporter):
+        return progress
+    return ProgressReporter(progress)
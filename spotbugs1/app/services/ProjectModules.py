@@ -0,0 +1,144 @@
+import os
+import re
+from typing import List, Optional
+
+from lxml import etree
+
+
+class BuildModule:
+    """One module of a Maven or Gradle build, where its sources are and where its classes are compiled to."""
+
+    def __init__(self, name: str, path: str, output_dirs: List[str],
+                 source_dirs: Optional[List[str]] = None):
+        # What the build tool selects the module by: a path for Maven's -pl,
+        # a project path such as ":core" for Gradle
+        self.name = name
+        self.path = os.path.abspath(path)
+        self.output_dirs = [os.path.abspath(d) for d in output_dirs]
+        self.source_dirs = [os.path.abspath(d) for d in (
+            source_dirs if source_dirs is not None else [os.path.join(path, 'src', 'main', 'java')])]
+
+    def contains(self, file_path: str) -> bool:
+        return os.path.abspath(file_path).startswith(self.path + os.sep)
+
+    def __repr__(self):
+        return f"BuildModule({self.name!r}, {self.path!r})"
+
+
+class ProjectModules:
+    """
+    The modules of a multi-module build, read from the build files: the
+    <modules> of each pom.xml for Maven, the include statements of
+    settings.gradle(.kts) for Gradle. Aggregator poms and a Gradle root
+    project without sources are not modules of their own.
+    """
+
+    _GRADLE_INCLUDE = re.compile(r'^\s*include\b\s*\(?(.*)$')
+    _GRADLE_PROJECT_DIR = re.compile(
+        r'project\(\s*["\'](:?[^"\']+)["\']\s*\)\.projectDir\s*=\s*'
+        r'(?:file|new\s+File|File)\(\s*(?:(?:settingsDir|rootDir|rootProject\.projectDir)\s*,\s*)?["\']([^"\']+)["\']')
+
+    def __init__(self, project_dir: str, build_tool: str):
+        self.project_dir = os.path.abspath(project_dir)
+        self.build_tool = build_tool
+        if build_tool == 'maven':
+            self.modules = self._maven_modules(self.project_dir, set())
+        elif build_tool == 'gradle':
+            self.modules = self._gradle_modules()
+        else:
+            self.modules = []
+
+    @property
+    def is_multi_module(self) -> bool:
+        return len(self.modules) > 1
+
+    def module_for(self, file_path: str) -> Optional[BuildModule]:
+        """The innermost module containing file_path, or None."""
+        owners = [m for m in self.modules if m.contains(file_path)]
+        return max(owners, key=lambda m: len(m.path)) if owners else None
+
+    def other_output_dirs(self, module: BuildModule) -> List[str]:
+        """Existing class output directories of every module except module."""
+        return [d for m in self.modules if m is not module
+                for d in m.output_dirs if os.path.isdir(d)]
+
+    def _maven_modules(self, module_dir: str, seen: set) -> List[BuildModule]:
+        if module_dir in seen:
+            return []
+        seen.add(module_dir)
+        try:
+            root = etree.parse(os.path.join(module_dir, 'pom.xml')).getroot()
+        except (OSError, etree.XMLSyntaxError) as e:
+            print(f"[BUILD] Could not read {os.path.join(module_dir, 'pom.xml')}: {e}")
+            return []
+
+        modules = []
+        if (root.findtext('{*}packaging') or 'jar').strip() != 'pom':
+            rel_path = os.path.relpath(module_dir, self.project_dir).replace(os.sep, '/')
+            modules.append(BuildModule(rel_path, module_dir, [self._maven_output_dir(root, module_dir)],
+                                       [self._maven_source_dir(root, module_dir)]))
+        for child in root.findall('{*}modules/{*}module'):
+            child_dir = os.path.normpath(os.path.join(module_dir, (child.text or '').strip()))
+            # A module may also be given as the path of its pom file
+            if child_dir.endswith('.xml'):
+                child_dir = os.path.dirname(child_dir)
+            modules.extend(self._maven_modules(child_dir, seen))
+        return modules
+
+    @staticmethod
+    def _maven_source_dir(root, module_dir: str) -> str:
+        source_dir = (root.findtext('{*}build/{*}sourceDirectory') or 'src/main/java').strip()
+        for prop in ('${project.basedir}', '${basedir}'):
+            source_dir = source_dir.replace(prop, module_dir)
+        return os.path.join(module_dir, source_dir)
+
+    @staticmethod
+    def _maven_output_dir(root, module_dir: str) -> str:
+        build_dir = (root.findtext('{*}build/{*}directory') or 'target').strip()
+        output_dir = (root.findtext('{*}build/{*}outputDirectory')
+                      or '${project.build.directory}/classes').strip()
+        for prop, value in (('${project.build.directory}', build_dir),
+                            ('${project.basedir}', module_dir), ('${basedir}', module_dir)):
+            output_dir = output_dir.replace(prop, value)
+        return os.path.join(module_dir, output_dir)
+
+    def _gradle_modules(self) -> List[BuildModule]:
+        settings = next((os.path.join(self.project_dir, name)
+                         for name in ('settings.gradle', 'settings.gradle.kts')
+                         if os.path.exists(os.path.join(self.project_dir, name))), None)
+        text = ''
+        if settings:
+            with open(settings, 'r', encoding='utf-8', errors='replace') as f:
+                text = re.sub(r'/\*.*?\*/', '', f.read(), flags=re.S)
+                text = re.sub(r'//[^\n]*', '', text)
+
+        project_paths = []
+        lines = iter(text.splitlines())
+        for line in lines:
+            match = self._GRADLE_INCLUDE.match(line)
+            if not match:
+                continue
+            arguments = match.group(1)
+            # include 'a',
+            #         'b'
+            while arguments.rstrip().endswith(','):
+                arguments += next(lines, '')
+            project_paths.extend(':' + name.lstrip(':')
+                                 for name in re.findall(r'["\']([^"\']+)["\']', arguments))
+        project_dirs = {f":{name.lstrip(':')}": directory
+                        for name, directory in self._GRADLE_PROJECT_DIR.findall(text)}
+
+        modules = []
+        if os.path.isdir(os.path.join(self.project_dir, 'src')) or not project_paths:
+            modules.append(self._gradle_module(':', self.project_dir))
+        for project_path in dict.fromkeys(project_paths):
+            directory = project_dirs.get(project_path)
+            directory = os.path.join(self.project_dir, directory) if directory else os.path.join(
+                self.project_dir, *project_path.strip(':').split(':'))
+            modules.append(self._gradle_module(project_path, os.path.normpath(directory)))
+        return modules
+
+    @staticmethod
+    def _gradle_module(project_path: str, module_dir: str) -> BuildModule:
+        return BuildModule(project_path, module_dir,
+                           [os.path.join(module_dir, 'build', 'classes', 'java', 'main')])
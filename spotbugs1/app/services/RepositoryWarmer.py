@@ -0,0 +1,192 @@
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+
+class RepositoryWarmer:
+    """
+    Pre-analyzes a freshly cloned repository in a background thread.
+
+    The warm-up runs CK once over the whole repository to rank files by
+    complexity, indexes the Java symbols, compiles once, runs SpotBugs and
+    PMD once each, and then fills the facade's caches file by file, most
+    complex files first, since those are the ones users tend to open first.
+    In a multi-module build the files of one module are warmed together, as
+    each module switch means building another module into bin_dir.
+    """
+
+    PENDING = "pending"
+    WARM = "warm"
+    FAILED = "failed"
+
+    def __init__(self, facade, tools: Sequence[str] = ('spotbugs', 'pmd'),
+                 hold: Optional[Callable[[], Callable[[], None]]] = None):
+        self.facade = facade
+        self.tools = list(tools)
+        # Called as a warm-up starts to keep its workspace from being evicted;
+        # returns the function that lets go of it once the warm-up ends
+        self.hold = hold
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._state = "idle"
+        self._stage = None
+        self._files = {}
+        self._order = []
+        self._started_at = None
+        self._finished_at = None
+        self._error = None
+
+    def start(self, files: List[str]):
+        """Start warming the given repository-relative files, stopping any earlier run."""
+        self.stop()
+        with self._lock:
+            self._reset()
+            self._state = "running"
+            self._files = {f: self.PENDING for f in files}
+            self._order = list(files)
+            self._started_at = time.time()
+        self._stop_event.clear()
+        release = self.hold() if self.hold else None
+        self._thread = threading.Thread(
+            target=self._run, args=(release,), name="repository-warmer", daemon=True)
+        self._thread.start()
+        print(f"[WARMUP] Started background analysis of {len(files)} files")
+
+    def stop(self, timeout: float = 5.0):
+        """Ask a running warm-up to stop after the file it is working on."""
+        self._stop_event.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout)
+        self._thread = None
+
+    def is_warm(self, filename: str) -> bool:
+        with self._lock:
+            return self._files.get(filename) == self.WARM
+
+    def status(self) -> Dict:
+        """Summarize progress for the status endpoint."""
+        with self._lock:
+            warm = [f for f in self._order if self._files[f] == self.WARM]
+            return {
+                "state": self._state,
+                "stage": self._stage,
+                "total_files": len(self._order),
+                "warm_files": warm,
+                "num_warm": len(warm),
+                "files": [{"filename": f, "status": self._files[f]} for f in self._order],
+                "started_at": self._started_at,
+                "finished_at": self._finished_at,
+                "error": self._error
+            }
+
+    def _set_stage(self, stage: str):
+        with self._lock:
+            self._stage = stage
+        print(f"[WARMUP] Stage: {stage}")
+
+    def _mark(self, filename: str, status: str):
+        with self._lock:
+            if filename in self._files:
+                self._files[filename] = status
+
+    def prioritize(self, files: List[str], all_metrics: List[Dict]) -> List[str]:
+        """Order files by their most complex class: highest wmc, then cbo, then loc."""
+        ck_analyzer = self.facade.ck_metrics
+
+        def score(filename):
+            best = (0, 0, 0)
+            for row in ck_analyzer.select_metrics_for_file(all_metrics, filename):
+                try:
+                    best = max(best, (int(row.get("wmc", 0)), int(
+                        row.get("cbo", 0)), int(row.get("loc", 0))))
+                except ValueError:
+                    continue
+            return best
+
+        return sorted(files, key=score, reverse=True)
+
+    def group_by_module(self, ordered: List[str]) -> List[str]:
+        """
+        Keep the files of each module together, modules in the order of their
+        most complex file and files within a module in their given order.
+        """
+        modules = self.facade.build_system_manager.project_modules()
+        if len(modules) < 2:
+            return ordered
+        groups = {}
+        for filename in ordered:
+            path = os.path.join(self.facade.output_dir, filename)
+            owners = [m for m in modules if m.contains(path)]
+            owner = max(owners, key=lambda m: len(m.path)).path if owners else None
+            groups.setdefault(owner, []).append(filename)
+        return [filename for group in groups.values() for filename in group]
+
+    def _run(self, release: Optional[Callable[[], None]] = None):
+        try:
+            facade = self.facade
+            files = list(self._order)
+            tools = list(self.tools)
+
+            # Rank files with one CK run; the same run primes the metrics cache
+            self._set_stage("ck")
+            ck_analyzer = facade.ck_metrics
+            all_metrics = ck_analyzer.run_ck_metrics(
+                ck_analyzer.src_dir, ck_analyzer.output_dir)
+            ck_analyzer.prime_original_metrics(all_metrics, files)
+            ordered = self.group_by_module(self.prioritize(files, all_metrics))
+            with self._lock:
+                self._order = ordered
+
+            if 'spotbugs' in tools and ordered and not self._stop_event.is_set():
+                # Builds without a build tool find dependencies in the symbol index
+                self._set_stage("symbols")
+                facade.build_system_manager.symbol_index.refresh()
+                self._set_stage("compile")
+                first_file = os.path.join(facade.output_dir, ordered[0])
+                if facade.build_system_manager.compile_java_files(first_file, facade.bin_dir):
+                    self._set_stage("spotbugs")
+                    facade._invalidate_spotbugs_index()
+                    # Nobody is waiting on the warm-up, so go straight to deep results
+                    facade._get_spotbugs_index(facade.spotbugs_analyzer.DEEP)
+                else:
+                    print("[WARMUP] Compilation failed, skipping SpotBugs warm-up")
+                    tools.remove('spotbugs')
+
+            if 'pmd' in tools and ordered and not self._stop_event.is_set():
+                # One multi-threaded PMD run covers every file
+                self._set_stage("pmd")
+                facade._get_pmd_index()
+
+            self._set_stage("files")
+            for filename in ordered:
+                if self._stop_event.is_set():
+                    print("[WARMUP] Stopped before finishing")
+                    break
+                try:
+                    for tool in tools:
+                        content, _, _, _ = facade.analyze_file(filename, tool)
+                        if not content:
+                            raise RuntimeError(f"{tool} analysis failed")
+                    self._mark(filename, self.WARM)
+                except Exception as e:
+                    print(f"[WARMUP] Failed to warm {filename}: {e}")
+                    self._mark(filename, self.FAILED)
+
+            with self._lock:
+                self._state = "stopped" if self._stop_event.is_set() else "done"
+        except Exception as e:
+            print(f"[WARMUP] Warm-up failed: {e}")
+            with self._lock:
+                self._state = "failed"
+                self._error = str(e)
+        finally:
+            with self._lock:
+                self._finished_at = time.time()
+                self._stage = None
+            if release:
+                release()
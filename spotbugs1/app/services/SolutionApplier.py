@@ -1,14 +1,27 @@
 import time
 import os
 import re
-import subprocess
 import shutil
 import openai
+from typing import Optional
+from app.services.ToolHostClient import ToolHostClient, run_tool
 
 
 class SolutionApplier:
-    def __init__(self, google_formatter_path):
+    def __init__(self, google_formatter_path, repo_dir="cloned_repo", temp_dir="temp_ck",
+                 tool_host: Optional[ToolHostClient] = None):
         self.google_formatter_path = google_formatter_path
+        # Where the session's clone and per-solution scratch copies live
+        self.repo_dir = repo_dir
+        self.temp_dir = temp_dir
+        # Runs google-java-format in a warm JVM when available
+        self.tool_host = tool_host
+
+    def _format_file(self, file_path):
+        """Format a Java file in place with google-java-format."""
+        run_tool(self.tool_host, "google-java-format", ["-i", os.path.abspath(file_path)],
+                 ["java", "-jar", self.google_formatter_path, "-i", file_path],
+                 classpath=[self.google_formatter_path], check=True)
 
     def find_and_replace_buggy_code(self, content, buggy_snippet, fixed_snippet):
         try:
@@ -68,12 +81,13 @@ class SolutionApplier:
 
     def apply_solution(self, file_path, code_snippet, solution, solution_number=1):
         """
-        Apply a solution directly to the file in cloned_repo.
+        Apply a solution directly to the file in the cloned repository.
         """
         try:
-            # Normalize the file path and ensure it starts with cloned_repo
-            if not file_path.startswith('cloned_repo'):
-                file_path = os.path.join('cloned_repo', file_path)
+            # Normalize the file path and ensure it is inside the clone
+            repo_dir = os.path.normpath(self.repo_dir)
+            if not os.path.normpath(file_path).startswith(repo_dir):
+                file_path = os.path.join(repo_dir, file_path)
 
             # Ensure target directory exists
             target_dir = os.path.dirname(file_path)
@@ -108,8 +122,7 @@ class SolutionApplier:
 
             # Format the file (optional)
             try:
-                subprocess.run(
-                    ["java", "-jar", self.google_formatter_path, "-i", file_path], check=True)
+                self._format_file(file_path)
             except Exception:
                 pass
 
@@ -144,7 +157,7 @@ class SolutionApplier:
                 raise ValueError("No changes made — the fix was not applied.")
 
             # Create temp folder
-            temp_base_dir = os.path.abspath("temp_ck")
+            temp_base_dir = os.path.abspath(self.temp_dir)
             solution_dir = os.path.join(
                 temp_base_dir, f"solution_{solution_number}")
             os.makedirs(solution_dir, exist_ok=True)
@@ -157,8 +170,7 @@ class SolutionApplier:
 
             # Format the file (optional)
             try:
-                subprocess.run(
-                    ["java", "-jar", self.google_formatter_path, "-i", temp_file_path], check=True)
+                self._format_file(temp_file_path)
             except Exception:
                 pass
 
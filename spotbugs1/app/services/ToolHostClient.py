@@ -0,0 +1,241 @@
+import atexit
+import glob
+import json
+import os
+import queue
+import re
+import shutil
+import subprocess
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+from app.config import (TOOLHOST_ENABLED, TOOLHOST_MAX_HEAP, TOOLHOST_MAX_JOBS,
+                        TOOLHOST_SOURCE, TOOLHOST_START_TIMEOUT)
+
+# google-java-format reaches into javac internals, which must be opened to
+# the unnamed module its class loader lives in
+_FORMATTER_EXPORTS = [
+    f"--add-exports=jdk.compiler/com.sun.tools.javac.{pkg}=ALL-UNNAMED"
+    for pkg in ("api", "code", "file", "parser", "tree", "util")
+]
+
+
+# The host traps System.exit with a Security Manager, which JDK 24 refuses to
+# enable: -Djava.security.manager=allow is a fatal startup error there
+MAX_HOST_JAVA_VERSION = 23
+
+
+def java_major_version(java_cmd: str = "java") -> Optional[int]:
+    """Feature release of the JDK that java_cmd runs (8, 17, 24, ...), or None if unknown."""
+    try:
+        result = subprocess.run([java_cmd, "-version"], capture_output=True, text=True, timeout=30)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = re.search(r'version "(\d+)(?:\.(\d+))?', result.stderr + result.stdout)
+    if not match:
+        return None
+    major = int(match.group(1))
+    # Up to JDK 8 versions read 1.8.0_...
+    return int(match.group(2) or 0) if major == 1 else major
+
+
+def jar_classpath(directory: str) -> List[str]:
+    """All jars in a tool's lib directory, in a stable order."""
+    return sorted(glob.glob(os.path.join(os.path.abspath(directory), "*.jar")))
+
+
+class ToolHostUnavailable(RuntimeError):
+    """Raised when the tool host cannot take a job right now."""
+
+
+class ToolHostClient:
+    """
+    Runs Java tools inside one long-lived JVM (tools/toolhost/ToolHost.java).
+
+    The host is started on first use, restarted on the next job after it
+    crashes, recycled after max_jobs jobs to shed leaked tool state, and
+    started with a capped heap. It runs one job at a time; a caller that
+    finds it busy, missing or repeatedly crashing gets ToolHostUnavailable
+    and should run the tool as a subprocess instead (see run_tool).
+    """
+
+    def __init__(self, host_command: Optional[Sequence[str]] = None, java_cmd: str = "java",
+                 host_source: str = TOOLHOST_SOURCE, max_heap: str = TOOLHOST_MAX_HEAP,
+                 max_jobs: int = TOOLHOST_MAX_JOBS, start_timeout: float = TOOLHOST_START_TIMEOUT,
+                 max_restarts: int = 3, restart_window: float = 300.0):
+        self.host_command = list(host_command) if host_command else [
+            java_cmd, f"-Xmx{max_heap}", "-XX:+ExitOnOutOfMemoryError",
+            "-Djava.security.manager=allow", *_FORMATTER_EXPORTS, host_source]
+        self.java_cmd = java_cmd
+        self.host_source = host_source
+        self.max_jobs = max_jobs
+        self.start_timeout = start_timeout
+        self.max_restarts = max_restarts
+        self.restart_window = restart_window
+        self.jobs_run = 0
+        self.restarts = []
+        self._process = None
+        self._lines = None
+        self._next_id = 0
+        self._lock = threading.Lock()
+        # Checked once when the host would run on java_cmd
+        self._java_supported = None if not host_command else True
+
+    def available(self) -> bool:
+        """
+        Whether the host could be started: a supported JVM is installed and
+        it is not crash-looping.
+        """
+        if not self.host_command or not shutil.which(self.host_command[0]):
+            return False
+        if self.host_command[-1] == self.host_source and not os.path.exists(self.host_source):
+            return False
+        if self._java_supported is None:
+            version = java_major_version(self.java_cmd)
+            self._java_supported = version is None or version <= MAX_HOST_JAVA_VERSION
+            if not self._java_supported:
+                print(f"[TOOLHOST] Not starting on JDK {version}: the host needs the Security Manager, "
+                      f"which JDK {MAX_HOST_JAVA_VERSION + 1} removed; running tools as subprocesses")
+        if not self._java_supported:
+            return False
+        cutoff = time.time() - self.restart_window
+        self.restarts = [t for t in self.restarts if t > cutoff]
+        return len(self.restarts) < self.max_restarts
+
+    def run(self, tool: str, args: Sequence[str], classpath: Sequence[str] = (),
+            main_class: Optional[str] = None, timeout: Optional[float] = None) -> subprocess.CompletedProcess:
+        """Run one tool job in the host and return its exit code and captured output."""
+        if not self._lock.acquire(blocking=False):
+            raise ToolHostUnavailable("tool host is busy")
+        try:
+            if not self.available():
+                raise ToolHostUnavailable("tool host is not available")
+            self._ensure_started()
+            self._next_id += 1
+            request = {"id": self._next_id, "tool": tool, "main": main_class,
+                       "classpath": [os.path.abspath(p) for p in classpath],
+                       "args": [str(a) for a in args]}
+            try:
+                self._process.stdin.write(json.dumps(request) + "\n")
+                self._process.stdin.flush()
+            except (BrokenPipeError, OSError) as e:
+                self._crashed(f"write failed: {e}")
+                raise ToolHostUnavailable("tool host died before the job started")
+
+            response = self._read_response(timeout, tool, args)
+            self.jobs_run += 1
+            if self.jobs_run >= self.max_jobs:
+                print(f"[TOOLHOST] Recycling after {self.jobs_run} jobs")
+                self._stop()
+            if response.get("error"):
+                print(f"[TOOLHOST] {tool} failed in host: {response['error']}")
+            return subprocess.CompletedProcess(
+                [tool, *args], response.get("exit", 1),
+                response.get("stdout", ""), response.get("stderr", "") or response.get("error") or "")
+        finally:
+            self._lock.release()
+
+    def _read_response(self, timeout: Optional[float], tool: str, args: Sequence[str]) -> Dict:
+        try:
+            line = self._lines.get(timeout=timeout)
+        except queue.Empty:
+            # A stuck tool leaves the host unusable, so start over next time
+            self._stop(kill=True)
+            raise subprocess.TimeoutExpired([tool, *args], timeout)
+        if line is None:
+            self._crashed("exited during a job")
+            raise ToolHostUnavailable("tool host crashed during the job")
+        return json.loads(line)
+
+    def _ensure_started(self):
+        if self._process and self._process.poll() is None:
+            return
+        if self._process:
+            self._crashed(f"exited with code {self._process.returncode}")
+        print(f"[TOOLHOST] Starting: {' '.join(self.host_command)}")
+        self._process = subprocess.Popen(
+            self.host_command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            text=True, encoding="utf-8", bufsize=1)
+        self._lines = queue.Queue()
+        threading.Thread(target=self._pump, args=(self._process, self._lines),
+                         name="toolhost-reader", daemon=True).start()
+        self.jobs_run = 0
+        try:
+            ready = json.loads(self._lines.get(timeout=self.start_timeout) or "{}")
+        except (queue.Empty, ValueError):
+            ready = {}
+        if not ready.get("ready"):
+            self._crashed("did not become ready")
+            raise ToolHostUnavailable("tool host failed to start")
+        print("[TOOLHOST] Ready")
+
+    @staticmethod
+    def _pump(process, lines):
+        # Reading on a separate thread lets run() wait with a timeout
+        for line in process.stdout:
+            lines.put(line)
+        lines.put(None)
+
+    def _crashed(self, reason: str):
+        print(f"[TOOLHOST] Host {reason}; it will be restarted on the next job")
+        self.restarts.append(time.time())
+        self._stop()
+
+    def _stop(self, kill: bool = False):
+        process, self._process = self._process, None
+        if not process:
+            return
+        try:
+            if kill:
+                process.kill()
+            # Closing stdin ends the host's request loop
+            process.stdin.close()
+            process.wait(timeout=5)
+        except Exception:
+            process.kill()
+
+    def close(self):
+        with self._lock:
+            self._stop()
+
+
+_tool_host = None
+_tool_host_lock = threading.Lock()
+
+
+def get_tool_host() -> Optional[ToolHostClient]:
+    """The process-wide tool host, or None when it is disabled or no JVM is installed."""
+    global _tool_host
+    if not TOOLHOST_ENABLED:
+        return None
+    with _tool_host_lock:
+        if _tool_host is None:
+            client = ToolHostClient()
+            if not client.available():
+                return None
+            _tool_host = client
+            atexit.register(client.close)
+        return _tool_host
+
+
+def run_tool(tool_host: Optional[ToolHostClient], tool: str, args: Sequence[str],
+             fallback_command: Sequence[str], classpath: Sequence[str] = (),
+             main_class: Optional[str] = None, check: bool = False,
+             timeout: Optional[float] = None, **subprocess_kwargs) -> subprocess.CompletedProcess:
+    """
+    Run a tool in the tool host, or as fallback_command in a subprocess when
+    there is no host or it cannot take the job. Behaves like subprocess.run
+    with text output captured when the host is used.
+    """
+    if tool_host is not None:
+        try:
+            result = tool_host.run(tool, args, classpath, main_class, timeout)
+        except ToolHostUnavailable as e:
+            print(f"[TOOLHOST] Running {tool} as a subprocess: {e}")
+        else:
+            if check and result.returncode != 0:
+                raise subprocess.CalledProcessError(
+                    result.returncode, list(fallback_command), result.stdout, result.stderr)
+            return result
+    return subprocess.run(list(fallback_command), check=check, timeout=timeout, **subprocess_kwargs)
@@ -13,9 +13,12 @@ class Validator:
     2. Other bugs validation - checks for other remaining bugs
     """
 
-    def __init__(self, output_dir, bin_dir, spotbugs_path, bug_analyzer: BugAnalyzer, pmd_analyzer: PMDAnalyzer = None, build_system_manager: BuildSystemManager = None):
+    def __init__(self, output_dir, bin_dir, spotbugs_path, bug_analyzer: BugAnalyzer, pmd_analyzer: PMDAnalyzer = None, build_system_manager: BuildSystemManager = None, report_dir=None):
         self.output_dir = output_dir
         self.bin_dir = bin_dir
+        self.report_dir = report_dir or output_dir
+        self.repository_report_path = os.path.join(
+            self.report_dir, BugAnalyzer.REPOSITORY_REPORT_NAME)
         self.spotbugs_path = spotbugs_path
         self.bug_analyzer = bug_analyzer
         self.pmd_analyzer = pmd_analyzer
@@ -58,6 +61,10 @@ class Validator:
 
             results['bug_fixed'] = validation_result['bug_fixed']
             results['other_bugs'] = validation_result['other_bugs']
+            results['repository_report_updated'] = validation_result.get(
+                'repository_report_updated', False)
+            results['other_bugs_checked'] = validation_result.get(
+                'other_bugs_checked', True)
 
             return results
 
@@ -72,15 +79,24 @@ class Validator:
             }
 
     def _validate_spotbugs_bug(self, filename: str, bug_line: str, bug_type: str, bug_descriptions, original_code: str, patched_code: str) -> dict:
-        """Validate a bug using SpotBugs analysis, considering file, type, and line range."""
+        """
+        Validate a bug using SpotBugs analysis, considering file, type, and line range.
+
+        When the bug pattern's detectors are known only they are run, on the
+        patched file's classes; the repository report and the other bugs in
+        the file are then left to the next full run (repository_report_updated
+        and other_bugs_checked are False).
+        """
         file_path = os.path.join(self.output_dir, filename)
-        report_path = os.path.join(self.output_dir, "spotbugs_report.xml")
+        report_path = os.path.join(self.report_dir, "spotbugs_report.xml")
 
         try:
             # Ensure compilation happens before analysis
             self.build_system_manager.compile_java_files(
                 file_path, self.bin_dir)
-            self.bug_analyzer.run_spotbugs_analysis(report_path)
+            targeted = self._run_targeted_spotbugs(file_path, report_path, bug_type)
+            if not targeted:
+                report_path = self._run_spotbugs_for_file(file_path, report_path)
 
             # Get all bugs from the report
             all_bugs_in_report = self.bug_analyzer.parse_spotbugs_xml(
@@ -109,7 +125,7 @@ class Validator:
                 # Check if the bug type matches (case insensitive)
                 if bug.get('type', '').lower() == bug_type.lower():
                     try:
-                        bug_line_in_report = int(bug.get('line', '-1').strip())
+                        bug_line_in_report = int(str(bug.get('line', '-1')).strip())
                         # Check if line is within range
                         if min_line <= bug_line_in_report <= max_line:
                             specific_bug_exists = True
@@ -123,7 +139,9 @@ class Validator:
                 # Return 'other_bugs' only from the current file
                 return {
                     'bug_fixed': True,
-                    'other_bugs': file_bugs  # Return all bugs found in this file
+                    'other_bugs': file_bugs,  # Return all bugs found in this file
+                    'repository_report_updated': not targeted,
+                    'other_bugs_checked': not targeted
                 }
             else:
                 # 3. Get other bugs (only from the *current file*, excluding the specific bug type)
@@ -132,7 +150,9 @@ class Validator:
                     'type', '').lower() != bug_type.lower()]
             return {
                 'bug_fixed': False,  # False because we found the specific bug
-                'other_bugs': other_bugs  # Return other bugs only from this file
+                'other_bugs': other_bugs,  # Return other bugs only from this file
+                'repository_report_updated': not targeted,
+                'other_bugs_checked': not targeted
             }
 
         except Exception as e:
@@ -143,6 +163,32 @@ class Validator:
                 'other_bugs': []
             }
 
+    def _run_targeted_spotbugs(self, file_path: str, report_path: str, bug_type: str) -> bool:
+        """Check the patched file for bug_type alone; False if a full run is needed instead."""
+        try:
+            return self.bug_analyzer.run_targeted_analysis(file_path, report_path, bug_type)
+        except RuntimeError as e:
+            print(f"[WARNING] Targeted SpotBugs failed, running all detectors: {e}")
+            return False
+
+    def _run_spotbugs_for_file(self, file_path: str, report_path: str) -> str:
+        """
+        Analyze the patched file and bring the repository report up to date.
+        Once a repository report exists only the file's own classes are
+        re-analyzed; otherwise the whole bin directory is analyzed once to
+        create it. Returns the report holding the file's findings.
+        """
+        if os.path.exists(self.repository_report_path):
+            try:
+                self.bug_analyzer.run_incremental_analysis(
+                    file_path, report_path, self.repository_report_path)
+                return report_path
+            except RuntimeError as e:
+                print(
+                    f"[WARNING] Incremental SpotBugs failed, analyzing the whole repository: {e}")
+        self.bug_analyzer.run_spotbugs_analysis(self.repository_report_path)
+        return self.repository_report_path
+
     # Helper method to normalize filenames for comparison
     def _normalize_filename(self, filename: str) -> str:
         """Normalize filename to handle different path formats."""
@@ -152,12 +198,23 @@ class Validator:
         return os.path.basename(filename).lower().strip()
 
     def _validate_pmd_bug(self, filename: str, bug_line: str, bug_type: str, original_code: str, patched_code: str) -> dict:
-        """Validate a bug using PMD analysis."""
+        """
+        Validate a bug using PMD analysis.
+
+        Only the rule under test is run when the ruleset enables it, so the
+        other bugs in the file are left to the next full-ruleset run and
+        other_bugs_checked is False.
+        """
         file_path = os.path.join(self.output_dir, filename)
-        report_path = os.path.join(self.output_dir, "pmd_report.xml")
+        report_path = os.path.join(self.report_dir, "pmd_report.xml")
+        rule_ruleset_path = os.path.join(self.report_dir, "pmd_validation_rules.xml")
 
         try:
-            self.pmd_analyzer.run_pmd_analysis(file_path, report_path)
+            targeted = self.pmd_analyzer.write_rule_ruleset(bug_type, rule_ruleset_path)
+            if targeted:
+                print(f"[VALIDATOR] Running only PMD rule {bug_type}")
+            self.pmd_analyzer.run_pmd_analysis(
+                file_path, report_path, rule_ruleset_path if targeted else None)
             updated_bugs = self.pmd_analyzer.parse_pmd_xml(report_path)
 
             # Convert bug_line to integer for comparison
@@ -181,7 +238,7 @@ class Validator:
                 # Check if either rule or type matches
                 if bug_rule == target_type or bug_type_from_report == target_type:
                     try:
-                        bug_line_in_report = int(bug.get('line', '-1').strip())
+                        bug_line_in_report = int(str(bug.get('line', '-1')).strip())
                         if min_line <= bug_line_in_report <= max_line:
                             specific_bug_exists = True
                             break
@@ -194,7 +251,8 @@ class Validator:
 
             return {
                 'bug_fixed': not specific_bug_exists,
-                'other_bugs': other_bugs
+                'other_bugs': other_bugs,
+                'other_bugs_checked': not targeted
             }
 
         except Exception as e:
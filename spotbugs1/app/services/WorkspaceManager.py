@@ -0,0 +1,274 @@
+import os
+import re
+import shutil
+import stat
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: workspaces are only guarded within one process
+    fcntl = None
+
+
+def _force_remove_readonly(func, path, excinfo):
+    # Git pack files are read-only on Windows
+    os.chmod(path, stat.S_IWRITE)
+    func(path)
+
+
+class Workspace:
+    """
+    The directories one session works in: its clone, compiled classes,
+    tool reports and caches, and CK output. Nothing in here is shared with other sessions.
+    """
+
+    def __init__(self, workspace_id: str, root: str):
+        self.id = workspace_id
+        self.root = os.path.abspath(root)
+        self.clone_dir = os.path.join(self.root, "cloned_repo")
+        self.bin_dir = os.path.join(self.root, "bin")
+        self.report_dir = os.path.join(self.root, "reports")
+        self.ck_output_dir = os.path.join(self.root, "ck_output")
+        self.temp_ck_dir = os.path.join(self.root, "temp_ck")
+        self.ck_solutions_dir = os.path.join(self.root, "ck_output_solutions")
+        # Kept across restarts so PMD and Gradle can skip work they have already done
+        self.pmd_cache_dir = os.path.join(self.root, "pmd_cache")
+        self.build_cache_dir = os.path.join(self.root, "build_cache")
+        # Held shared while this process uses the workspace, so other worker
+        # processes never evict it from under us
+        self.lock_path = os.path.join(self.root, ".lock")
+        self._lock_fd = None
+        self.references = 0
+        self.created_at = time.time()
+        self.last_used = self.created_at
+        # disk_usage() as of _measured_at; only re-measured after further use
+        self._size = None
+        self._measured_at = 0
+
+    def create(self):
+        for path in (self.clone_dir, self.bin_dir, self.report_dir, self.ck_output_dir,
+                     self.temp_ck_dir, self.ck_solutions_dir, self.pmd_cache_dir,
+                     self.build_cache_dir):
+            os.makedirs(path, exist_ok=True)
+
+    def disk_usage(self) -> int:
+        """Total size in bytes of the files under the workspace root."""
+        total = 0
+        for root, _, files in os.walk(self.root):
+            for file in files:
+                try:
+                    total += os.lstat(os.path.join(root, file)).st_size
+                except OSError:
+                    continue
+        return total
+
+    def size(self) -> int:
+        """disk_usage(), re-measured only if the workspace was used since last time."""
+        if self._size is None or self.last_used >= self._measured_at:
+            self._measured_at = time.time()
+            self._size = self.disk_usage()
+        return self._size
+
+    def hold(self):
+        """Take the cross-process shared lock, recreating the workspace if it was removed."""
+        if fcntl is None or self._lock_fd is not None:
+            return
+        while True:
+            self.create()
+            fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            fcntl.flock(fd, fcntl.LOCK_SH)
+            try:
+                # Another process may have removed the workspace while we waited
+                if os.fstat(fd).st_ino == os.stat(self.lock_path).st_ino:
+                    self._lock_fd = fd
+                    return
+            except OSError:
+                pass
+            os.close(fd)
+
+    def unhold(self):
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def lock_exclusive(self) -> Optional[int]:
+        """An exclusive lock on the workspace if no process holds it, else None."""
+        if fcntl is None:
+            return -1
+        try:
+            fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        except OSError:
+            return -1
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return None
+        return fd
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "root": self.root,
+            "references": self.references,
+            "created_at": self.created_at,
+            "last_used": self.last_used
+        }
+
+
+class WorkspaceManager:
+    """
+    Hands out one isolated Workspace per session.
+
+    Callers acquire a workspace for the duration of a request or job and
+    release it afterwards. When a new workspace is created and the
+    workspaces on disk exceed max_bytes (or there are more than
+    max_workspaces of them), the least recently used ones nobody holds, in
+    this or another worker process, are deleted. on_evict is called with the
+    workspace id so owners can drop objects built on top of it.
+    """
+
+    _TOMBSTONE_PREFIX = ".deleting-"
+
+    _VALID_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+    def __init__(self, root_dir: str, max_bytes: int = 0, max_workspaces: int = 0,
+                 on_evict: Optional[Callable[[str], None]] = None):
+        self.root_dir = os.path.abspath(root_dir)
+        self.max_bytes = max_bytes
+        self.max_workspaces = max_workspaces
+        self.on_evict = on_evict
+        self._workspaces = {}
+        self._lock = threading.RLock()
+        os.makedirs(self.root_dir, exist_ok=True)
+        # Workspaces whose deletion was interrupted
+        for entry in os.listdir(self.root_dir):
+            if entry.startswith(self._TOMBSTONE_PREFIX):
+                shutil.rmtree(os.path.join(self.root_dir, entry), ignore_errors=True)
+
+    @staticmethod
+    def new_id() -> str:
+        return uuid.uuid4().hex
+
+    def _validate_id(self, workspace_id: str):
+        # Ids become directory names, so never let one escape the root
+        if not workspace_id or not self._VALID_ID.match(workspace_id):
+            raise ValueError(f"Invalid workspace id: {workspace_id!r}")
+
+    def get(self, workspace_id: str) -> Workspace:
+        """Return the workspace for an id, creating its directories on first use."""
+        self._validate_id(workspace_id)
+        with self._lock:
+            workspace = self._workspaces.get(workspace_id)
+            if workspace is None:
+                workspace = Workspace(
+                    workspace_id, os.path.join(self.root_dir, workspace_id))
+                workspace.create()
+                self._workspaces[workspace_id] = workspace
+                print(f"[WORKSPACE] Created {workspace.root}")
+            workspace.last_used = time.time()
+            return workspace
+
+    def acquire(self, workspace_id: str) -> Workspace:
+        """Get a workspace and hold a reference so it is not evicted while in use."""
+        with self._lock:
+            created = workspace_id not in self._workspaces
+            workspace = self.get(workspace_id)
+            workspace.references += 1
+            if workspace.references == 1:
+                workspace.hold()
+        # Workspaces only grow while in use, so a new one is what can push
+        # the total over budget; checking here keeps requests from re-walking
+        # every workspace
+        if created:
+            self.evict()
+        return workspace
+
+    def release(self, workspace: Workspace):
+        with self._lock:
+            workspace.references = max(0, workspace.references - 1)
+            workspace.last_used = time.time()
+            if workspace.references == 0:
+                workspace.unhold()
+
+    @contextmanager
+    def use(self, workspace_id: str):
+        """Hold a workspace for the duration of a with block."""
+        workspace = self.acquire(workspace_id)
+        try:
+            yield workspace
+        finally:
+            self.release(workspace)
+
+    def list(self) -> List[Workspace]:
+        with self._lock:
+            return list(self._workspaces.values())
+
+    def remove(self, workspace_id: str) -> bool:
+        """Delete a workspace that nobody holds. Returns False if it is still in use."""
+        with self._lock:
+            workspace = self._workspaces.get(workspace_id)
+            if workspace is None:
+                return False
+            if workspace.references > 0:
+                return False
+            lock_fd = workspace.lock_exclusive()
+            if lock_fd is None:
+                print(f"[WORKSPACE] Not evicting {workspace_id}: in use by another worker")
+                return False
+            del self._workspaces[workspace_id]
+            # Move the files aside while still locked, so a get() recreating
+            # the same id starts from an empty workspace instead of racing
+            # with the deletion below
+            doomed = os.path.join(self.root_dir, f"{self._TOMBSTONE_PREFIX}{workspace_id}-{uuid.uuid4().hex}")
+            try:
+                os.rename(workspace.root, doomed)
+            except OSError:
+                # Directories with open files cannot be renamed on Windows
+                shutil.rmtree(workspace.root, ignore_errors=True)
+                doomed = None
+            finally:
+                if lock_fd >= 0:
+                    os.close(lock_fd)
+        # Let owners stop background work before the files go away
+        if self.on_evict:
+            try:
+                self.on_evict(workspace_id)
+            except Exception as e:
+                print(f"[WORKSPACE] Eviction callback failed for {workspace_id}: {e}")
+        if doomed:
+            try:
+                shutil.rmtree(doomed, onerror=_force_remove_readonly)
+            except Exception as e:
+                print(f"[WORKSPACE] Failed to delete {doomed}: {e}")
+        print(f"[WORKSPACE] Evicted {workspace_id}")
+        return True
+
+    def evict(self) -> List[str]:
+        """Delete idle workspaces, least recently used first, until within budget."""
+        with self._lock:
+            workspaces = list(self._workspaces.values())
+        if not self.max_bytes and not self.max_workspaces:
+            return []
+
+        usage = {w.id: w.size() for w in workspaces} if self.max_bytes else {}
+        total = sum(usage.values())
+        count = len(workspaces)
+        evicted = []
+        for workspace in sorted(workspaces, key=lambda w: w.last_used):
+            over_bytes = self.max_bytes and total > self.max_bytes
+            over_count = self.max_workspaces and count > self.max_workspaces
+            if not over_bytes and not over_count:
+                break
+            if self.remove(workspace.id):
+                total -= usage.get(workspace.id, 0)
+                count -= 1
+                evicted.append(workspace.id)
+        if self.max_bytes and total > self.max_bytes:
+            print(
+                f"[WORKSPACE] Still {total} bytes over a {self.max_bytes} byte budget; remaining workspaces are in use")
+        return evicted
@@ -9,7 +9,7 @@ document.getElementById('repoForm').addEventListener('submit', function(event) {
     }
     const repoName = repoNameMatch[1];
 
-    fetch('/analyze', {
+    fetchJob('/analyze', {
         method: 'POST',
         headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
         body: `repo_url=${encodeURIComponent(repoUrl)}`
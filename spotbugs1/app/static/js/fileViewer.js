@@ -27,6 +27,35 @@ function handleJavaVersionWarning(error) {
 
 
 
+const STAGE_LABELS = {
+    compile: 'Compiling',
+    spotbugs: 'Running SpotBugs',
+    pmd: 'Running PMD',
+    ck: 'Computing CK metrics',
+    snippets: 'Extracting code snippets'
+};
+
+// Update the spinner as stages progress and show findings as soon as an analyzer finishes
+function showAnalysisProgress(spinner, type, event) {
+    if (type === 'stage_started' && STAGE_LABELS[event.stage]) {
+        spinner.innerHTML = `<i class="fas fa-spinner fa-spin"></i> ${STAGE_LABELS[event.stage]}... (${event.elapsed.toFixed(1)}s)`;
+    } else if (type === 'spotbugs_profile' && event.upgrading) {
+        spinner.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Quick SpotBugs pass; the full analysis continues in the background...';
+    } else if (type === 'partial_results') {
+        const resultsDiv = document.getElementById('results');
+        resultsDiv.innerHTML = `<h2>Preliminary ${event.tool.toUpperCase()} findings: ${event.num_bugs}</h2>`;
+        event.bugs.slice().sort((a, b) => a.line - b.line).forEach(bug => {
+            resultsDiv.innerHTML += `
+                <div class="bug">
+                    <p><strong>Line:</strong> ${bug.line}</p>
+                    <p><strong>Category:</strong> ${bug.category}</p>
+                    <p><strong>Description:</strong> ${bug.description}</p>
+                </div><hr>
+            `;
+        });
+    }
+}
+
 document.getElementById('viewFileBtn').addEventListener('click', function () {
     const fileDropdown = document.getElementById('fileDropdown');
     const toolDropdown = document.getElementById('toolDropdown');
@@ -38,18 +67,19 @@ document.getElementById('viewFileBtn').addEventListener('click', function () {
         return;
     }
     const spinner = document.getElementById("viewFileSpinner");
+    spinner.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Loading file...';
     spinner.style.display = "flex"; // show spinner
 
     console.log(`Selected file: ${selectedFile}, Tool: ${selectedTool}`);
 
-    fetch('/file_content', {
+    fetchJob('/file_content', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({
             filename: selectedFile,
             tool: selectedTool
         })
-    })
+    }, 1000, (type, event) => showAnalysisProgress(spinner, type, event))
         .then(response => response.json())
         .then(data => {
             const codePreviewDiv = document.getElementById('codePreview');
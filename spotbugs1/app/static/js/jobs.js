@@ -0,0 +1,48 @@
+// Submit a long-running request as a background job and poll until it finishes.
+// Resolves with a Response carrying the job's result, so callers can keep using
+// response.json() exactly as they would with fetch().
+// An optional onEvent(type, data) callback receives the job's progress events
+// (stage_started, stage_finished, partial_results, ...) while it runs.
+function fetchJob(url, options = {}, pollIntervalMs = 1000, onEvent = null) {
+    const separator = url.includes('?') ? '&' : '?';
+    return fetch(`${url}${separator}async=1`, options).then(response => {
+        if (response.status !== 202) {
+            return response;
+        }
+        return response.json().then(job => {
+            const source = onEvent && job.events_url ? subscribeJobEvents(job.events_url, onEvent) : null;
+            return pollJob(job.status_url, pollIntervalMs).finally(() => {
+                if (source) {
+                    source.close();
+                }
+            });
+        });
+    });
+}
+
+function subscribeJobEvents(eventsUrl, onEvent) {
+    const source = new EventSource(eventsUrl);
+    ['stage_started', 'stage_finished', 'stage_failed', 'build_tool_detected', 'spotbugs_profile', 'partial_results'].forEach(type => {
+        source.addEventListener(type, event => onEvent(type, JSON.parse(event.data)));
+    });
+    source.addEventListener('result', () => source.close());
+    return source;
+}
+
+function pollJob(statusUrl, pollIntervalMs) {
+    return fetch(statusUrl)
+        .then(response => response.json())
+        .then(job => {
+            if (job.status === 'succeeded' || job.status === 'failed') {
+                return new Response(JSON.stringify(job.result), {
+                    status: job.status_code || 500,
+                    headers: { 'Content-Type': 'application/json' }
+                });
+            }
+            if (job.error && !job.status) {
+                throw new Error(job.error);
+            }
+            return new Promise(resolve => setTimeout(resolve, pollIntervalMs))
+                .then(() => pollJob(statusUrl, pollIntervalMs));
+        });
+}
@@ -109,7 +109,7 @@ function sendBugToLLM(bug) {
         console.warn("Original file content not available in cache, fetching from server");
         spinner.style.display = "flex";
         
-        fetch('/file_content', {
+        fetchJob('/file_content', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({ filename: selectedFile })
@@ -137,7 +137,7 @@ function sendBugToLLM(bug) {
 // Extract the actual LLM call to a separate function
 function sendToLLMWithContent(bug, selectedFile, fileContent, spinner) {
     // Send bug an file content to the LLM
-    fetch('/send_to_llm', {
+    fetchJob('/send_to_llm', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({
@@ -29,7 +29,7 @@ document.addEventListener('click', async function(event) {
         }
 
         try {
-            const response = await fetch('/validate_patch', {
+            const response = await fetchJob('/validate_patch', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify({
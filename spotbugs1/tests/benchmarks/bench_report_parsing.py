@@ -0,0 +1,126 @@
+"""
+Benchmark for SpotBugs and PMD report parsing on a synthetic report.
+
+Run from the spotbugs1 directory:
+
+    python tests/benchmarks/bench_report_parsing.py [--findings 50000] [--files 5000]
+
+Reports wall time and peak Python memory for the streaming parsers, next
+to a whole-DOM parse with a stat call per finding for comparison.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from app.services.BugAnalyzer import BugAnalyzer  # noqa: E402
+from app.services.PMDAnalyzer import PMDAnalyzer  # noqa: E402
+
+BUG_TYPES = ["NP_NULL_ON_SOME_PATH", "DM_STRING_CTOR", "EI_EXPOSE_REP", "SE_BAD_FIELD"]
+
+
+def build_repository(root: str, num_files: int):
+    for i in range(num_files):
+        package_dir = os.path.join(root, "src", "main", "java", "pkg", f"p{i % 50}")
+        os.makedirs(package_dir, exist_ok=True)
+        open(os.path.join(package_dir, f"C{i}.java"), "w").close()
+
+
+def write_spotbugs_report(path: str, num_findings: int, num_files: int):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<BugCollection><Project/>\n')
+        for i in range(num_findings):
+            file_index = i % num_files
+            bug_type = BUG_TYPES[i % len(BUG_TYPES)]
+            sourcepath = f"pkg/p{file_index % 50}/C{file_index}.java"
+            classname = f"pkg.p{file_index % 50}.C{file_index}"
+            f.write(
+                f'<BugInstance type="{bug_type}" priority="{1 + i % 3}" category="CORRECTNESS">'
+                f'<Class classname="{classname}" primary="true">'
+                f'<SourceLine classname="{classname}" sourcepath="{sourcepath}"/></Class>'
+                f'<Method classname="{classname}" name="m{i}" signature="()V"/>'
+                f'<SourceLine classname="{classname}" start="{i % 900 + 1}" end="{i % 900 + 2}" '
+                f'role="SOURCE_LINE_INVOKED" sourcepath="{sourcepath}"/>'
+                f'</BugInstance>\n')
+        f.write('<FindBugsSummary total_bugs="%d"/></BugCollection>\n' % num_findings)
+
+
+def write_pmd_report(path: str, num_findings: int, num_files: int, root: str):
+    per_file = max(1, num_findings // num_files)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<pmd xmlns="http://pmd.sourceforge.net/report/2.0.0" version="7.7.0">\n')
+        for file_index in range(num_files):
+            name = os.path.join(root, "src", "main", "java", "pkg",
+                                f"p{file_index % 50}", f"C{file_index}.java")
+            f.write(f'<file name="{name}">\n')
+            for j in range(per_file):
+                f.write(f'<violation beginline="{j + 1}" endline="{j + 1}" rule="UnusedLocalVariable" '
+                        f'ruleset="Best Practices" priority="3">Avoid unused local variables</violation>\n')
+            f.write('</file>\n')
+        f.write('</pmd>\n')
+
+
+def dom_parse_spotbugs(report_path: str, output_dir: str) -> int:
+    """Whole-DOM parse with a stat call per finding, as the parser used to work."""
+    count = 0
+    for bug_instance in ET.parse(report_path).getroot().findall('BugInstance'):
+        file_path = None
+        for source_line in bug_instance.findall('SourceLine'):
+            file_path = source_line.get('sourcepath')
+        file_path = file_path.strip('/').replace('/', os.sep)
+        for path in (file_path, os.path.join('src', 'main', 'java', file_path), os.path.basename(file_path)):
+            if os.path.exists(os.path.join(output_dir, path)):
+                break
+        count += 1
+    return count
+
+
+def measure(label: str, fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    # Tracing slows parsing down several times, so memory gets its own run
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<32} {elapsed:8.2f} s  {peak / 1024 / 1024:8.1f} MiB peak")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--findings", type=int, default=50000)
+    parser.add_argument("--files", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        repo_dir = os.path.join(root, "repo")
+        build_repository(repo_dir, args.files)
+        spotbugs_report = os.path.join(root, "spotbugs.xml")
+        pmd_report = os.path.join(root, "pmd.xml")
+        write_spotbugs_report(spotbugs_report, args.findings, args.files)
+        write_pmd_report(pmd_report, args.findings, args.files, repo_dir)
+        print(f"SpotBugs report: {os.path.getsize(spotbugs_report) / 1024 / 1024:.1f} MiB, "
+              f"PMD report: {os.path.getsize(pmd_report) / 1024 / 1024:.1f} MiB, "
+              f"{args.findings} findings across {args.files} files")
+
+        analyzer = BugAnalyzer(repo_dir, os.path.join(root, "bin"), "spotbugs", repo_dir)
+        pmd = PMDAnalyzer("pmd", os.path.join(root, "rules.xml"), pmd_report)
+
+        measure("spotbugs DOM + stat (before)", lambda: dom_parse_spotbugs(spotbugs_report, repo_dir))
+        index = measure("spotbugs streaming index",
+                        lambda: analyzer.parse_spotbugs_index(spotbugs_report, {}))
+        measure("pmd streaming index", lambda: pmd.parse_pmd_index(pmd_report))
+        print(f"Indexed {sum(len(bugs) for bugs in index.values())} SpotBugs findings "
+              f"across {len(index)} files")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Scaling benchmark for sharded SpotBugs runs.
+
+Needs a JVM and a directory of compiled classes (for example the bin
+directory after analyzing a large repository). Run from the spotbugs1
+directory:
+
+    python tests/benchmarks/bench_spotbugs_shards.py --bin-dir ../bin --shards 1,2,4,8,16
+
+Each shard count runs the full analysis once with the class cache disabled
+and prints wall time, speed-up over one shard and the number of findings,
+which should not change with the shard count.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from app.config import SPOTBUGS_PATH, SPOTBUGS_SHARD_HEAP_MB  # noqa: E402
+from app.services.BugAnalyzer import BugAnalyzer  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bin-dir", required=True, help="directory of compiled classes")
+    parser.add_argument("--shards", default="1,2,4,8",
+                        help="comma-separated shard counts to try")
+    parser.add_argument("--heap-mb", type=int, default=SPOTBUGS_SHARD_HEAP_MB,
+                        help="heap per shard JVM")
+    parser.add_argument("--profile", default=BugAnalyzer.DEEP,
+                        choices=[BugAnalyzer.QUICK, BugAnalyzer.DEEP])
+    parser.add_argument("--spotbugs", default=SPOTBUGS_PATH,
+                        help="SpotBugs launcher (spotbugs or spotbugs.bat)")
+    args = parser.parse_args()
+
+    if not shutil.which("java"):
+        sys.exit("A JVM is needed to run SpotBugs")
+
+    with tempfile.TemporaryDirectory() as root:
+        analyzer = BugAnalyzer(root, args.bin_dir, args.spotbugs, root)
+        analyzer.shard_heap_mb = args.heap_mb
+        # Shard even small inputs so every requested count is measured
+        analyzer.shard_min_classes = 0
+        num_classes = len(analyzer._class_files())
+        print(f"{num_classes} classes, profile {args.profile}, {args.heap_mb} MB per shard")
+        print(f"{'shards':>6} {'wall s':>8} {'speed-up':>9} {'findings':>9}")
+
+        baseline = None
+        for shards in [int(n) for n in args.shards.split(",")]:
+            analyzer.shards = shards
+            report_path = os.path.join(root, f"report_{shards}.xml")
+            start = time.perf_counter()
+            analyzer.run_spotbugs_analysis(report_path, args.profile)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            findings = len(ET.parse(report_path).getroot().findall("BugInstance"))
+            print(f"{shards:>6} {elapsed:>8.1f} {baseline / elapsed:>8.2f}x {findings:>9}")
+
+
+if __name__ == "__main__":
+    main()
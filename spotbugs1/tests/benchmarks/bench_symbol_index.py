@@ -0,0 +1,129 @@
+"""
+Benchmark for dependency lookups with the Java symbol index.
+
+Generates a synthetic source tree (by default 10,000 files in 100
+packages, each class importing a few classes from other packages and
+using a few from its own) and compares, per compiled file, the former
+full-tree scan of _find_dependent_files with symbol index lookups. No JVM
+is needed. Run from the spotbugs1 directory:
+
+    python tests/benchmarks/bench_symbol_index.py --files 10000 --queries 20
+
+Prints the time to build the index from scratch, to reload and refresh it
+with nothing changed, to re-index one edited file, and the mean time per
+dependency lookup for both approaches.
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from app.services.JavaSymbolIndex import JavaSymbolIndex  # noqa: E402
+
+
+def generate_tree(root, num_files, num_packages, seed=0):
+    """Write num_files classes spread over num_packages packages; return their paths."""
+    rng = random.Random(seed)
+    per_package = max(1, num_files // num_packages)
+    names = [(f"pkg{p}", f"C{p}_{c}") for p in range(num_packages) for c in range(per_package)]
+    paths = []
+    for i, (package, name) in enumerate(names):
+        imports = rng.sample(names, 4)
+        same_package = names[i - i % per_package:i - i % per_package + per_package]
+        siblings = [n for _, n in rng.sample(same_package, min(3, per_package))]
+        lines = [f"package com.example.{package};", ""]
+        lines += [f"import com.example.{pkg}.{n};" for pkg, n in imports]
+        lines += ["", f"public class {name} {{"]
+        lines += [f"    private {n} field{k};" for k, (_, n) in enumerate(imports)]
+        lines += [f"    private {n} sibling{k};" for k, n in enumerate(siblings)]
+        lines += ["    public int value() { return 42; }", "}", ""]
+        directory = os.path.join(root, "src", "main", "java", "com", "example", package)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{name}.java")
+        with open(path, "w") as f:
+            f.write("\n".join(lines))
+        paths.append(path)
+    return paths
+
+
+def legacy_dependencies(root, file_path):
+    """The scan _find_dependent_files used to do: read every file for each lookup."""
+    with open(file_path, "r", encoding="utf-8") as f:
+        content = f.read()
+    imports = re.findall(r'import\s+([^;]+);', content)
+    package_match = re.search(r'package\s+([^;]+);', content)
+    target_package = package_match.group(1) if package_match else ""
+    dependent_files = []
+    for dir_path, _, files in os.walk(root):
+        for file in files:
+            java_file = os.path.join(dir_path, file)
+            if not file.endswith(".java") or java_file == file_path:
+                continue
+            with open(java_file, "r", encoding="utf-8") as f:
+                file_content = f.read()
+            file_package_match = re.search(r'package\s+([^;]+);', file_content)
+            file_package = file_package_match.group(1) if file_package_match else ""
+            if any(f"class {imp.split('.')[-1]}" in file_content for imp in imports):
+                dependent_files.append(java_file)
+            elif file_package == target_package and any(
+                    decl in content for decl in re.findall(r'class\s+(\w+)', file_content)):
+                dependent_files.append(java_file)
+    return set(dependent_files)
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=10000, help="number of generated source files")
+    parser.add_argument("--packages", type=int, default=100, help="number of generated packages")
+    parser.add_argument("--queries", type=int, default=20, help="files to look up dependencies for")
+    parser.add_argument("--skip-legacy", action="store_true", help="do not time the full-tree scan")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        paths = generate_tree(root, args.files, args.packages)
+        queries = random.Random(1).sample(paths, min(args.queries, len(paths)))
+        index_path = os.path.join(root, "symbol_index.json")
+        print(f"{len(paths)} files in {args.packages} packages, {len(queries)} lookups")
+
+        index = JavaSymbolIndex(root, index_path)
+        indexed, elapsed = timed(index.refresh)
+        print(f"{'build index':<28} {elapsed * 1000:>10.1f} ms ({indexed} files read)")
+
+        reloaded, elapsed = timed(JavaSymbolIndex, root, index_path)
+        print(f"{'reload saved index':<28} {elapsed * 1000:>10.1f} ms")
+        indexed, elapsed = timed(reloaded.refresh)
+        print(f"{'refresh, nothing changed':<28} {elapsed * 1000:>10.1f} ms ({indexed} files read)")
+
+        with open(queries[0], "a") as f:
+            f.write("// edited\n")
+        _, elapsed = timed(index.update_file, queries[0])
+        print(f"{'update one edited file':<28} {elapsed * 1000:>10.1f} ms")
+
+        start = time.perf_counter()
+        for path in queries:
+            index.dependencies(path)
+        indexed_mean = (time.perf_counter() - start) / len(queries)
+        print(f"{'index lookup (mean)':<28} {indexed_mean * 1000:>10.3f} ms")
+
+        if not args.skip_legacy:
+            start = time.perf_counter()
+            for path in queries:
+                legacy_dependencies(root, path)
+            legacy_mean = (time.perf_counter() - start) / len(queries)
+            print(f"{'full-tree scan (mean)':<28} {legacy_mean * 1000:>10.1f} ms")
+            print(f"{'speed-up per lookup':<28} {legacy_mean / indexed_mean:>10.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -85,10 +85,16 @@ def mock_google_formatter_path():
     return "mock_google_formatter_path"
 
 
+@pytest.fixture
+def test_store_path(tmp_path):
+    """Provide a temporary analysis store location for tests."""
+    return str(tmp_path / "store" / "analysis.sqlite3")
+
+
 @pytest.fixture
 def facade(test_output_dir, test_bin_dir, mock_github_token, mock_llm_api_key,
            mock_spotbugs_path, mock_pmd_path, mock_pmd_ruleset_path,
-           mock_pmd_report_path, mock_google_formatter_path):
+           mock_pmd_report_path, mock_google_formatter_path, test_store_path):
     """Create a JavaAnalysisFacade instance for testing."""
     return JavaAnalysisFacade(
         github_token=mock_github_token,
@@ -98,7 +104,9 @@ def facade(test_output_dir, test_bin_dir, mock_github_token, mock_llm_api_key,
         pmd_path=mock_pmd_path,
         pmd_ruleset_path=mock_pmd_ruleset_path,
         pmd_report_path=mock_pmd_report_path,
-        llm_api_key=mock_llm_api_key
+        llm_api_key=mock_llm_api_key,
+        analysis_store_path=test_store_path,
+        enable_warmup=False
     )
 
 
@@ -120,3 +128,61 @@ public class Test {
 }
 """
     }
+
+
+@pytest.fixture
+def class_file_bytes():
+    """
+    Build minimal .class files for tests that have no JDK. Fields are
+    (access, name, descriptor, int constant or None), methods are
+    (access, name, descriptor), and inner is (outer class or None, access)
+    for a nested class.
+    """
+    import struct
+
+    def build(name, fields=(), methods=(), inner=None, access=0x0021):
+        pool = []
+        utf8_index = {}
+
+        def add(entry):
+            pool.append(entry)
+            return len(pool)
+
+        def utf8(text):
+            if text not in utf8_index:
+                data = text.encode()
+                utf8_index[text] = add(b"\x01" + struct.pack(">H", len(data)) + data)
+            return utf8_index[text]
+
+        def cls(class_name):
+            return add(b"\x07" + struct.pack(">H", utf8(class_name)))
+
+        this_index = cls(name)
+        super_index = cls("java/lang/Object")
+        body = struct.pack(">HHHH", access, this_index, super_index, 0)
+
+        body += struct.pack(">H", len(fields))
+        for field_access, field_name, descriptor, constant in fields:
+            body += struct.pack(">HHH", field_access, utf8(field_name), utf8(descriptor))
+            if constant is None:
+                body += struct.pack(">H", 0)
+            else:
+                value_index = add(b"\x03" + struct.pack(">i", constant))
+                body += struct.pack(">HHIH", 1, utf8("ConstantValue"), 2, value_index)
+
+        body += struct.pack(">H", len(methods))
+        for method_access, method_name, descriptor in methods:
+            body += struct.pack(">HHHH", method_access, utf8(method_name), utf8(descriptor), 0)
+
+        if inner is None:
+            body += struct.pack(">H", 0)
+        else:
+            outer, inner_access = inner
+            outer_index = cls(outer) if outer else 0
+            body += struct.pack(">HHIHHHHH", 1, utf8("InnerClasses"), 10, 1,
+                                this_index, outer_index, 0, inner_access)
+
+        header = struct.pack(">IHHH", 0xCAFEBABE, 0, 52, len(pool) + 1)
+        return header + b"".join(pool) + body
+
+    return build
@@ -0,0 +1,65 @@
+import pytest
+from app.services.AnalysisCache import AnalysisCache, digest_text
+
+
+@pytest.fixture
+def cache():
+    """Create a small AnalysisCache instance for testing."""
+    return AnalysisCache(max_entries=2)
+
+
+def test_hit_while_inputs_match(cache):
+    """Test that an entry is returned while content and config are unchanged."""
+    digest = digest_text("class A {}")
+    cache.set("pkg/A.java", "spotbugs", digest, "cfg", [{"type": "X"}], {})
+
+    assert cache.get("pkg/A.java", "spotbugs", digest, "cfg") == ([{"type": "X"}], {})
+
+
+def test_changed_content_drops_entry(cache):
+    """Test that a content change drops the entry immediately."""
+    cache.set("A.java", "pmd", digest_text("old"), "cfg", [], {})
+
+    assert cache.get("A.java", "pmd", digest_text("new"), "cfg") is None
+    assert len(cache) == 0
+
+
+def test_changed_config_drops_entry(cache):
+    """Test that a ruleset change drops the entry."""
+    digest = digest_text("class A {}")
+    cache.set("A.java", "pmd", digest, "ruleset-1", [], {})
+
+    assert cache.get("A.java", "pmd", digest, "ruleset-2") is None
+
+
+def test_lru_eviction(cache):
+    """Test that the least recently used entry is evicted first."""
+    for name in ("A.java", "B.java"):
+        cache.set(name, "pmd", "d", "c", [], {})
+    cache.get("A.java", "pmd", "d", "c")
+    cache.set("C.java", "pmd", "d", "c", [], {})
+
+    assert cache.get("B.java", "pmd", "d", "c") is None
+    assert cache.get("A.java", "pmd", "d", "c") is not None
+
+
+def test_invalidate_file_matches_basename(cache):
+    """Test that invalidation by bare filename removes entries stored by path."""
+    cache.set("src/pkg/A.java", "spotbugs", "d", "c", [], {})
+    cache.set("src/pkg/A.java", "pmd", "d", "c", [], {})
+
+    assert cache.invalidate_file("A.java") == 2
+    assert len(cache) == 0
+
+
+def test_scopes_sharing_a_backend_are_isolated():
+    """Test that workspaces sharing a backend neither read nor invalidate each other's entries."""
+    first = AnalysisCache(max_entries=8, scope="ws1")
+    second = AnalysisCache(max_entries=8, backend=first.backend, scope="ws2")
+    first.set("src/A.java", "pmd", "d", "c", [{"type": "X"}], {})
+    second.set("other/A.java", "pmd", "d", "c", [], {})
+
+    assert second.get("src/A.java", "pmd", "d", "c") is None
+    assert second.invalidate_file("A.java") == 1
+    assert first.get("src/A.java", "pmd", "d", "c") == ([{"type": "X"}], {})
+    assert len(first) == 1 and len(second) == 0
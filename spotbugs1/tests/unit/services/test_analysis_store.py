@@ -0,0 +1,61 @@
+import sqlite3
+import pytest
+from app.services.AnalysisStore import AnalysisStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Create an AnalysisStore backed by a temporary SQLite file."""
+    return AnalysisStore(str(tmp_path / "analysis.sqlite3"))
+
+
+def test_put_and_get(store):
+    """Test that a stored payload is returned for identical inputs."""
+    payload = {"bugs": [{"type": "NP_NULL", "line": "4"}], "metrics": {}}
+    store.put(AnalysisStore.BUGS, "owner/repo", "abc123",
+              "src/Foo.java", "hash1", "spotbugs", payload, "cfg")
+
+    assert store.get(AnalysisStore.BUGS, "owner/repo",
+                     "src/Foo.java", "hash1", "spotbugs", "cfg") == payload
+
+
+def test_get_misses_on_different_inputs(store):
+    """Test that content, tool and config all take part in the lookup."""
+    store.put(AnalysisStore.BUGS, "owner/repo", "abc123",
+              "Foo.java", "hash1", "pmd", {"bugs": []}, "cfg")
+
+    assert store.get(AnalysisStore.BUGS, "owner/repo",
+                     "Foo.java", "hash2", "pmd", "cfg") is None
+    assert store.get(AnalysisStore.BUGS, "owner/repo",
+                     "Foo.java", "hash1", "spotbugs", "cfg") is None
+    assert store.get(AnalysisStore.BUGS, "owner/repo",
+                     "Foo.java", "hash1", "pmd", "other") is None
+
+
+def test_put_replaces_existing_row(store):
+    """Test that writing the same key twice keeps only the latest payload."""
+    for metrics in ({"loc": "1"}, {"loc": "2"}):
+        store.put(AnalysisStore.CK_CLASS_METRICS, "owner/repo", "abc123",
+                  "Foo.java", "hash1", "ck", [metrics])
+
+    assert store.get(AnalysisStore.CK_CLASS_METRICS, "owner/repo",
+                     "Foo.java", "hash1", "ck") == [{"loc": "2"}]
+
+
+def test_results_survive_a_new_instance(store):
+    """Test that a second process opening the same file sees earlier results."""
+    store.put(AnalysisStore.SOLUTION_METRICS, "owner/repo", None,
+              "Foo.java", "hash1", "ck", [{"wmc": "3"}])
+
+    other = AnalysisStore(store.db_path)
+
+    assert other.get(AnalysisStore.SOLUTION_METRICS, "owner/repo",
+                     "Foo.java", "hash1", "ck") == [{"wmc": "3"}]
+
+
+def test_wal_mode_enabled(store):
+    """Test that the database runs in write-ahead logging mode."""
+    store.put(AnalysisStore.BUGS, "r", None, "A.java", "h", "pmd", {})
+
+    with sqlite3.connect(store.db_path) as connection:
+        assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
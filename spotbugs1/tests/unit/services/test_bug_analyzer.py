@@ -0,0 +1,397 @@
+import os
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import pytest
+from app.services.BugAnalyzer import BugAnalyzer, normalize_source_path
+from app.services.ClassFindingsCache import ClassFindingsCache, digest_file
+
+
+@pytest.fixture
+def bug_analyzer(tmp_path):
+    """Create a BugAnalyzer instance for testing."""
+    return BugAnalyzer(str(tmp_path), str(tmp_path / "bin"),
+                       "mock_spotbugs_path", str(tmp_path))
+
+
+def test_normalize_source_path():
+    """Test that report and UI paths normalize to the same key."""
+    assert normalize_source_path("/src\\main\\Foo.java") == "src/main/foo.java"
+    assert normalize_source_path("src/main/Foo.java") == "src/main/foo.java"
+
+
+def test_index_bugs_by_file(bug_analyzer):
+    """Test that bugs are grouped by normalized source path."""
+    bugs = [
+        {"file": "pkg/Foo.java", "line": "3", "type": "A"},
+        {"file": "pkg/Foo.java", "line": "9", "type": "B"},
+        {"file": "pkg/Bar.java", "line": "1", "type": "C"},
+    ]
+
+    index = bug_analyzer.index_bugs_by_file(bugs)
+
+    assert set(index) == {"pkg/foo.java", "pkg/bar.java"}
+    assert len(index["pkg/foo.java"]) == 2
+
+
+def test_lookup_file_bugs_falls_back_to_basename(bug_analyzer):
+    """Test lookup by relative path and by bare filename."""
+    index = bug_analyzer.index_bugs_by_file(
+        [{"file": "src/main/java/pkg/Foo.java", "line": "3", "type": "A"}])
+
+    assert len(bug_analyzer.lookup_file_bugs(
+        index, "src/main/java/pkg/Foo.java")) == 1
+    assert len(bug_analyzer.lookup_file_bugs(index, "Foo.java")) == 1
+    assert bug_analyzer.lookup_file_bugs(index, "Bar.java") == []
+
+
+def test_lookup_file_bugs_returns_copies(bug_analyzer):
+    """Test that callers can annotate looked-up bugs without touching the index."""
+    index = bug_analyzer.index_bugs_by_file(
+        [{"file": "Foo.java", "line": "3", "type": "A"}])
+
+    bugs = bug_analyzer.lookup_file_bugs(index, "Foo.java")
+    bugs[0]["code_snippet"] = "x = null;"
+
+    assert "code_snippet" not in index["foo.java"][0]
+
+
+def _write_report(path, bugs):
+    """Write a minimal SpotBugs XML report with (classname, type, line) bugs."""
+    instances = "".join(
+        f'<BugInstance type="{bug_type}" priority="2" category="CORRECTNESS">'
+        f'<Class classname="{classname}" primary="true"/>'
+        f'<SourceLine classname="{classname}" start="{line}" sourcepath="pkg/Foo.java"/>'
+        f'</BugInstance>'
+        for classname, bug_type, line in bugs)
+    path.write_text(
+        f'<?xml version="1.0"?><BugCollection><Project/>{instances}'
+        f'<BugPattern type="X"/><FindBugsSummary/></BugCollection>')
+
+
+def test_class_files_for_source_includes_inner_classes(bug_analyzer, tmp_path):
+    """Test that the top-level class and its nested classes are found, but not look-alikes."""
+    source = tmp_path / "Foo.java"
+    source.write_text("package pkg;\npublic class Foo {}\n")
+    package_dir = tmp_path / "bin" / "pkg"
+    package_dir.mkdir(parents=True)
+    for name in ("Foo", "Foo$Inner", "Foo$1", "FooBar", "Other"):
+        (package_dir / f"{name}.class").write_bytes(b"")
+
+    class_files = bug_analyzer.class_files_for_source(str(source))
+
+    assert set(class_files) == {"pkg.Foo", "pkg.Foo$Inner", "pkg.Foo$1"}
+    assert class_files["pkg.Foo"] == str(package_dir / "Foo.class")
+
+
+def test_merge_reports_replaces_only_reanalyzed_classes(bug_analyzer, tmp_path):
+    """Test that a merge swaps the findings of re-analyzed classes and keeps the rest."""
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "Foo.java").write_text("")
+    repository_report = tmp_path / "repo.xml"
+    fresh_report = tmp_path / "fresh.xml"
+    _write_report(repository_report, [
+        ("pkg.Foo", "OLD_FOO", 3), ("pkg.Foo$Inner", "OLD_INNER", 7), ("pkg.Bar", "BAR", 5)])
+    _write_report(fresh_report, [("pkg.Foo", "NEW_FOO", 4)])
+
+    bug_analyzer.merge_reports(str(repository_report), str(fresh_report),
+                               ["pkg.Foo", "pkg.Foo$Inner"])
+
+    types = sorted(bug["type"] for bug in bug_analyzer.parse_spotbugs_xml(
+        str(repository_report), {}))
+    assert types == ["BAR", "NEW_FOO"]
+
+
+def test_merge_reports_without_repository_report_copies_fresh(bug_analyzer, tmp_path):
+    """Test that the first merge seeds the repository report."""
+    repository_report = tmp_path / "repo.xml"
+    fresh_report = tmp_path / "fresh.xml"
+    _write_report(fresh_report, [("pkg.Foo", "NEW_FOO", 4)])
+
+    bug_analyzer.merge_reports(str(repository_report), str(fresh_report), ["pkg.Foo"])
+
+    assert repository_report.read_text() == fresh_report.read_text()
+
+
+def test_run_incremental_analysis_targets_only_changed_classes(bug_analyzer, tmp_path, monkeypatch):
+    """Test that SpotBugs gets the changed classes as targets and bin_dir as aux classpath."""
+    source = tmp_path / "Foo.java"
+    source.write_text("package pkg;\npublic class Foo {}\n")
+    package_dir = tmp_path / "bin" / "pkg"
+    package_dir.mkdir(parents=True)
+    for name in ("Foo", "Foo$Inner", "Bar"):
+        (package_dir / f"{name}.class").write_bytes(b"")
+    commands = []
+
+    def fake_run_tool(tool_host, tool, args, fallback_command, **kwargs):
+        commands.append(list(fallback_command))
+        _write_report(tmp_path / "fresh.xml", [])
+
+    monkeypatch.setattr("app.services.BugAnalyzer.run_tool", fake_run_tool)
+
+    class_names = bug_analyzer.run_incremental_analysis(
+        str(source), str(tmp_path / "fresh.xml"), str(tmp_path / "repo.xml"))
+
+    command = commands[0]
+    assert class_names == ["pkg.Foo", "pkg.Foo$Inner"]
+    assert command[command.index("-onlyAnalyze") + 1] == "pkg.Foo,pkg.Foo$Inner"
+    assert command[command.index("-auxclasspath") + 1] == bug_analyzer.bin_dir
+    assert str(package_dir / "Bar.class") not in command
+    assert command[-2:] == [str(package_dir / "Foo.class"), str(package_dir / "Foo$Inner.class")]
+    assert (tmp_path / "repo.xml").exists()
+
+
+def test_run_targeted_analysis_runs_only_pattern_detectors(bug_analyzer, tmp_path, monkeypatch):
+    """Test that a single-pattern check enables only its detectors on the file's classes."""
+    source = tmp_path / "Foo.java"
+    source.write_text("package pkg;\npublic class Foo {}\n")
+    package_dir = tmp_path / "bin" / "pkg"
+    package_dir.mkdir(parents=True)
+    (package_dir / "Foo.class").write_bytes(b"")
+    commands = []
+    monkeypatch.setattr("app.services.BugAnalyzer.run_tool",
+                        lambda tool_host, tool, args, fallback_command, **kwargs:
+                        commands.append(list(fallback_command)))
+    detectors = {"NP_NULL_ON_SOME_PATH": ["FindNullDeref"],
+                 "DLS_DEAD_LOCAL_STORE": ["FindDeadLocalStores"]}
+    monkeypatch.setattr(bug_analyzer.detector_catalog, "reporting_detectors",
+                        lambda pattern: detectors.get(pattern, []))
+    monkeypatch.setattr(bug_analyzer.detector_catalog, "detectors_for",
+                        lambda pattern: sorted(detectors.get(pattern, []) + ["Methods"]))
+
+    assert bug_analyzer.run_targeted_analysis(
+        str(source), str(tmp_path / "one.xml"), "NP_NULL_ON_SOME_PATH")
+    command = commands[0]
+    assert command[command.index("-visitors") + 1] == "FindNullDeref,Methods"
+    assert "-omitVisitors" not in command
+    assert command[command.index("-onlyAnalyze") + 1] == "pkg.Foo"
+
+    # Unknown patterns and omitted detectors need a full run
+    assert not bug_analyzer.run_targeted_analysis(str(source), str(tmp_path / "one.xml"), "XX_UNKNOWN")
+    assert not bug_analyzer.run_targeted_analysis(
+        str(source), str(tmp_path / "one.xml"), "DLS_DEAD_LOCAL_STORE")
+    assert len(commands) == 1
+
+
+@pytest.fixture
+def cached_analyzer(tmp_path, monkeypatch):
+    """A BugAnalyzer with a class cache and a fake SpotBugs that reports one bug per analyzed class."""
+    analyzer = BugAnalyzer(str(tmp_path), str(tmp_path / "bin"), "mock_spotbugs_path",
+                           str(tmp_path), class_cache=ClassFindingsCache())
+    package_dir = tmp_path / "bin" / "pkg"
+    package_dir.mkdir(parents=True)
+    for name in ("Foo", "Bar"):
+        (package_dir / f"{name}.class").write_bytes(name.encode())
+    runs = []
+
+    def fake_run_tool(tool_host, tool, args, fallback_command, **kwargs):
+        command = list(fallback_command)
+        runs.append(command)
+        if "-onlyAnalyze" in command:
+            classes = command[command.index("-onlyAnalyze") + 1].split(",")
+        else:
+            classes = ["pkg.Bar", "pkg.Foo"]
+        report = command[command.index("-output") + 1]
+        _write_report(Path(report), [(name, "BUG", 1) for name in classes])
+
+    monkeypatch.setattr("app.services.BugAnalyzer.run_tool", fake_run_tool)
+    analyzer.runs = runs
+    return analyzer
+
+
+def _reported_classes(report_path):
+    return sorted(bug.find("Class").get("classname")
+                  for bug in ET.parse(report_path).getroot().findall("BugInstance"))
+
+
+def test_unchanged_bytecode_skips_spotbugs(cached_analyzer, tmp_path):
+    """Test that a second run over identical class files does not start SpotBugs."""
+    report = str(tmp_path / "report.xml")
+
+    cached_analyzer.run_spotbugs_analysis(report)
+    cached_analyzer.run_spotbugs_analysis(report)
+
+    assert len(cached_analyzer.runs) == 1
+    assert _reported_classes(report) == ["pkg.Bar", "pkg.Foo"]
+
+
+def test_only_changed_classes_are_reanalyzed(cached_analyzer, tmp_path):
+    """Test that after an edit only the class with new bytecode goes to SpotBugs."""
+    report = str(tmp_path / "report.xml")
+    cached_analyzer.run_spotbugs_analysis(report)
+
+    (tmp_path / "bin" / "pkg" / "Foo.class").write_bytes(b"changed")
+    cached_analyzer.run_spotbugs_analysis(report)
+
+    command = cached_analyzer.runs[-1]
+    assert command[command.index("-onlyAnalyze") + 1] == "pkg.Foo"
+    assert _reported_classes(report) == ["pkg.Bar", "pkg.Foo"]
+
+
+def test_cached_findings_are_written_ahead_of_the_summary(cached_analyzer, tmp_path):
+    """Test that a partly cached run keeps the report layout: Project, BugInstances, then summary."""
+    report = str(tmp_path / "report.xml")
+    cached_analyzer.run_spotbugs_analysis(report)
+
+    (tmp_path / "bin" / "pkg" / "Foo.class").write_bytes(b"changed")
+    cached_analyzer.run_spotbugs_analysis(report)
+
+    tags = [child.tag for child in ET.parse(report).getroot()]
+    assert tags == ["Project", "BugInstance", "BugInstance", "BugPattern", "FindBugsSummary"]
+    assert cached_analyzer.class_cache.get(
+        "pkg.Foo", digest_file(str(tmp_path / "bin" / "pkg" / "Foo.class")),
+        cached_analyzer.config_fingerprint())[0].startswith("<BugInstance")
+
+
+def test_parse_spotbugs_index_resolves_paths_and_groups_by_file(bug_analyzer, tmp_path):
+    """Test that report paths resolve against repository files and bugs are grouped per file."""
+    (tmp_path / "src" / "main" / "java" / "pkg").mkdir(parents=True)
+    (tmp_path / "src" / "main" / "java" / "pkg" / "Foo.java").write_text("")
+    report = tmp_path / "report.xml"
+    report.write_text(
+        '<BugCollection><Project/>'
+        '<BugInstance type="NP_NULL" priority="1" category="CORRECTNESS">'
+        '<SourceLine start="3" role="SOURCE_LINE_NULL_VALUE" sourcepath="pkg/Foo.java"/>'
+        '<SourceLine start="8" role="SOURCE_LINE_INVOKED" sourcepath="pkg/Foo.java"/>'
+        '</BugInstance>'
+        '<BugInstance type="DUP" priority="2" category="STYLE">'
+        '<SourceLine start="5" sourcepath="pkg/Foo.java"/></BugInstance>'
+        '<BugInstance type="DUP" priority="2" category="STYLE">'
+        '<SourceLine start="5" sourcepath="pkg/Foo.java"/></BugInstance>'
+        '<BugInstance type="GONE" priority="2" category="STYLE">'
+        '<SourceLine start="1" sourcepath="pkg/Missing.java"/></BugInstance>'
+        '</BugCollection>')
+
+    index = bug_analyzer.parse_spotbugs_index(str(report), {"NP_NULL": "Null value."})
+
+    foo_bugs = index["src/main/java/pkg/foo.java"]
+    assert [bug["type"] for bug in foo_bugs] == ["NP_NULL", "DUP"]
+    assert foo_bugs[0]["line"] == "8"
+    assert "Line 3: Variable may be assigned null." in foo_bugs[0]["description"]
+    assert [bug["type"] for bug in index["unknown file"]] == ["GONE"]
+
+
+def test_parse_spotbugs_index_resolves_paths_in_module_source_roots(bug_analyzer, tmp_path):
+    """Test that report paths of a multi-module build resolve against each module's sources."""
+    for module in ("core", "api"):
+        (tmp_path / module / "src" / "main" / "java" / module).mkdir(parents=True)
+        (tmp_path / module / "src" / "main" / "java" / module / "Foo.java").write_text("")
+    bug_analyzer.source_roots = [str(tmp_path / module / "src" / "main" / "java") for module in ("core", "api")]
+    report = tmp_path / "report.xml"
+    report.write_text(
+        '<BugCollection><Project/>'
+        '<BugInstance type="A" priority="2" category="STYLE">'
+        '<SourceLine start="1" sourcepath="core/Foo.java"/></BugInstance>'
+        '<BugInstance type="B" priority="2" category="STYLE">'
+        '<SourceLine start="2" sourcepath="api/Foo.java"/></BugInstance>'
+        '</BugCollection>')
+
+    index = bug_analyzer.parse_spotbugs_index(str(report), {})
+
+    assert [bug["type"] for bug in index["core/src/main/java/core/foo.java"]] == ["A"]
+    assert [bug["type"] for bug in index["api/src/main/java/api/foo.java"]] == ["B"]
+
+
+def test_quick_profile_command_and_fingerprint(bug_analyzer):
+    """Test that the quick profile narrows effort, priority and categories, and caches separately."""
+    command = bug_analyzer._base_command("report.xml", "quick")
+
+    assert "-effort:min" in command and "-medium" in command
+    assert command[command.index("-bugCategories") + 1] == "CORRECTNESS"
+    assert "-effort:max" in bug_analyzer._base_command("report.xml")
+    assert bug_analyzer.config_fingerprint("quick") != bug_analyzer.config_fingerprint()
+    with pytest.raises(ValueError):
+        bug_analyzer._base_command("report.xml", "thorough")
+
+
+def test_choose_profile_counts_only_uncached_classes(cached_analyzer, tmp_path):
+    """Test that deep is chosen once the classes it needs are cached."""
+    cached_analyzer.deep_seconds_per_class = 10
+
+    assert cached_analyzer.choose_profile(latency_target=15) == "quick"
+
+    cached_analyzer.run_spotbugs_analysis(str(tmp_path / "report.xml"), "deep")
+
+    assert cached_analyzer.choose_profile(latency_target=15) == "deep"
+
+
+def _write_classes(bin_dir, sizes):
+    """Create .class files of the given byte sizes, keyed by class name."""
+    for name, size in sizes.items():
+        path = bin_dir.joinpath(*name.split(".")).with_suffix(".class")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x" * size)
+
+
+def test_partition_classes_balances_packages_and_keeps_nested_classes(bug_analyzer, tmp_path):
+    """Test that shards balance bytecode size, split only oversized packages and keep nested classes together."""
+    bin_dir = tmp_path / "bin"
+    _write_classes(bin_dir, {
+        "big.A": 400, "big.A$1": 100, "big.B": 500,
+        "small.C": 250, "small.D": 250, "tiny.E": 500})
+    class_files = {name: str(bin_dir.joinpath(*name.split(".")).with_suffix(".class"))
+                   for name in ("big.A", "big.A$1", "big.B", "small.C", "small.D", "tiny.E")}
+
+    partitions = bug_analyzer.partition_classes(class_files, 3)
+
+    # Four 500-byte units: the split big package, small and tiny
+    assert sorted(sum(os.path.getsize(path) for path in partition.values())
+                  for partition in partitions) == [500, 500, 1000]
+    assert any({"big.A", "big.A$1"} <= set(partition) for partition in partitions)
+    assert any(set(partition) == {"small.C", "small.D"} for partition in partitions)
+    assert sorted(set().union(*partitions)) == sorted(class_files)
+
+
+def test_sharded_run_merges_and_deduplicates_shard_reports(bug_analyzer, tmp_path, monkeypatch):
+    """Test that shards run as separate JVMs with their own heap and merge into one report."""
+    bin_dir = tmp_path / "bin"
+    _write_classes(bin_dir, {"a.A": 10, "b.B": 10})
+    class_files = bug_analyzer._class_files()
+    bug_analyzer.shards = 2
+    bug_analyzer.shard_heap_mb = 512
+    calls = []
+
+    def fake_run_tool(tool_host, tool, args, fallback_command, **kwargs):
+        command = list(fallback_command)
+        calls.append((tool_host, command))
+        classes = command[command.index("-onlyAnalyze") + 1].split(",")
+        # Both shards report the same bug, as with findings on shared code
+        _write_report(Path(command[command.index("-output") + 1]),
+                      [(classes[0], "OWN", 1), ("a.A", "SHARED", 2)])
+
+    monkeypatch.setattr("app.services.BugAnalyzer.run_tool", fake_run_tool)
+    report = tmp_path / "report.xml"
+
+    bug_analyzer._run_sharded(class_files, str(report))
+
+    assert len(calls) == 2
+    assert all(host is None for host, _ in calls)
+    assert all(command[1:4] == ["-textui", "-maxHeap", "512"] for _, command in calls)
+    types = sorted(bug.get("type") for bug in ET.parse(report).getroot().findall("BugInstance"))
+    assert types == ["OWN", "OWN", "SHARED"]
+    assert not list(tmp_path.glob("report.xml.shard*"))
+
+
+def test_scope_args_compresses_large_class_sets_to_packages(bug_analyzer, tmp_path):
+    """Test that large runs name whole packages and target bin_dir instead of every class file."""
+    bin_dir = tmp_path / "bin"
+    _write_classes(bin_dir, {"a.A": 1, "a.B": 1, "a.sub.E": 1, "b.C": 1, "b.D": 1})
+    bug_analyzer.max_explicit_targets = 2
+    class_files = bug_analyzer._class_files()
+    # a.* must not pull in the unselected subpackage a.sub
+    del class_files["b.D"], class_files["a.sub.E"]
+
+    args = bug_analyzer._scope_args(class_files)
+
+    assert args == ["-onlyAnalyze", "a.*,b.C", "-auxclasspath", bug_analyzer.bin_dir, bug_analyzer.bin_dir]
+
+
+def test_scope_args_puts_other_modules_on_aux_classpath(bug_analyzer, tmp_path):
+    """Test that aux_classpath entries follow bin_dir on the aux classpath."""
+    bin_dir = tmp_path / "bin"
+    _write_classes(bin_dir, {"a.A": 1})
+    bug_analyzer.aux_classpath.append(str(tmp_path / "core" / "classes"))
+
+    args = bug_analyzer._scope_args(bug_analyzer._class_files())
+
+    assert args[3] == os.pathsep.join([bug_analyzer.bin_dir, str(tmp_path / "core" / "classes")])
@@ -0,0 +1,144 @@
+import os
+
+import pytest
+from app.services import BuildResultCache as cache_module
+from app.services.BuildResultCache import BuildResultCache, parse_compiler_errors
+
+
+@pytest.fixture
+def results(tmp_path):
+    """Create a BuildResultCache with room for two entries."""
+    return BuildResultCache(str(tmp_path / "cache"), max_entries=2)
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """Create a Maven source tree with one class and generated sources in target/."""
+    repo = tmp_path / "repo"
+    (repo / "src" / "pkg").mkdir(parents=True)
+    (repo / "pom.xml").write_text("<project/>")
+    (repo / "src" / "pkg" / "Foo.java").write_text("class Foo {}")
+    (repo / "target" / "generated-sources").mkdir(parents=True)
+    (repo / "target" / "generated-sources" / "Gen.java").write_text("class Gen {}")
+    return repo
+
+
+def test_fingerprint_follows_content_not_timestamps(results, tree, monkeypatch):
+    """Test that only edits change the fingerprint and unchanged stats skip hashing."""
+    first = results.fingerprint(str(tree))
+    hashed = []
+    monkeypatch.setattr(cache_module, "digest_file", lambda path: hashed.append(path) or "digest")
+    assert results.fingerprint(str(tree)) == first
+    assert hashed == []
+
+    monkeypatch.undo()
+    source = tree / "src" / "pkg" / "Foo.java"
+    os.utime(source, ns=(0, 0))
+    (tree / "target" / "generated-sources" / "Gen.java").write_text("class Gen { int x; }")
+    assert results.fingerprint(str(tree)) == first
+
+    source.write_text("class Foo { int x; }")
+    assert results.fingerprint(str(tree)) != first
+
+
+def test_successful_build_is_restored_after_bin_cleanup(results, tmp_path):
+    """Test that a cleaned bin_dir gets the stored classes back."""
+    bin_dir = tmp_path / "bin"
+    (bin_dir / "pkg").mkdir(parents=True)
+    (bin_dir / "pkg" / "Foo.class").write_bytes(b"foo")
+    results.store_success("k1", str(bin_dir), ["/other/classes"])
+    assert results.matches("k1", str(bin_dir))
+
+    (bin_dir / "pkg" / "Foo.class").unlink()
+    (bin_dir / "Stale.class").write_bytes(b"stale")
+    assert not results.matches("k1", str(bin_dir))
+    assert results.restore("k1", str(bin_dir))
+    assert sorted(os.listdir(bin_dir)) == ["pkg"]
+    assert results.matches("k1", str(bin_dir))
+    assert BuildResultCache(results.cache_dir).get("k1")["aux_classpath"] == ["/other/classes"]
+
+
+def test_restore_only_copies_classes_that_differ(results, tmp_path):
+    """Test that restoring over touched but identical classes changes nothing."""
+    bin_dir = tmp_path / "bin"
+    (bin_dir / "pkg").mkdir(parents=True)
+    (bin_dir / "pkg" / "Foo.class").write_bytes(b"foo")
+    (bin_dir / "pkg" / "Bar.class").write_bytes(b"bar")
+    results.store_success("k1", str(bin_dir))
+
+    os.utime(bin_dir / "pkg" / "Foo.class", ns=(0, 0))
+    assert not results.matches("k1", str(bin_dir))
+    assert results.restore("k1", str(bin_dir)) == 0
+
+    (bin_dir / "pkg" / "Bar.class").write_bytes(b"bar, edited")
+    (bin_dir / "Stale.class").write_bytes(b"stale")
+    assert results.restore("k1", str(bin_dir)) == 2
+    assert (bin_dir / "pkg" / "Bar.class").read_bytes() == b"bar"
+    assert not (bin_dir / "Stale.class").exists()
+
+
+def test_least_recently_used_entries_are_evicted(results, tmp_path):
+    """Test that entries beyond max_entries are dropped with their class copies."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    results.store_success("old", str(bin_dir))
+    results.store_failure("mid", [])
+    results.get("old")
+    results.store_failure("new", [])
+
+    assert results.get("mid") is None
+    assert results.get("old") is not None
+    assert results.restore("missing", str(bin_dir)) is None
+
+
+def test_file_digests_survive_a_restart(results, tree, monkeypatch):
+    """Test that a new instance does not re-read sources whose stat is unchanged."""
+    first = results.fingerprint(str(tree))
+    hashed = []
+    monkeypatch.setattr(cache_module, "digest_file", lambda path: hashed.append(path) or "digest")
+
+    assert BuildResultCache(results.cache_dir).fingerprint(str(tree)) == first
+    assert hashed == []
+
+
+def test_successes_store_only_new_class_files(results, tmp_path):
+    """Test that a build changing one class stores only that class, and eviction frees unused ones."""
+    bin_dir = tmp_path / "bin"
+    (bin_dir / "pkg").mkdir(parents=True)
+    (bin_dir / "pkg" / "Foo.class").write_bytes(b"foo")
+    (bin_dir / "pkg" / "Bar.class").write_bytes(b"bar")
+    results.store_success("k1", str(bin_dir))
+
+    def stored():
+        return sorted(f for _, _, files in os.walk(results.objects_dir) for f in files)
+
+    assert len(stored()) == 2
+    (bin_dir / "pkg" / "Foo.class").write_bytes(b"foo, edited")
+    results.store_success("k2", str(bin_dir))
+    assert len(stored()) == 3
+
+    assert results.restore("k1", str(bin_dir))
+    assert (bin_dir / "pkg" / "Foo.class").read_bytes() == b"foo"
+    assert results.matches("k1", str(bin_dir))
+
+    results.store_failure("k3", [])
+    results.get("k3")
+    results.store_failure("k4", [])
+    assert stored() == []
+
+
+def test_parse_compiler_errors_from_maven_and_javac(tmp_path):
+    """Test that javac and Maven error lines become diagnostics, each once."""
+    source = os.path.join(str(tmp_path), "src", "Foo.java")
+    lines = [
+        "[INFO] Compiling 3 source files",
+        f"[ERROR] {source}:[3,9] cannot find symbol",
+        f"{source}:7: error: ';' expected",
+        "[ERROR] Failed to execute goal org.apache.maven.plugins:maven-compiler-plugin",
+        f"[ERROR] {source}:[3,9] cannot find symbol",
+    ]
+
+    assert parse_compiler_errors(lines, str(tmp_path)) == [
+        {"file": "src/Foo.java", "line": 3, "column": 9, "message": "cannot find symbol"},
+        {"file": "src/Foo.java", "line": 7, "column": None, "message": "';' expected"},
+    ]
@@ -0,0 +1,327 @@
+import importlib
+import os
+import subprocess
+import sys
+
+import pytest
+from app.services.BuildSystemManager import BuildSystemManager
+
+# app.services re-exports the class under the module's name
+build_module = importlib.import_module("app.services.BuildSystemManager")
+
+
+@pytest.fixture
+def build_manager(tmp_path):
+    """Create a BuildSystemManager over a repository with one compiled source."""
+    repo = tmp_path / "repo"
+    (repo / "pkg").mkdir(parents=True)
+    (repo / "pkg" / "Foo.java").write_text("package pkg;\npublic class Foo {}\n")
+    (tmp_path / "bin" / "pkg").mkdir(parents=True)
+    manager = BuildSystemManager(str(repo), str(tmp_path / "bin"), "mock_spotbugs_path", str(repo))
+    manager._dependency_classpath = lambda project_dir, build_tool: []
+    return manager
+
+
+def _fake_javac(monkeypatch, outputs):
+    """Make javac write the given {relative path: bytes} class files into its -d directory."""
+    commands = []
+
+    def fake_run_tool(tool_host, tool, args, fallback_command, **kwargs):
+        commands.append(list(fallback_command))
+        out_dir = fallback_command[fallback_command.index("-d") + 1]
+        for rel_path, data in outputs.items():
+            path = os.path.join(out_dir, rel_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(data)
+        return subprocess.CompletedProcess(fallback_command, 0, "", "")
+
+    monkeypatch.setattr(build_module, "run_tool", fake_run_tool)
+    return commands
+
+
+def test_incremental_compile_replaces_outputs_and_removes_stale_classes(
+        build_manager, tmp_path, monkeypatch, class_file_bytes):
+    """Test that a body-only edit recompiles one file and drops classes it no longer produces."""
+    bin_pkg = tmp_path / "bin" / "pkg"
+    (bin_pkg / "Foo.class").write_bytes(class_file_bytes("pkg/Foo", methods=[(0x0001, "run", "()V")]))
+    (bin_pkg / "Foo$1.class").write_bytes(class_file_bytes("pkg/Foo$1", inner=(None, 0)))
+    (bin_pkg / "Bar.class").write_bytes(class_file_bytes("pkg/Bar"))
+    fresh = class_file_bytes("pkg/Foo", methods=[(0x0001, "run", "()V"), (0x0002, "helper", "()V")])
+    commands = _fake_javac(monkeypatch, {os.path.join("pkg", "Foo.class"): fresh})
+
+    assert build_manager.compile_java_files(
+        str(tmp_path / "repo" / "pkg" / "Foo.java"), build_manager.bin_dir)
+
+    assert len(commands) == 1 and commands[0][-1].endswith("Foo.java")
+    # Without a build tool the other sources are found like in the full javac build
+    assert commands[0][commands[0].index("-sourcepath") + 1] == build_manager.output_dir
+    assert (bin_pkg / "Foo.class").read_bytes() == fresh
+    assert not (bin_pkg / "Foo$1.class").exists()
+    assert (bin_pkg / "Bar.class").exists()
+
+
+def test_api_change_falls_back_to_full_build(build_manager, tmp_path, monkeypatch, class_file_bytes):
+    """Test that a changed public signature leaves bin_dir alone and runs the full build."""
+    old = class_file_bytes("pkg/Foo", methods=[(0x0001, "run", "()V")])
+    (tmp_path / "bin" / "pkg" / "Foo.class").write_bytes(old)
+    _fake_javac(monkeypatch, {os.path.join("pkg", "Foo.class"): class_file_bytes(
+        "pkg/Foo", methods=[(0x0001, "run", "(I)V")])})
+    full_builds = []
+    monkeypatch.setattr(build_manager, "_compile_with_javac",
+                        lambda file_path, bin_dir: full_builds.append(file_path) or True)
+
+    assert build_manager.compile_java_files(
+        str(tmp_path / "repo" / "pkg" / "Foo.java"), build_manager.bin_dir)
+
+    assert len(full_builds) == 1
+    assert (tmp_path / "bin" / "pkg" / "Foo.class").read_bytes() == old
+
+
+def test_never_compiled_file_needs_full_build(build_manager, tmp_path, monkeypatch):
+    """Test that incremental compilation needs earlier outputs to replace."""
+    commands = _fake_javac(monkeypatch, {})
+
+    assert build_manager._compile_incremental(
+        str(tmp_path / "repo" / "pkg" / "Foo.java"), build_manager.bin_dir,
+        build_manager.repo_root_dir, 'maven') is None
+    assert commands == []
+
+
+def test_maven_builds_without_clean_and_go_offline_once_resolved(build_manager, tmp_path, monkeypatch):
+    """Test that target/ is kept and builds after a resolving one run offline until a pom changes."""
+    repo = tmp_path / "repo"
+    (repo / "pom.xml").write_text("<project/>")
+    (repo / "target" / "classes").mkdir(parents=True)
+    monkeypatch.setattr(build_module.shutil, "which", lambda name: None)
+    commands = []
+
+    def fake_run_streaming(cmd, cwd, tag, reporter=None, **kwargs):
+        commands.append(cmd)
+        return (1 if "-o" in cmd and len(commands) == 4 else 0), []
+
+    monkeypatch.setattr(build_manager, "_run_streaming", fake_run_streaming)
+
+    assert build_manager._compile_maven_project(str(repo))
+    assert "clean" not in commands[0] and "-o" not in commands[0]
+    assert build_manager._compile_maven_project(str(repo))
+    assert "-o" in commands[1]
+
+    # New dependencies need one online build, and a failing offline build is retried online
+    (repo / "pom.xml").write_text("<project><dependencies/></project>")
+    assert build_manager._compile_maven_project(str(repo))
+    assert "-o" not in commands[2]
+    assert build_manager._compile_maven_project(str(repo))
+    assert "-o" in commands[3] and "-o" not in commands[4]
+
+
+def test_maven_prefers_daemon_when_installed(build_manager, tmp_path, monkeypatch):
+    """Test that mvnd is used when it is on the PATH."""
+    monkeypatch.setattr(build_module.shutil, "which", lambda name: "/usr/bin/mvnd")
+    assert build_manager._maven_command(str(tmp_path / "repo"), offline=True) == ["mvnd", "-B", "-ntp", "-o"]
+
+
+def test_gradle_builds_with_caches_and_copies_reported_class_dirs(build_manager, tmp_path, monkeypatch):
+    """Test that Gradle runs without clean, with its caches, and classes come from the dirs it reports."""
+    repo = tmp_path / "repo"
+    (repo / "build.gradle").write_text("apply plugin: 'java'")
+    classes = tmp_path / "out" / "classes"
+    (classes / "pkg").mkdir(parents=True)
+    (classes / "pkg" / "Foo.class").write_bytes(b"class")
+    commands = []
+
+    def fake_run_streaming(cmd, cwd, tag, reporter=None, **kwargs):
+        commands.append(cmd)
+        return 0, ["> Task :compileJava", f"{BuildSystemManager.GRADLE_CLASSES_DIR_PREFIX}{classes}"]
+
+    monkeypatch.setattr(build_manager, "_run_streaming", fake_run_streaming)
+
+    assert build_manager._compile_gradle_project(str(repo))
+    assert "clean" not in commands[0]
+    assert {"--daemon", "--build-cache", "--configuration-cache"} <= set(commands[0])
+    assert (tmp_path / "bin" / "pkg" / "Foo.class").read_bytes() == b"class"
+    init_script = commands[0][commands[0].index("--init-script") + 1]
+    assert build_manager.build_cache_dir.replace("\\", "/") in open(init_script).read()
+
+
+def test_gradle_without_configuration_cache_is_retried(build_manager, tmp_path, monkeypatch):
+    """Test that an old Gradle that rejects --configuration-cache is run again without it."""
+    repo = tmp_path / "repo"
+    (repo / "build.gradle").write_text("apply plugin: 'java'")
+    (repo / "build" / "classes" / "java" / "main").mkdir(parents=True)
+    commands = []
+
+    def fake_run_streaming(cmd, cwd, tag, reporter=None, **kwargs):
+        commands.append(cmd)
+        if "--configuration-cache" in cmd:
+            return 1, ["Unknown command-line option '--configuration-cache'."]
+        return 0, []
+
+    monkeypatch.setattr(build_manager, "_run_streaming", fake_run_streaming)
+
+    assert build_manager._compile_gradle_project(str(repo))
+    assert len(commands) == 2 and "--configuration-cache" not in commands[1]
+
+
+def test_multi_module_maven_builds_only_the_files_module(build_manager, tmp_path, monkeypatch):
+    """Test that -pl/-am selects the edited file's module and only its classes end up in bin."""
+    repo = tmp_path / "repo"
+    (repo / "pom.xml").write_text("<project><packaging>pom</packaging>"
+                                  "<modules><module>core</module><module>web</module></modules></project>")
+    for module in ("core", "web"):
+        (repo / module / "src" / "main" / "java").mkdir(parents=True)
+        (repo / module / "pom.xml").write_text("<project/>")
+    source = repo / "web" / "src" / "main" / "java" / "Web.java"
+    source.write_text("public class Web {}\n")
+    (tmp_path / "bin" / "Old.class").write_bytes(b"old")
+    build_manager.incremental = False
+    monkeypatch.setattr(build_module.shutil, "which", lambda name: None)
+    commands = []
+
+    def fake_run_streaming(cmd, cwd, tag, reporter=None, **kwargs):
+        commands.append(cmd)
+        for module in ("core", "web"):
+            classes = repo / module / "target" / "classes"
+            classes.mkdir(parents=True, exist_ok=True)
+            (classes / f"{module.title()}.class").write_bytes(b"class")
+        return 0, []
+
+    monkeypatch.setattr(build_manager, "_run_streaming", fake_run_streaming)
+
+    assert build_manager.compile_java_files(str(source), str(tmp_path / "bin"))
+    assert commands[0][-3:] == ["-pl", "web", "-am"]
+    assert sorted(os.listdir(tmp_path / "bin")) == ["Web.class"]
+    assert build_manager.aux_classpath == [str(repo / "core" / "target" / "classes")]
+    # The built module's sources come first when resolving report paths
+    assert build_manager.source_roots == [str(repo / m / "src" / "main" / "java") for m in ("web", "core")]
+    assert [m.name for m in build_manager.project_modules()] == ["core", "web"]
+
+
+def test_find_build_files_prefers_the_build_containing_the_file(build_manager, tmp_path):
+    """Test that separate builds below the root are all considered, not just the first one found."""
+    root = tmp_path / "mono"
+    (root / "a").mkdir(parents=True)
+    (root / "a" / "pom.xml").write_text("<project/>")
+    (root / "a" / "sub").mkdir()
+    (root / "a" / "sub" / "pom.xml").write_text("<project/>")
+    (root / "b").mkdir()
+    (root / "b" / "build.gradle").write_text("")
+
+    assert build_manager._find_build_files(str(root), str(root / "b" / "B.java")) == (str(root / "b"), "gradle")
+    assert build_manager._find_build_files(str(root), str(root / "a" / "sub" / "A.java")) == (
+        str(root / "a"), "maven")
+
+
+def test_unchanged_tree_is_not_compiled_twice(build_manager, tmp_path, monkeypatch):
+    """Test that a repeat build of the same tree reuses its classes, even after bin is cleaned."""
+    builds = []
+
+    def fake_run_build(file_path, bin_dir, project_dir, build_tool, reporter, module=None):
+        builds.append(file_path)
+        (tmp_path / "bin" / "pkg" / "Foo.class").write_bytes(b"class")
+        return True
+
+    monkeypatch.setattr(build_manager, "_run_build", fake_run_build)
+    source = str(tmp_path / "repo" / "pkg" / "Foo.java")
+
+    assert build_manager.compile_java_files(source, str(tmp_path / "bin"))
+    assert build_manager.outputs_changed
+    assert build_manager.compile_java_files(source, str(tmp_path / "bin"))
+    assert not build_manager.outputs_changed
+    (tmp_path / "bin" / "pkg" / "Foo.class").unlink()
+    assert build_manager.compile_java_files(source, str(tmp_path / "bin"))
+    assert build_manager.outputs_changed and (tmp_path / "bin" / "pkg" / "Foo.class").exists()
+    assert len(builds) == 1
+
+    (tmp_path / "repo" / "pkg" / "Foo.java").write_text("package pkg;\npublic class Foo { int x; }\n")
+    assert build_manager.compile_java_files(source, str(tmp_path / "bin"))
+    assert len(builds) == 2
+
+
+def test_switching_files_without_build_tool_keeps_their_classes(build_manager, tmp_path, monkeypatch):
+    """Test that javac builds of different files of one tree share its classes instead of replacing them."""
+    (tmp_path / "repo" / "pkg" / "Bar.java").write_text("package pkg;\npublic class Bar {}\n")
+    builds = []
+
+    def fake_run_build(file_path, bin_dir, project_dir, build_tool, reporter, module=None):
+        builds.append(os.path.basename(file_path))
+        name = os.path.basename(file_path).replace(".java", ".class")
+        (tmp_path / "bin" / "pkg" / name).write_bytes(name.encode())
+        return True
+
+    monkeypatch.setattr(build_manager, "_run_build", fake_run_build)
+    foo = str(tmp_path / "repo" / "pkg" / "Foo.java")
+    bar = str(tmp_path / "repo" / "pkg" / "Bar.java")
+
+    assert build_manager.compile_java_files(foo, str(tmp_path / "bin"))
+    assert build_manager.compile_java_files(bar, str(tmp_path / "bin"))
+    assert build_manager.compile_java_files(foo, str(tmp_path / "bin"))
+    assert not build_manager.outputs_changed
+    assert build_manager.compile_java_files(bar, str(tmp_path / "bin"))
+    assert not build_manager.outputs_changed
+    assert builds == ["Foo.java", "Bar.java"]
+    assert sorted(os.listdir(tmp_path / "bin" / "pkg")) == ["Bar.class", "Foo.class"]
+
+
+def test_broken_tree_fails_with_cached_errors(build_manager, tmp_path, monkeypatch):
+    """Test that a tree that did not compile fails again without building, with its errors."""
+    builds = []
+    source = str(tmp_path / "repo" / "pkg" / "Foo.java")
+
+    def fake_run_build(file_path, bin_dir, project_dir, build_tool, reporter, module=None):
+        builds.append(file_path)
+        build_manager._build_output.append(f"{source}:2: error: class, interface, or enum expected")
+        return False
+
+    monkeypatch.setattr(build_manager, "_run_build", fake_run_build)
+    events = []
+
+    assert not build_manager.compile_java_files(source, str(tmp_path / "bin"))
+    assert not build_manager.compile_java_files(
+        source, str(tmp_path / "bin"), progress=lambda event, data: events.append((event, data)))
+
+    assert len(builds) == 1
+    assert build_manager.last_errors == [{"file": "pkg/Foo.java", "line": 2, "column": None,
+                                          "message": "class, interface, or enum expected"}]
+    assert [data["cached"] for event, data in events if event == "compile_errors"] == [True]
+
+
+def test_incremental_compile_errors_are_not_remembered(build_manager, tmp_path, monkeypatch):
+    """Test that errors from an incremental compile, which may be due to stale classes, are not cached."""
+    source = str(tmp_path / "repo" / "pkg" / "Foo.java")
+    attempts = []
+
+    def fake_incremental(file_path, bin_dir, project_dir, build_tool):
+        attempts.append(file_path)
+        build_manager._build_output.append(f"{source}:2: error: cannot find symbol")
+        return False
+
+    monkeypatch.setattr(build_manager, "_compile_incremental", fake_incremental)
+
+    assert not build_manager.compile_java_files(source, str(tmp_path / "bin"))
+    assert build_manager.last_errors[0]["message"] == "cannot find symbol"
+    assert not build_manager.compile_java_files(source, str(tmp_path / "bin"))
+    assert len(attempts) == 2
+
+
+def test_find_dependent_files_uses_symbol_index(build_manager, tmp_path):
+    """Test that dependencies come from the symbol index and follow edits of the compiled file."""
+    repo = tmp_path / "repo"
+    (repo / "pkg" / "Bar.java").write_text("package pkg;\npublic class Bar {}\n")
+    foo = repo / "pkg" / "Foo.java"
+
+    assert build_manager._find_dependent_files(str(foo)) == []
+    foo.write_text("package pkg;\npublic class Foo { private Bar bar; }\n")
+    assert build_manager._find_dependent_files(str(foo)) == [str(repo / "pkg" / "Bar.java")]
+
+
+def test_run_streaming_reports_each_line(tmp_path):
+    """Test that build output is passed on line by line and its tail returned."""
+    events = []
+    code, tail = BuildSystemManager._run_streaming(
+        [sys.executable, "-c", "import sys; print('one'); print('two', file=sys.stderr); sys.exit(3)"],
+        str(tmp_path), "MAVEN", lambda event, data: events.append(data["line"]), keep_lines=1)
+
+    assert code == 3
+    assert sorted(events) == ["one", "two"]
+    assert len(tail) == 1
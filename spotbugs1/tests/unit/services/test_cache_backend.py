@@ -0,0 +1,97 @@
+import fnmatch
+import time
+import pytest
+from app.services.AnalysisCache import AnalysisCache
+from app.services.CacheBackend import (InMemoryCacheBackend, RedisCacheBackend,
+                                       create_cache_backend, deserialize_value,
+                                       serialize_value)
+from app.services.MetricAnalyzer import MetricsCache
+
+
+class StandInRedis:
+    """Minimal in-memory stand-in for the redis-py client calls the backend uses."""
+
+    def __init__(self):
+        self.data = {}
+        self.expiry = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+        self.expiry[key] = ex
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def scan_iter(self, match):
+        return [key.encode() for key in list(self.data) if fnmatch.fnmatch(key, match)]
+
+
+@pytest.fixture
+def redis_client():
+    """Provide a stand-in Redis client."""
+    return StandInRedis()
+
+
+def test_serialization_round_trip():
+    """Test that values survive compact serialization."""
+    value = {"bugs": [{"type": "NP", "line": "3"}], "metrics": {}}
+    assert deserialize_value(serialize_value(value)) == value
+
+
+def test_in_memory_ttl_expiry():
+    """Test that entries expire after their namespace TTL."""
+    backend = InMemoryCacheBackend(ttls={"short": 1})
+    backend.set("short", "k", [1])
+    backend.set("forever", "k", [2])
+
+    backend._namespaces["short"]["k"] = (
+        backend._namespaces["short"]["k"][0], time.time() - 1)
+
+    assert backend.get("short", "k") is None
+    assert backend.get("forever", "k") == [2]
+
+
+def test_in_memory_lru_bound():
+    """Test that a bounded namespace evicts the least recently used key."""
+    backend = InMemoryCacheBackend(max_entries={"ns": 1})
+    backend.set("ns", "a", 1)
+    backend.set("ns", "b", 2)
+
+    assert backend.keys("ns") == ["b"]
+
+
+def test_redis_backend_namespaces_and_ttls(redis_client):
+    """Test that the Redis backend prefixes keys and applies namespace TTLs."""
+    backend = RedisCacheBackend(redis_client, ttls={"ck_metrics": 60})
+    backend.set("ck_metrics", "Foo.java_original", [{"loc": "10"}])
+
+    assert redis_client.expiry["spotbugs1:ck_metrics:Foo.java_original"] == 60
+    assert backend.get("ck_metrics", "Foo.java_original") == [{"loc": "10"}]
+    assert backend.keys("ck_metrics") == ["Foo.java_original"]
+
+    backend.clear("ck_metrics")
+    assert backend.get("ck_metrics", "Foo.java_original") is None
+
+
+def test_caches_share_results_through_redis(redis_client):
+    """Test that two cache instances on one Redis server see each other's results."""
+    first = AnalysisCache(backend=RedisCacheBackend(redis_client))
+    second = AnalysisCache(backend=RedisCacheBackend(redis_client))
+    first.set("A.java", "pmd", "d", "c", [{"type": "X"}], {})
+
+    assert second.get("A.java", "pmd", "d", "c") == ([{"type": "X"}], {})
+
+    metrics = MetricsCache(RedisCacheBackend(redis_client), "ck_metrics")
+    metrics.set("A.java_original", [{"wmc": "2"}])
+    assert MetricsCache(RedisCacheBackend(redis_client),
+                        "ck_metrics").has("A.java_original")
+
+
+def test_create_cache_backend():
+    """Test backend selection from the configured URL."""
+    assert isinstance(create_cache_backend(None), InMemoryCacheBackend)
+    with pytest.raises(ValueError):
+        create_cache_backend("memcached://localhost")
@@ -122,6 +122,25 @@ TestClass.java,2,3,1,0,4,0.5,1,1,2,0.6,20,0.8,2,0.5,0.7,0.4,1,0.3,2.5,4,MEDIUM,0
             assert metrics[0]['assignmentsQty'] == '2'
 
 
+def test_run_ck_metrics_only_collects_its_own_output(base_analyzer, tmp_path, monkeypatch):
+    """Test that CK output is taken from next to output_dir, never from elsewhere under the cwd."""
+    output_dir = tmp_path / "workspace" / "ck_output"
+    output_dir.mkdir(parents=True)
+    stray = tmp_path / "other" / "ck_outputclass.csv"
+    stray.parent.mkdir()
+    stray.write_text("file,cbo\nOther.java,1")
+    monkeypatch.chdir(tmp_path)
+
+    with patch('subprocess.run', return_value=MagicMock(returncode=0)):
+        assert base_analyzer.run_ck_metrics(str(tmp_path), str(output_dir)) == []
+    assert stray.exists()
+
+    (tmp_path / "workspace" / "ck_outputclass.csv").write_text("file,cbo\nMine.java,2")
+    with patch('subprocess.run', return_value=MagicMock(returncode=0)):
+        metrics = base_analyzer.run_ck_metrics(str(tmp_path), str(output_dir))
+    assert [row["file"] for row in metrics] == ["Mine.java"]
+
+
 def test_parse_class_metrics(base_analyzer, tmp_path):
     """Test parsing class metrics from CSV file."""
     output_dir = tmp_path / "output"
@@ -0,0 +1,39 @@
+import pytest
+from app.services.ClassFileSignature import api_signature
+
+
+def _signature(tmp_path, data):
+    path = tmp_path / "C.class"
+    path.write_bytes(data)
+    return api_signature(str(path))
+
+
+def test_private_members_do_not_affect_signature(tmp_path, class_file_bytes):
+    """Test that only members other classes can use are part of the signature."""
+    base = _signature(tmp_path, class_file_bytes("pkg/C", methods=[(0x0001, "run", "()V")]))
+    with_private = _signature(tmp_path, class_file_bytes(
+        "pkg/C", methods=[(0x0001, "run", "()V"), (0x0002, "helper", "()V")]))
+    changed = _signature(tmp_path, class_file_bytes("pkg/C", methods=[(0x0001, "run", "(I)V")]))
+
+    assert base == with_private
+    assert base != changed
+
+
+def test_compile_time_constants_are_part_of_signature(tmp_path, class_file_bytes):
+    """Test that a changed constant value counts, since javac inlines it into callers."""
+    one = _signature(tmp_path, class_file_bytes("pkg/C", fields=[(0x0019, "MAX", "I", 1)]))
+    two = _signature(tmp_path, class_file_bytes("pkg/C", fields=[(0x0019, "MAX", "I", 2)]))
+    assert one != two
+
+
+def test_anonymous_and_private_nested_classes_have_no_signature(tmp_path, class_file_bytes):
+    """Test that classes nothing outside the source file can name are skipped."""
+    assert _signature(tmp_path, class_file_bytes("pkg/C$1", inner=(None, 0))) is None
+    assert _signature(tmp_path, class_file_bytes("pkg/C$Helper", inner=("pkg/C", 0x0002))) is None
+    assert _signature(tmp_path, class_file_bytes("pkg/C$Api", inner=("pkg/C", 0x0001))) is not None
+
+
+def test_rejects_non_class_files(tmp_path):
+    """Test that garbage is reported rather than parsed."""
+    with pytest.raises(ValueError):
+        _signature(tmp_path, b"not a class file")
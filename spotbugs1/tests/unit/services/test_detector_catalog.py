@@ -0,0 +1,41 @@
+import zipfile
+
+import pytest
+from app.services.DetectorCatalog import DetectorCatalog
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    """Create a DetectorCatalog over a jar with a small findbugs.xml."""
+    jar = tmp_path / "spotbugs.jar"
+    with zipfile.ZipFile(jar, "w") as archive:
+        archive.writestr("findbugs.xml", """<FindbugsPlugin>
+            <Detector class="edu.umd.cs.findbugs.detect.FindNullDeref"
+                      reports="NP_NULL_ON_SOME_PATH,NP_ALWAYS_NULL"/>
+            <Detector class="edu.umd.cs.findbugs.detect.FindNullDerefsInvolvingNonShortCircuitEvaluation"
+                      reports="NP_NULL_ON_SOME_PATH"/>
+            <Detector class="edu.umd.cs.findbugs.detect.DefaultEncodingDetector"
+                      reports="DM_DEFAULT_ENCODING"/>
+            <Detector class="edu.umd.cs.findbugs.detect.Methods" reports="" hidden="true"/>
+            <Detector class="edu.umd.cs.findbugs.detect.Noisy" reports="DM_NOISY" disabled="true"/>
+            <BugPattern type="NP_NULL_ON_SOME_PATH" abbrev="NP" category="CORRECTNESS"/>
+        </FindbugsPlugin>""")
+    return DetectorCatalog([str(jar), str(tmp_path / "missing.jar")])
+
+
+def test_reporting_detectors_for_pattern(catalog):
+    """Test that every detector reporting a pattern is found by simple name."""
+    assert catalog.reporting_detectors("NP_NULL_ON_SOME_PATH") == [
+        "FindNullDeref", "FindNullDerefsInvolvingNonShortCircuitEvaluation"]
+    assert catalog.reporting_detectors("dm_default_encoding") == ["DefaultEncodingDetector"]
+
+
+def test_detectors_for_adds_support_detectors(catalog):
+    """Test that non-reporting detectors are enabled alongside the reporting ones."""
+    assert catalog.detectors_for("DM_DEFAULT_ENCODING") == ["DefaultEncodingDetector", "Methods"]
+
+
+def test_unknown_and_disabled_patterns_have_no_detectors(catalog):
+    """Test that patterns without an enabled detector map to nothing."""
+    assert catalog.detectors_for("XX_UNKNOWN") == []
+    assert catalog.detectors_for("DM_NOISY") == []
@@ -0,0 +1,82 @@
+import json
+
+import pytest
+from app.services.JavaSymbolIndex import JavaSymbolIndex, parse_java_symbols
+
+
+@pytest.fixture
+def source_tree(tmp_path):
+    """Create sources in two packages that refer to each other in different ways."""
+    root = tmp_path / "src"
+    (root / "app").mkdir(parents=True)
+    (root / "model").mkdir()
+    (root / "model" / "User.java").write_text(
+        "package model;\npublic class User { public static class Id {} }\n")
+    (root / "model" / "Role.java").write_text("package model;\npublic enum Role { ADMIN }\n")
+    (root / "model" / "Unused.java").write_text("package model;\nclass Unused {}\n")
+    (root / "app" / "Helper.java").write_text("package app;\nclass Helper {}\n")
+    (root / "app" / "Main.java").write_text(
+        "package app;\n"
+        "import model.User.Id;\n"
+        "import model.*;\n"
+        "// Unused is only mentioned in a comment\n"
+        "class Main {\n"
+        "    Role role = Role.ADMIN;\n"
+        "    Helper helper = new Helper();\n"
+        "    String s = \"Unused\";\n"
+        "    Id id;\n"
+        "}\n")
+    return root
+
+
+def test_parse_java_symbols_ignores_comments_and_strings():
+    """Test that declarations, imports and type references come from code only."""
+    symbols = parse_java_symbols(
+        "package a.b;\nimport c.D;\nimport static e.F.g;\nimport h.*;\n"
+        "/* class Hidden */\npublic record Point(int x) { interface Shape {} String s = \"Quoted\"; }\n")
+
+    assert symbols["package"] == "a.b"
+    assert symbols["declares"] == ["Point", "Shape"]
+    assert symbols["imports"] == {"D": "c.D", "F": "e.F"}
+    assert symbols["on_demand"] == ["h"]
+    assert symbols["references"] == ["Point", "Shape", "String"]
+
+
+def test_dependencies_resolve_imports_same_package_and_wildcards(source_tree):
+    """Test that dependencies are the declaring files of the types a file uses."""
+    index = JavaSymbolIndex(str(source_tree))
+    assert index.refresh() == 5
+
+    assert index.dependencies(str(source_tree / "app" / "Main.java")) == [
+        str(source_tree / "app" / "Helper.java"),
+        str(source_tree / "model" / "Role.java"),
+        str(source_tree / "model" / "User.java"),
+    ]
+
+
+def test_refresh_reads_only_changed_files_and_drops_deleted_ones(source_tree, tmp_path):
+    """Test that the saved index is reused and only edits are re-read."""
+    index_path = tmp_path / "symbols.json"
+    JavaSymbolIndex(str(source_tree), str(index_path)).refresh()
+
+    index = JavaSymbolIndex(str(source_tree), str(index_path))
+    (source_tree / "app" / "Helper.java").unlink()
+    (source_tree / "model" / "Role.java").write_text("package model;\npublic enum Permission { READ }\n")
+    assert index.refresh() == 2
+    assert index.files_declaring("model", "Role") == []
+    assert index.files_declaring("model", "Permission") == [str(source_tree / "model" / "Role.java")]
+    assert index.dependencies(str(source_tree / "app" / "Main.java")) == [
+        str(source_tree / "model" / "User.java")]
+    assert "app/Helper.java" not in json.loads(index_path.read_text())["files"]
+
+
+def test_update_file_reindexes_one_edited_file(source_tree):
+    """Test that an edited file's new references are picked up without a full refresh."""
+    index = JavaSymbolIndex(str(source_tree))
+    index.refresh()
+    main = source_tree / "app" / "Main.java"
+    main.write_text("package app;\nclass Main { Helper helper; }\n")
+
+    assert index.update_file(str(main))
+    assert not index.update_file(str(main))
+    assert index.dependencies(str(main)) == [str(source_tree / "app" / "Helper.java")]
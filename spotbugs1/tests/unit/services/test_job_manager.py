@@ -0,0 +1,124 @@
+import threading
+import pytest
+from app.services.JobManager import Job, JobManager
+
+
+@pytest.fixture
+def job_manager():
+    """Create a JobManager and shut it down after the test."""
+    manager = JobManager(max_workers=2, retention_seconds=60)
+    yield manager
+    manager.shutdown()
+
+
+def test_submit_returns_before_work_finishes(job_manager):
+    """Test that submit hands back a job id while the work is still running."""
+    release = threading.Event()
+
+    def slow():
+        release.wait(5)
+        return {"ok": True}, 200
+
+    job = job_manager.submit("test", slow)
+
+    assert job.status in (Job.QUEUED, Job.RUNNING)
+    release.set()
+    finished = job_manager.wait(job.id, timeout=5)
+    assert finished.status == Job.SUCCEEDED
+    assert finished.result == {"ok": True}
+    assert finished.status_code == 200
+
+
+def test_failed_job_reports_error(job_manager):
+    """Test that an exception in the job is captured as a 500 result."""
+    def broken():
+        raise RuntimeError("boom")
+
+    job = job_manager.wait(job_manager.submit("test", broken).id, timeout=5)
+
+    assert job.status == Job.FAILED
+    assert job.status_code == 500
+    assert job.result == {"error": "boom"}
+
+
+def test_purge_expired(job_manager):
+    """Test that finished jobs are dropped after the retention period."""
+    job = job_manager.submit("test", lambda: ({}, 200))
+    job_manager.wait(job.id, timeout=5)
+    job.finished_at -= 120
+
+    assert job_manager.purge_expired() == 1
+    assert job_manager.get(job.id) is None
+
+
+def test_unknown_job(job_manager):
+    """Test lookups for ids that were never submitted."""
+    assert job_manager.get("missing") is None
+    assert job_manager.wait("missing", timeout=0.01) is None
+
+
+def test_iter_events_streams_progress_then_result(job_manager):
+    """Test that progress events are yielded in order and end with the result."""
+    def staged(progress=None):
+        progress("stage_started", {"stage": "pmd"})
+        progress("partial_results", {"tool": "pmd", "bugs": []})
+        return {"ok": True}, 200
+
+    job = job_manager.submit("test", staged, with_progress=True)
+    events = [e for e in job_manager.iter_events(job.id, heartbeat_seconds=1) if e]
+
+    assert [e["event"] for e in events] == [
+        "stage_started", "partial_results", "result"]
+    assert [e["id"] for e in events] == [0, 1, 2]
+    assert events[-1]["data"]["result"] == {"ok": True}
+
+
+def test_iter_events_heartbeat_and_resume(job_manager):
+    """Test that idle streams yield None and a resumed stream skips seen events."""
+    release = threading.Event()
+
+    def slow(progress=None):
+        progress("stage_started", {"stage": "spotbugs"})
+        release.wait(5)
+        return {}, 200
+
+    job = job_manager.submit("test", slow, with_progress=True)
+    stream = job_manager.iter_events(job.id, heartbeat_seconds=0.05)
+    assert next(stream)["event"] == "stage_started"
+    assert next(stream) is None
+    release.set()
+    job_manager.wait(job.id, timeout=5)
+
+    resumed = [e["event"] for e in job_manager.iter_events(job.id, start=1)]
+    assert resumed == ["result"]
+
+
+def test_jobs_are_visible_to_other_workers_through_the_store(tmp_path):
+    """Test that a manager sharing the store can poll and stream another's job."""
+    from app.services.AnalysisStore import AnalysisStore
+    store = AnalysisStore(str(tmp_path / "analysis.sqlite3"))
+    runner = JobManager(max_workers=1, retention_seconds=60, store=store)
+    other = JobManager(max_workers=1, retention_seconds=60, store=store, poll_seconds=0.01)
+    release = threading.Event()
+
+    def staged(progress=None):
+        progress("stage_started", {"stage": "pmd"})
+        release.wait(5)
+        return {"ok": True}, 200
+
+    try:
+        job = runner.submit("test", staged, with_progress=True)
+        assert other.get(job.id).status in (Job.QUEUED, Job.RUNNING)
+        assert not other.wait(job.id, timeout=0.05).done
+        release.set()
+
+        finished = other.wait(job.id, timeout=5)
+        assert finished.status == Job.SUCCEEDED
+        assert finished.result == {"ok": True}
+        assert finished.status_code == 200
+        events = [e for e in other.iter_events(job.id, heartbeat_seconds=1) if e]
+        assert [e["event"] for e in events] == ["stage_started", "result"]
+        assert other.get("missing") is None
+    finally:
+        runner.shutdown()
+        other.shutdown()
@@ -0,0 +1,233 @@
+import os
+import subprocess
+import zipfile
+
+import pytest
+from app.services.PMDAnalyzer import PMDAnalyzer
+
+
+@pytest.fixture
+def pmd_analyzer(tmp_path):
+    """Create a PMDAnalyzer instance for testing."""
+    return PMDAnalyzer("mock_pmd_path", str(tmp_path / "rules.xml"), str(tmp_path / "pmd.xml"))
+
+
+def test_parse_pmd_index_groups_violations_by_file(pmd_analyzer, tmp_path):
+    """Test that violations are grouped per file under the report namespace."""
+    report = tmp_path / "pmd.xml"
+    report.write_text(
+        '<pmd xmlns="http://pmd.sourceforge.net/report/2.0.0">'
+        '<file name="/repo/pkg/Foo.java">'
+        '<violation beginline="3" rule="UnusedLocalVariable" ruleset="Best Practices" priority="3">'
+        ' Avoid unused local variables </violation>'
+        '<violation beginline="9" rule="EmptyCatchBlock" ruleset="Error Prone" priority="2"/>'
+        '</file>'
+        '<file name="/repo/pkg/Bar.java">'
+        '<violation beginline="1" rule="UnusedImports" ruleset="Best Practices" priority="4"/>'
+        '</file></pmd>')
+
+    index = pmd_analyzer.parse_pmd_index(str(report))
+
+    assert set(index) == {"repo/pkg/foo.java", "repo/pkg/bar.java"}
+    foo = index["repo/pkg/foo.java"]
+    assert [(v["line"], v["type"]) for v in foo] == [(3, "UnusedLocalVariable"), (9, "EmptyCatchBlock")]
+    assert foo[0]["description"] == "Avoid unused local variables"
+    assert foo[1]["description"] == "No message"
+    assert len(pmd_analyzer.parse_pmd_xml(str(report))) == 3
+
+
+def test_parse_pmd_index_missing_report(pmd_analyzer, tmp_path):
+    """Test that a missing report yields no issues."""
+    assert pmd_analyzer.parse_pmd_index(str(tmp_path / "none.xml")) == {}
+
+
+def test_parse_pmd_index_truncated_report(pmd_analyzer, tmp_path):
+    """Test that a truncated report is reported as unreadable rather than as a partial index."""
+    report = tmp_path / "pmd.xml"
+    report.write_text('<pmd><file name="/repo/A.java"><violation beginline="1" rule="R"/></file><file name=')
+
+    assert pmd_analyzer.parse_pmd_index(str(report)) is None
+    with pytest.raises(RuntimeError):
+        pmd_analyzer.parse_pmd_xml(str(report))
+
+
+def test_analyze_repository_reruns_on_unreadable_report(pmd_analyzer, tmp_path, monkeypatch):
+    """Test that an unreadable report triggers one more run and is never indexed."""
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "A.java").write_text("class A {}")
+    report = tmp_path / "repo.xml"
+    runs = []
+
+    def fake_run_tool(tool_host, tool, args, fallback_command, **kwargs):
+        runs.append(fallback_command)
+        report.write_text("<pmd><file name=")
+        return subprocess.CompletedProcess(fallback_command, 0)
+
+    monkeypatch.setattr("app.services.PMDAnalyzer.run_tool", fake_run_tool)
+
+    with pytest.raises(RuntimeError):
+        pmd_analyzer.analyze_repository(str(src), ["A.java"], str(report))
+    assert len(runs) == 2
+    with pytest.raises(RuntimeError):
+        pmd_analyzer.analyze_repository(str(src), ["A.java"], str(report))
+    assert len(runs) == 4
+
+
+def _write_ruleset(path, rules):
+    path.write_text(
+        '<ruleset name="Test" xmlns="http://pmd.sourceforge.net/ruleset/2.0.0">'
+        f'{rules}</ruleset>')
+
+
+def test_write_rule_ruleset_keeps_rule_configuration(pmd_analyzer, tmp_path):
+    """Test that a rule referenced on its own is copied with its properties."""
+    _write_ruleset(tmp_path / "rules.xml",
+                   '<rule ref="category/java/errorprone.xml/EmptyCatchBlock"/>'
+                   '<rule ref="category/java/design.xml/ExcessiveParameterList">'
+                   '<properties><property name="minimum" value="5"/></properties></rule>')
+
+    assert pmd_analyzer.write_rule_ruleset("ExcessiveParameterList", str(tmp_path / "one.xml"))
+
+    ruleset = (tmp_path / "one.xml").read_text()
+    assert "category/java/design.xml/ExcessiveParameterList" in ruleset
+    assert 'name="minimum" value="5"' in ruleset
+    assert "EmptyCatchBlock" not in ruleset
+
+
+def test_write_rule_ruleset_resolves_category_references(pmd_analyzer, tmp_path):
+    """Test that a rule enabled through a whole category gets its own reference."""
+    jar = tmp_path / "pmd-java.jar"
+    with zipfile.ZipFile(jar, "w") as archive:
+        archive.writestr("category/java/bestpractices.xml",
+                         '<ruleset xmlns="http://pmd.sourceforge.net/ruleset/2.0.0">'
+                         '<rule name="UnusedLocalVariable"/><rule name="UnusedPrivateField"/>'
+                         '</ruleset>')
+    pmd_analyzer.classpath = [str(jar)]
+    _write_ruleset(tmp_path / "rules.xml",
+                   '<rule ref="category/java/bestpractices.xml">'
+                   '<exclude name="UnusedPrivateField"/></rule>')
+
+    assert pmd_analyzer.write_rule_ruleset("UnusedLocalVariable", str(tmp_path / "one.xml"))
+    assert "category/java/bestpractices.xml/UnusedLocalVariable" in (tmp_path / "one.xml").read_text()
+    assert not pmd_analyzer.write_rule_ruleset("UnusedPrivateField", str(tmp_path / "two.xml"))
+    assert not pmd_analyzer.write_rule_ruleset("EmptyCatchBlock", str(tmp_path / "two.xml"))
+    assert not (tmp_path / "two.xml").exists()
+
+
+def test_analyze_repository_reruns_only_changed_files(pmd_analyzer, tmp_path, monkeypatch):
+    """Test that one threaded run covers the repository and later runs only changed files."""
+    src = tmp_path / "src"
+    (src / "pkg").mkdir(parents=True)
+    for name in ("A", "B"):
+        (src / "pkg" / f"{name}.java").write_text(f"class {name} {{}}")
+    report = tmp_path / "repo.xml"
+    runs = []
+
+    def fake_run_tool(tool_host, tool, args, fallback_command, **kwargs):
+        file_list = fallback_command[fallback_command.index("--file-list") + 1]
+        with open(file_list) as f:
+            files = f.read().split()
+        runs.append((files, fallback_command[fallback_command.index("--threads") + 1]))
+        report.write_text("<pmd>" + "".join(
+            f'<file name="{path}"><violation beginline="1" rule="R" ruleset="S" priority="3"/></file>'
+            for path in files) + "</pmd>")
+        return subprocess.CompletedProcess(fallback_command, 4)
+
+    monkeypatch.setattr("app.services.PMDAnalyzer.run_tool", fake_run_tool)
+    files = [os.path.join("pkg", "A.java"), os.path.join("pkg", "B.java")]
+
+    index = pmd_analyzer.analyze_repository(str(src), files, str(report))
+    assert len(runs) == 1 and len(runs[0][0]) == 2
+    assert runs[0][1] == pmd_analyzer.threads
+    assert [v["type"] for v in index["pkg/a.java"]] == ["R"]
+
+    pmd_analyzer.analyze_repository(str(src), files, str(report))
+    assert len(runs) == 1
+
+    (src / "pkg" / "B.java").write_text("class B { int unused; }")
+    index = pmd_analyzer.analyze_repository(str(src), files[1:], str(report))
+    assert runs[1][0] == [str(src / "pkg" / "B.java")]
+    assert set(index) == {"pkg/b.java"}
+
+
+def test_pmd_cache_persists_per_ruleset_and_counts_hits(tmp_path, monkeypatch):
+    """Test that runs share a cache file that survives restarts and is dropped on ruleset edits."""
+    ruleset = tmp_path / "rules.xml"
+    _write_ruleset(ruleset, '<rule ref="category/java/errorprone.xml/EmptyCatchBlock"/>')
+    source = tmp_path / "A.java"
+    source.write_text("class A {}")
+    cache_args = []
+
+    def fake_run_tool(tool_host, tool, args, fallback_command, **kwargs):
+        cache_path = fallback_command[fallback_command.index("--cache") + 1]
+        cache_args.append(cache_path)
+        open(cache_path, "wb").close()
+        return subprocess.CompletedProcess(fallback_command, 0)
+
+    monkeypatch.setattr("app.services.PMDAnalyzer.run_tool", fake_run_tool)
+
+    def new_analyzer():
+        return PMDAnalyzer("mock_pmd_path", str(ruleset), str(tmp_path / "pmd.xml"),
+                           cache_dir=str(tmp_path / "cache"))
+
+    first = new_analyzer()
+    first.run_pmd_analysis(str(source), str(tmp_path / "out.xml"))
+    assert first.cache_stats == {"runs": 1, "hits": 0, "misses": 1}
+
+    # A restarted process reuses the cache file
+    second = new_analyzer()
+    second.run_pmd_analysis(str(source), str(tmp_path / "out.xml"))
+    assert second.cache_stats == {"runs": 1, "hits": 1, "misses": 0}
+    assert cache_args[0] == cache_args[1]
+
+    # A single-rule ruleset gets its own cache file
+    second.run_pmd_analysis(str(source), str(tmp_path / "out.xml"), str(tmp_path / "one.xml"))
+    assert cache_args[2] != cache_args[0]
+
+    _write_ruleset(ruleset, '<rule ref="category/java/design.xml/ExcessiveParameterList"/>')
+    third = new_analyzer()
+    third.run_pmd_analysis(str(source), str(tmp_path / "out.xml"))
+    assert third.cache_stats["hits"] == 0
+    assert not os.path.exists(cache_args[0])
+
+
+def test_partial_runs_do_not_shrink_the_repository_cache(tmp_path, monkeypatch):
+    """Test that runs over some files use their own cache and only count files PMD kept as hits."""
+    ruleset = tmp_path / "rules.xml"
+    _write_ruleset(ruleset, '<rule ref="category/java/errorprone.xml/EmptyCatchBlock"/>')
+    src = tmp_path / "src"
+    src.mkdir()
+    for name in ("A", "B"):
+        (src / f"{name}.java").write_text(f"class {name} {{}}")
+    cache_args = []
+
+    def fake_run_tool(tool_host, tool, args, fallback_command, **kwargs):
+        cache_path = fallback_command[fallback_command.index("--cache") + 1]
+        cache_args.append(cache_path)
+        open(cache_path, "wb").close()
+        report = fallback_command[fallback_command.index("--report-file") + 1]
+        with open(report, "w") as f:
+            f.write('<pmd xmlns="http://pmd.sourceforge.net/report/2.0.0"/>')
+        return subprocess.CompletedProcess(fallback_command, 0)
+
+    monkeypatch.setattr("app.services.PMDAnalyzer.run_tool", fake_run_tool)
+    def new_analyzer():
+        return PMDAnalyzer("mock_pmd_path", str(ruleset), str(tmp_path / "pmd.xml"),
+                           cache_dir=str(tmp_path / "cache"))
+
+    analyzer = new_analyzer()
+    analyzer.analyze_repository(str(src), ["A.java", "B.java"], str(tmp_path / "repo.xml"))
+    (src / "C.java").write_text("class C {}")
+    analyzer.analyze_repository(str(src), ["A.java", "B.java", "C.java"], str(tmp_path / "repo.xml"))
+    analyzer.run_pmd_analysis(str(src / "B.java"), str(tmp_path / "out.xml"))
+    assert cache_args[1] == cache_args[2] != cache_args[0]
+
+    # The partial cache now only holds B.java, so C.java is analyzed again
+    analyzer.run_pmd_analysis(str(src / "C.java"), str(tmp_path / "out.xml"))
+    assert analyzer.cache_stats == {"runs": 4, "hits": 0, "misses": 5}
+
+    # A restarted process still finds the files of the last whole-repository run
+    restarted = new_analyzer()
+    restarted.analyze_repository(str(src), ["A.java", "B.java", "C.java"], str(tmp_path / "repo.xml"))
+    assert restarted.cache_stats == {"runs": 1, "hits": 2, "misses": 1}
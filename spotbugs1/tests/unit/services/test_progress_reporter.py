@@ -0,0 +1,63 @@
+import pytest
+from app.services.ProgressReporter import ProgressReporter, as_reporter
+
+
+@pytest.fixture
+def events():
+    """Collect (event_type, data) pairs sent to a listener."""
+    return []
+
+
+@pytest.fixture
+def reporter(events):
+    return ProgressReporter(lambda event_type, data: events.append((event_type, data)))
+
+
+def test_stage_reports_start_and_duration(reporter, events):
+    """Test that a stage emits start and finish events with timings."""
+    with reporter.stage("compile", filename="Foo.java"):
+        pass
+
+    assert [e[0] for e in events] == ["stage_started", "stage_finished"]
+    assert events[0][1]["filename"] == "Foo.java"
+    assert events[1][1]["stage"] == "compile"
+    assert events[1][1]["duration"] >= 0
+    assert "elapsed" in events[1][1]
+
+
+def test_stage_failure_is_reported_and_reraised(reporter, events):
+    """Test that an exception inside a stage emits stage_failed and propagates."""
+    with pytest.raises(RuntimeError):
+        with reporter.stage("spotbugs"):
+            raise RuntimeError("no classes")
+
+    assert events[-1][0] == "stage_failed"
+    assert events[-1][1]["error"] == "no classes"
+
+
+def test_partial_results(reporter, events):
+    """Test that partial results carry the tool, file and bug count."""
+    reporter.partial_results("pmd", "Foo.java", [{"line": 3}])
+
+    event_type, data = events[0]
+    assert event_type == "partial_results"
+    assert data["tool"] == "pmd"
+    assert data["num_bugs"] == 1
+
+
+def test_without_listener_and_broken_listener():
+    """Test that a missing or failing listener never breaks the pipeline."""
+    with ProgressReporter().stage("ck"):
+        pass
+
+    def broken(event_type, data):
+        raise ValueError("closed")
+
+    ProgressReporter(broken).emit("stage_started", stage="ck")
+
+
+def test_as_reporter(reporter):
+    """Test that as_reporter reuses reporters and wraps plain callables."""
+    assert as_reporter(reporter) is reporter
+    assert as_reporter(None).listener is None
+    assert as_reporter(print).listener is print
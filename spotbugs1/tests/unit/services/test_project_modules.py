@@ -0,0 +1,59 @@
+import os
+
+from app.services.ProjectModules import ProjectModules
+
+
+def _pom(path, packaging="jar", modules=(), build=""):
+    path.mkdir(parents=True, exist_ok=True)
+    module_list = "".join(f"<module>{m}</module>" for m in modules)
+    (path / "pom.xml").write_text(
+        f'<project xmlns="http://maven.apache.org/POM/4.0.0"><packaging>{packaging}</packaging>'
+        f"<modules>{module_list}</modules>{build}</project>")
+
+
+def test_maven_modules_skip_aggregators_and_follow_nesting(tmp_path):
+    """Test that nested <modules> are followed and pom-packaged aggregators are not modules."""
+    _pom(tmp_path, "pom", ["core", "services"])
+    _pom(tmp_path / "core", build="<build><directory>out</directory>"
+                                  "<sourceDirectory>src/java</sourceDirectory></build>")
+    _pom(tmp_path / "services", "pom", ["api/pom.xml"])
+    _pom(tmp_path / "services" / "api")
+
+    modules = ProjectModules(str(tmp_path), "maven")
+
+    assert [m.name for m in modules.modules] == ["core", "services/api"]
+    assert modules.modules[0].output_dirs == [os.path.join(str(tmp_path / "core"), "out", "classes")]
+    assert modules.modules[0].source_dirs == [os.path.join(str(tmp_path / "core"), "src", "java")]
+    assert modules.modules[1].source_dirs == [str(tmp_path / "services" / "api" / "src" / "main" / "java")]
+    source = tmp_path / "services" / "api" / "src" / "main" / "java" / "Api.java"
+    assert modules.module_for(str(source)).name == "services/api"
+    assert modules.module_for(str(tmp_path / "Tool.java")) is None
+
+
+def test_gradle_modules_from_settings_includes(tmp_path):
+    """Test that include statements and projectDir overrides become Gradle project paths."""
+    (tmp_path / "settings.gradle").write_text(
+        "rootProject.name = 'demo'\n"
+        "// include 'ignored'\n"
+        "include 'app',\n"
+        "        ':lib:util'\n"
+        "include(':legacy')\n"
+        "project(':legacy').projectDir = file('old/legacy')\n")
+
+    modules = ProjectModules(str(tmp_path), "gradle")
+
+    assert [m.name for m in modules.modules] == [":app", ":lib:util", ":legacy"]
+    assert modules.modules[1].path == str(tmp_path / "lib" / "util")
+    assert modules.module_for(str(tmp_path / "old" / "legacy" / "src" / "A.java")).name == ":legacy"
+
+
+def test_other_output_dirs_lists_existing_dirs_of_other_modules(tmp_path):
+    """Test that only other modules' compiled output directories are returned."""
+    (tmp_path / "settings.gradle").write_text("include 'a', 'b', 'c'\n")
+    for name in ("a", "b"):
+        (tmp_path / name / "build" / "classes" / "java" / "main").mkdir(parents=True)
+
+    modules = ProjectModules(str(tmp_path), "gradle")
+    module_a = modules.module_for(str(tmp_path / "a" / "A.java"))
+
+    assert modules.other_output_dirs(module_a) == [str(tmp_path / "b" / "build" / "classes" / "java" / "main")]
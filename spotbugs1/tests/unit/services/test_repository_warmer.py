@@ -0,0 +1,91 @@
+from unittest.mock import MagicMock
+import pytest
+from app.services.MetricAnalyzer import CKMetricsAnalyzer
+from app.services.ProjectModules import BuildModule
+from app.services.RepositoryWarmer import RepositoryWarmer
+
+
+CK_ROWS = [
+    {"file": "/repo/Simple.java", "class": "Simple", "type": "class",
+     "wmc": "1", "cbo": "0", "loc": "10"},
+    {"file": "/repo/Complex.java", "class": "Complex", "type": "class",
+     "wmc": "40", "cbo": "7", "loc": "600"},
+    {"file": "/repo/Coupled.java", "class": "Coupled", "type": "class",
+     "wmc": "40", "cbo": "9", "loc": "100"},
+]
+
+
+@pytest.fixture
+def mock_facade():
+    """Create a facade stand-in whose analyses always succeed."""
+    facade = MagicMock()
+    facade.output_dir = "/repo"
+    facade.bin_dir = "/bin"
+    facade.ck_metrics = CKMetricsAnalyzer()
+    facade.ck_metrics.run_ck_metrics = MagicMock(return_value=CK_ROWS)
+    facade.build_system_manager.compile_java_files.return_value = True
+    facade.analyze_file.return_value = ("class X {}", [], 0, [])
+    return facade
+
+
+def test_prioritize_by_complexity(mock_facade):
+    """Test that files are ordered by wmc, then cbo, then loc."""
+    warmer = RepositoryWarmer(mock_facade)
+
+    ordered = warmer.prioritize(
+        ["Simple.java", "Complex.java", "Coupled.java", "Unknown.java"], CK_ROWS)
+
+    assert ordered == ["Coupled.java", "Complex.java",
+                       "Simple.java", "Unknown.java"]
+
+
+def test_warmup_compiles_once_and_warms_every_file(mock_facade):
+    """Test a full warm-up run in the background thread."""
+    warmer = RepositoryWarmer(mock_facade, tools=("spotbugs", "pmd"))
+
+    warmer.start(["Simple.java", "Complex.java"])
+    warmer._thread.join(5)
+    status = warmer.status()
+
+    assert status["state"] == "done"
+    assert status["warm_files"] == ["Complex.java", "Simple.java"]
+    assert mock_facade.build_system_manager.compile_java_files.call_count == 1
+    assert mock_facade._get_spotbugs_index.call_count == 1
+    assert mock_facade._get_pmd_index.call_count == 1
+    assert mock_facade.analyze_file.call_count == 4
+    assert mock_facade.ck_metrics.metrics_cache.has("Complex.java_original")
+
+
+def test_failed_file_is_reported(mock_facade):
+    """Test that a file whose analysis fails is marked as failed."""
+    mock_facade.analyze_file.return_value = ("", [], 0, [])
+    warmer = RepositoryWarmer(mock_facade, tools=("pmd",))
+
+    warmer.start(["Simple.java"])
+    warmer._thread.join(5)
+
+    assert warmer.status()["files"] == [
+        {"filename": "Simple.java", "status": "failed"}]
+
+
+def test_warmup_holds_its_workspace_until_done(mock_facade):
+    """Test that the hold taken at start is released when the warm-up ends."""
+    released = []
+    warmer = RepositoryWarmer(mock_facade, hold=lambda: lambda: released.append(True))
+
+    warmer.start(["Simple.java"])
+    warmer._thread.join(5)
+
+    assert released == [True]
+
+
+def test_group_by_module_keeps_module_files_together(mock_facade):
+    """Test that files of one module are warmed together, modules ordered by their most complex file."""
+    mock_facade.build_system_manager.project_modules.return_value = [
+        BuildModule("core", "/repo/core", []), BuildModule("api", "/repo/api", [])]
+    warmer = RepositoryWarmer(mock_facade)
+
+    ordered = warmer.group_by_module(
+        ["core/A.java", "api/B.java", "core/C.java", "Tool.java", "api/D.java"])
+
+    assert ordered == ["core/A.java", "core/C.java", "api/B.java", "api/D.java", "Tool.java"]
@@ -0,0 +1,83 @@
+import threading
+import time
+from app.services.SingleFlight import SingleFlight
+
+
+def _run_concurrently(count, target):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def _wait_for_waiters(flight, key, count):
+    deadline = time.time() + 5
+    while flight._calls[key].waiters < count and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def test_concurrent_callers_share_one_run():
+    """Test that callers arriving during a run wait for it instead of running again."""
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+    results = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "report"
+
+    leader = _run_concurrently(1, lambda: results.append(flight.do("k", compute)))
+    started.wait(5)
+    followers = _run_concurrently(3, lambda: results.append(flight.do("k", compute)))
+    _wait_for_waiters(flight, "k", 3)
+    release.set()
+    for thread in leader + followers:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert [r[0] for r in results] == ["report"] * 4
+    assert sum(1 for r in results if r[1]) == 4
+    assert not flight.in_flight("k")
+
+
+def test_different_keys_run_independently():
+    """Test that only identical keys are coalesced."""
+    flight = SingleFlight()
+
+    assert flight.do("a", lambda: 1) == (1, False)
+    assert flight.do("b", lambda: 2) == (2, False)
+    assert flight.do("a", lambda: 3) == (3, False)
+
+
+def test_errors_reach_every_waiter():
+    """Test that an exception in the shared run is raised to all callers."""
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    errors = []
+
+    def broken():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("jvm crashed")
+
+    def call():
+        try:
+            flight.do("k", broken)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    leader = _run_concurrently(1, call)
+    started.wait(5)
+    follower = _run_concurrently(1, call)
+    _wait_for_waiters(flight, "k", 1)
+    release.set()
+    for thread in leader + follower:
+        thread.join(5)
+
+    assert errors == ["jvm crashed", "jvm crashed"]
+    assert not flight.in_flight("k")
@@ -0,0 +1,113 @@
+import subprocess
+import sys
+import pytest
+from app.services.ToolHostClient import ToolHostClient, ToolHostUnavailable, java_major_version, run_tool
+
+FAKE_HOST = '''
+import json, os, sys, time
+print(json.dumps({"ready": True}), flush=True)
+for line in sys.stdin:
+    request = json.loads(line)
+    if request["tool"] == "crash":
+        sys.exit(3)
+    if request["tool"] == "hang":
+        time.sleep(30)
+    print(json.dumps({"id": request["id"], "exit": 0, "stdout": str(os.getpid()),
+                      "stderr": " ".join(request["args"]), "error": None}), flush=True)
+'''
+
+
+@pytest.fixture
+def host_script(tmp_path):
+    """A stand-in for ToolHost.java that speaks the same line protocol."""
+    path = tmp_path / "fake_host.py"
+    path.write_text(FAKE_HOST)
+    return str(path)
+
+
+@pytest.fixture
+def client(host_script):
+    client = ToolHostClient(host_command=[sys.executable, host_script], max_jobs=3)
+    yield client
+    client.close()
+
+
+def test_runs_jobs_in_one_process(client):
+    """Test that consecutive jobs reuse the same host process."""
+    first = client.run("pmd", ["check", "-f", "xml"], classpath=["pmd.jar"])
+    second = client.run("pmd", ["check"])
+
+    assert first.returncode == 0
+    assert first.stderr == "check -f xml"
+    assert first.stdout == second.stdout
+
+
+def test_recycles_after_max_jobs(client):
+    """Test that the host is replaced once it has run max_jobs jobs."""
+    pids = [client.run("ck", []).stdout for _ in range(4)]
+
+    assert len(set(pids[:3])) == 1
+    assert pids[3] != pids[0]
+
+
+def test_restarts_after_crash(client):
+    """Test that a crash fails the job and the next job gets a fresh host."""
+    before = client.run("ck", []).stdout
+    with pytest.raises(ToolHostUnavailable):
+        client.run("crash", [])
+    after = client.run("ck", []).stdout
+
+    assert after != before
+    assert len(client.restarts) == 1
+
+
+def test_timeout_kills_stuck_host(client):
+    """Test that a job that never answers times out and the host is replaced."""
+    with pytest.raises(subprocess.TimeoutExpired):
+        client.run("hang", [], timeout=0.5)
+
+    assert client.run("ck", []).returncode == 0
+
+
+def test_stops_after_repeated_crashes(host_script):
+    """Test that a crash-looping host is reported unavailable."""
+    client = ToolHostClient(host_command=[sys.executable, host_script], max_restarts=2)
+    for _ in range(2):
+        with pytest.raises(ToolHostUnavailable):
+            client.run("crash", [])
+
+    assert not client.available()
+    client.close()
+
+
+def test_run_tool_falls_back_to_subprocess():
+    """Test that tools run as a subprocess without a usable host."""
+    fallback = [sys.executable, "-c", "print('fallback')"]
+    missing = ToolHostClient(host_command=["no-such-java-binary", "ToolHost.java"])
+
+    for host in (None, missing):
+        result = run_tool(host, "pmd", [], fallback, capture_output=True, text=True)
+        assert result.stdout.strip() == "fallback"
+
+
+def test_run_tool_check_raises_for_host_failures(client):
+    """Test that check=True turns a non-zero host exit code into CalledProcessError."""
+    client.run = lambda *args, **kwargs: subprocess.CompletedProcess(["pmd"], 4, "", "")
+
+    with pytest.raises(subprocess.CalledProcessError):
+        run_tool(client, "pmd", [], ["pmd"], check=True)
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="uses a shell script as the java command")
+def test_host_is_not_started_on_jdk_without_security_manager(tmp_path, host_script):
+    """Test that JDK 24 and later, which cannot start the host, fall back to subprocesses."""
+    def fake_java(version):
+        path = tmp_path / f"java{version.split('.')[0]}"
+        path.write_text(f"#!/bin/sh\necho 'openjdk version \"{version}\" 2025-01-01' >&2\n")
+        path.chmod(0o755)
+        return str(path)
+
+    assert java_major_version(fake_java("1.8.0_392")) == 8
+    assert java_major_version(str(tmp_path / "missing")) is None
+    assert ToolHostClient(java_cmd=fake_java("17.0.2"), host_source=host_script).available()
+    assert not ToolHostClient(java_cmd=fake_java("24.0.1"), host_source=host_script).available()
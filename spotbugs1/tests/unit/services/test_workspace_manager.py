@@ -0,0 +1,114 @@
+import os
+import pytest
+from app.services.WorkspaceManager import Workspace, WorkspaceManager
+
+
+@pytest.fixture
+def manager(tmp_path):
+    """Create a WorkspaceManager rooted in a temporary directory."""
+    return WorkspaceManager(str(tmp_path / "workspaces"))
+
+
+def _fill(workspace, size):
+    with open(os.path.join(workspace.clone_dir, "Big.java"), "w") as f:
+        f.write("x" * size)
+
+
+def test_workspaces_are_isolated(manager):
+    """Test that each id gets its own clone, bin, report and CK directories."""
+    first = manager.get("alice")
+    second = manager.get("bob")
+
+    for workspace in (first, second):
+        for path in (workspace.clone_dir, workspace.bin_dir, workspace.report_dir,
+                     workspace.ck_output_dir, workspace.temp_ck_dir, workspace.pmd_cache_dir):
+            assert os.path.isdir(path)
+    assert first.clone_dir != second.clone_dir
+    assert manager.get("alice") is first
+
+
+def test_invalid_ids_are_rejected(manager):
+    """Test that ids cannot point outside the workspace root."""
+    for workspace_id in ("", "../etc", "a/b"):
+        with pytest.raises(ValueError):
+            manager.get(workspace_id)
+
+
+def test_use_tracks_references(manager):
+    """Test that a workspace is held while in use and released afterwards."""
+    with manager.use("alice") as workspace:
+        assert workspace.references == 1
+        assert not manager.remove("alice")
+    assert workspace.references == 0
+    assert manager.remove("alice")
+    assert not os.path.exists(workspace.root)
+
+
+def test_evicts_least_recently_used_over_budget(tmp_path):
+    """Test that idle workspaces are deleted oldest first until under the disk budget."""
+    evicted = []
+    manager = WorkspaceManager(str(tmp_path / "ws"), max_bytes=1500,
+                               on_evict=evicted.append)
+    old = manager.get("old")
+    _fill(old, 1000)
+    newer = manager.get("newer")
+    _fill(newer, 1000)
+    old.last_used, newer.last_used = 1, 2
+
+    assert manager.evict() == ["old"]
+    assert evicted == ["old"]
+    assert [w.id for w in manager.list()] == ["newer"]
+
+
+def test_workspaces_in_use_are_not_evicted(tmp_path):
+    """Test that the workspace count limit skips workspaces someone holds."""
+    manager = WorkspaceManager(str(tmp_path / "ws"), max_workspaces=1)
+    held = manager.acquire("held")
+    held.last_used = 0
+    manager.acquire("other")
+
+    assert {w.id for w in manager.list()} == {"held", "other"}
+    manager.release(held)
+    assert manager.evict() == ["held"]
+
+
+def test_eviction_runs_on_creation_and_reuses_sizes(tmp_path, monkeypatch):
+    """Test that requests on existing workspaces do not re-measure every workspace."""
+    manager = WorkspaceManager(str(tmp_path / "ws"), max_bytes=10 ** 9)
+    manager.release(manager.acquire("first"))
+    measured = []
+    original = Workspace.disk_usage
+    monkeypatch.setattr(Workspace, "disk_usage",
+                        lambda self: measured.append(self.id) or original(self))
+
+    manager.release(manager.acquire("first"))
+    assert measured == []
+    manager.release(manager.acquire("second"))
+    assert sorted(measured) == ["first", "second"]
+    measured.clear()
+    # "second" was used after it was measured; "first" was not
+    manager.release(manager.acquire("third"))
+    assert sorted(measured) == ["second", "third"]
+
+
+def test_removed_id_is_recreated_empty(manager):
+    """Test that an id used again after removal gets fresh directories."""
+    _fill(manager.get("alice"), 10)
+    assert manager.remove("alice")
+
+    workspace = manager.get("alice")
+    assert os.listdir(workspace.clone_dir) == []
+    assert not [e for e in os.listdir(manager.root_dir) if e.startswith(".deleting-")]
+
+
+@pytest.mark.skipif(os.name == "nt", reason="cross-process holds use flock")
+def test_workspace_held_by_another_worker_is_not_evicted(tmp_path):
+    """Test that a second manager over the same root cannot remove a held workspace."""
+    worker = WorkspaceManager(str(tmp_path / "ws"))
+    other = WorkspaceManager(str(tmp_path / "ws"))
+    held = worker.acquire("alice")
+    other.get("alice")
+
+    assert not other.remove("alice")
+    worker.release(held)
+    assert other.remove("alice")
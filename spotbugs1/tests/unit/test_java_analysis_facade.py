@@ -1,5 +1,6 @@
 import pytest
 import os
+import threading
 from unittest.mock import patch, MagicMock
 from app.JavaAnalysisFacade import JavaAnalysisFacade
 
@@ -122,6 +123,64 @@ def test_validate_bug(facade):
         assert result is True
 
 
+def test_targeted_pmd_validation_reports_cached_other_bugs(facade, sample_java_file):
+    """Test that a single-rule PMD validation takes other bugs from the cached full run."""
+    cached = [{"type": "EmptyCatchBlock", "line": 3}, {"type": "UnusedPrivateField", "line": 2}]
+    facade._update_cache("Test.java", cached, {}, 'pmd')
+    with patch('app.services.Validator.Validator.validate_bug') as mock_validate:
+        mock_validate.return_value = {
+            'bug_fixed': True, 'other_bugs': [], 'other_bugs_checked': False}
+
+        result = facade.validate_bug("Test.java", "3", "EmptyCatchBlock", tool='pmd')
+
+    assert result['bug_fixed'] is True
+    assert result['other_bugs'] == [{"type": "UnusedPrivateField", "line": 2}]
+
+
+def test_targeted_validation_reports_bugs_found_before_the_patch(facade, sample_java_file):
+    """Test that other bugs of a patched file come from the results for its contents before the patch."""
+    cached = [{"type": "EmptyCatchBlock", "line": 3}, {"type": "UnusedPrivateField", "line": 2}]
+    facade._update_cache("Test.java", cached, {}, 'pmd')
+
+    def patch_file(file_path, code_snippet, solution, solution_number):
+        with open(sample_java_file, "a") as f:
+            f.write("// patched\n")
+        return "patched", "success"
+
+    with patch('app.services.SolutionApplier.SolutionApplier.apply_solution', side_effect=patch_file), \
+            patch('app.services.MetricAnalyzer.CKMetricsAnalyzer.get_original_metrics', return_value=[]), \
+            patch('app.services.MetricAnalyzer.SolutionMetricsAnalyzer.calculate_metrics_for_applied_solution',
+                  return_value=[]):
+        facade.apply_solution("Test.java", "catch (Exception e) {}", "catch (Exception e) { log(e); }")
+    with patch('app.services.Validator.Validator.validate_bug') as mock_validate:
+        mock_validate.return_value = {
+            'bug_fixed': True, 'other_bugs': [], 'other_bugs_checked': False}
+
+        result = facade.validate_bug("Test.java", "3", "EmptyCatchBlock", tool='pmd')
+
+    assert result['other_bugs'] == [{"type": "UnusedPrivateField", "line": 2}]
+    # The lookup of the patched contents did not drop the results of the original ones
+    assert facade._get_cached_data(
+        "Test.java", 'pmd', content_digest=facade._pre_patch_digest("Test.java"))[0] == cached
+
+
+def test_targeted_spotbugs_validation_keeps_other_cached_findings(facade, sample_java_file):
+    """Test that validating one bug with its detectors alone keeps reporting the file's other findings."""
+    cached = [{"file": "Test.java", "type": "DM_DEFAULT_ENCODING", "line": "4"},
+              {"file": "Test.java", "type": "URF_UNREAD_FIELD", "line": "2"}]
+    facade._update_cache("Test.java", cached, {}, 'spotbugs')
+    facade.build_system_manager.compile_java_files = MagicMock(return_value=True)
+
+    with patch('app.services.BugAnalyzer.BugAnalyzer.run_targeted_analysis', return_value=True), \
+            patch('app.services.BugAnalyzer.BugAnalyzer.parse_spotbugs_xml', return_value=[]):
+        first = facade.validate_bug("Test.java", "4", "DM_DEFAULT_ENCODING")
+        second = facade.validate_bug("Test.java", "2", "URF_UNREAD_FIELD")
+
+    assert first['bug_fixed'] and first['other_bugs_checked']
+    assert [bug["type"] for bug in first['other_bugs']] == ["URF_UNREAD_FIELD"]
+    assert [bug["type"] for bug in second['other_bugs']] == ["DM_DEFAULT_ENCODING"]
+
+
 def test_list_java_files(facade, sample_java_file):
     """Test listing Java files from output directory."""
     files = facade.list_java_files()
@@ -143,3 +202,205 @@ def test_repository_name_persistence(facade):
         # Second analysis
         facade.analyze_github_repository("https://github.com/test/repo2")
         assert facade.repo_name == "test/repo2"
+
+
+def test_spotbugs_runs_once_per_repository(facade, test_output_dir, test_bin_dir):
+    """Test that SpotBugs results for several files come from a single indexed run."""
+    for name in ("A", "B"):
+        with open(os.path.join(test_output_dir, f"{name}.java"), "w") as f:
+            f.write(f"public class {name} {{}}")
+        open(os.path.join(test_bin_dir, f"{name}.class"), "wb").close()
+
+    # The classes are already built, so the build result cache answers
+    facade.build_system_manager.compile_java_files = MagicMock(return_value=True)
+
+    with patch('app.services.BugAnalyzer.BugAnalyzer.run_spotbugs_analysis') as mock_spotbugs, \
+            patch('app.services.BugAnalyzer.BugAnalyzer.parse_spotbugs_index') as mock_parse, \
+            patch('app.services.BugAnalyzer.BugAnalyzer.extract_code_snippet', return_value=""), \
+            patch('app.services.MetricAnalyzer.CKMetricsAnalyzer.get_original_metrics', return_value=[]):
+
+        mock_parse.return_value = {
+            "a.java": [{"file": "A.java", "line": "1", "type": "BUG_A", "description": ""}],
+            "b.java": [{"file": "B.java", "line": "1", "type": "BUG_B", "description": ""}],
+        }
+
+        _, bugs_a, _, _ = facade.analyze_file("A.java")
+        _, bugs_b, _, _ = facade.analyze_file("B.java")
+
+        assert mock_spotbugs.call_count == 1
+        assert [bug["type"] for bug in bugs_a] == ["BUG_A"]
+        assert [bug["type"] for bug in bugs_b] == ["BUG_B"]
+
+
+def test_pmd_runs_once_per_repository(facade, test_output_dir):
+    """Test that PMD results for several files come from one repository-wide run."""
+    for name in ("A", "B"):
+        with open(os.path.join(test_output_dir, f"{name}.java"), "w") as f:
+            f.write(f"public class {name} {{}}")
+
+    with patch('app.services.PMDAnalyzer.PMDAnalyzer._run_pmd', return_value=True) as mock_pmd, \
+            patch('app.services.PMDAnalyzer.PMDAnalyzer.parse_pmd_index') as mock_parse, \
+            patch('app.services.MetricAnalyzer.CKMetricsAnalyzer.get_original_metrics', return_value=[]):
+        mock_parse.return_value = {
+            os.path.normpath(os.path.abspath(os.path.join(test_output_dir, "A.java")))
+            .replace('\\', '/').strip('/').lower(): [{"line": 1, "type": "UnusedPrivateField"}]}
+
+        _, bugs_a, _, _ = facade.analyze_file("A.java", "pmd")
+        _, bugs_b, _, _ = facade.analyze_file("B.java", "pmd")
+
+    assert mock_pmd.call_count == 1
+    assert len(mock_pmd.call_args[0][0]) == 2
+    assert [bug["type"] for bug in bugs_a] == ["UnusedPrivateField"]
+    assert bugs_b == []
+
+
+def test_workspace_facades_do_not_share_directories(tmp_path, mock_github_token, test_store_path):
+    """Test that facades built on different workspaces write to separate directories."""
+    from app.services.WorkspaceManager import WorkspaceManager
+
+    manager = WorkspaceManager(str(tmp_path / "workspaces"))
+    facades = [
+        JavaAnalysisFacade(github_token=mock_github_token, workspace=manager.get(name),
+                           analysis_store_path=test_store_path, enable_warmup=False)
+        for name in ("alice", "bob")
+    ]
+
+    for facade, name in zip(facades, ("alice", "bob")):
+        workspace = manager.get(name)
+        assert facade.output_dir == workspace.clone_dir
+        assert facade.github_fetcher.output_dir == workspace.clone_dir
+        assert facade.spotbugs_analyzer.bin_dir == workspace.bin_dir
+        assert facade.build_system_manager.repo_root_dir == workspace.clone_dir
+        assert facade.validator.report_dir == workspace.report_dir
+        assert facade.ck_metrics.src_dir == workspace.clone_dir
+        assert facade.ck_metrics.output_dir == workspace.ck_output_dir
+        assert facade.solution_applier.temp_dir == workspace.temp_ck_dir
+    assert facades[0].ck_metrics.metrics_cache.generate_key("A.java", "original") != \
+        facades[1].ck_metrics.metrics_cache.generate_key("A.java", "original")
+
+
+def test_workspace_facade_adopts_repository_of_other_worker(tmp_path, mock_github_token, test_store_path):
+    """Test that a facade created by another worker keeps the workspace's classes and repository state."""
+    from app.services.WorkspaceManager import WorkspaceManager
+
+    workspace = WorkspaceManager(str(tmp_path / "workspaces")).get("alice")
+    first = JavaAnalysisFacade(github_token=mock_github_token, workspace=workspace,
+                               analysis_store_path=test_store_path, enable_warmup=False)
+    with patch('app.services.CodeFetcher.CodeFetcher.clone_repo'), \
+            patch('app.services.CodeFetcher.CodeFetcher.is_fork', return_value=False), \
+            patch('app.services.CodeFetcher.CodeFetcher.current_commit_sha', return_value="abc123"), \
+            patch('app.services.CodeFetcher.CodeFetcher.fetch_java_files_from_local_clone', return_value=[]):
+        first.analyze_github_repository("https://github.com/test/repo")
+    class_file = os.path.join(workspace.bin_dir, "A.class")
+    open(class_file, "wb").close()
+    first._store_initial_metrics("A.java", {"loc": 3})
+    with open(first._spotbugs_report_path, "w") as f:
+        f.write("<BugCollection/>")
+
+    second = JavaAnalysisFacade(github_token=mock_github_token, workspace=workspace,
+                                analysis_store_path=test_store_path, enable_warmup=False)
+
+    assert os.path.exists(class_file)
+    assert second.repo_name == "test/repo"
+    assert second.ck_metrics.commit_sha == "abc123"
+    assert second._initial_metrics("A.java") == {"loc": 3}
+    with patch('app.services.BugAnalyzer.BugAnalyzer.run_repository_analysis') as mock_run, \
+            patch('app.services.BugAnalyzer.BugAnalyzer.parse_spotbugs_index',
+                  return_value={"a.java": []}):
+        index, profile = second._get_spotbugs_index()
+    assert not mock_run.called
+    assert index == {"a.java": []}
+
+
+def test_concurrent_identical_requests_share_one_analysis(facade, test_output_dir, test_bin_dir):
+    """Test that simultaneous requests for the same file and tool run SpotBugs and CK once."""
+    import threading
+    import time
+    from app.services.AnalysisCache import digest_text
+
+    with open(os.path.join(test_output_dir, "A.java"), "w") as f:
+        f.write("public class A {}")
+    open(os.path.join(test_bin_dir, "A.class"), "wb").close()
+    # The classes are already built, so the build result cache answers
+    facade.build_system_manager.compile_java_files = MagicMock(return_value=True)
+
+    release = threading.Event()
+
+    def slow_spotbugs(*args, **kwargs):
+        release.wait(5)
+        return {"a.java": [{"file": "A.java", "line": "1", "type": "BUG_A", "description": ""}]}
+
+    with patch('app.services.BugAnalyzer.BugAnalyzer.run_repository_analysis', side_effect=slow_spotbugs) as mock_spotbugs, \
+            patch('app.services.BugAnalyzer.BugAnalyzer.extract_code_snippet', return_value=""), \
+            patch('app.services.MetricAnalyzer.CKMetricsAnalyzer.get_original_metrics', return_value=[{"wmc": "1"}]) as mock_ck:
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(facade.analyze_file("A.java")))
+                   for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        # Hold SpotBugs until the other two requests are waiting on the first
+        key = ("analyze", facade._workspace_key(),
+               digest_text("public class A {}"), "spotbugs", None)
+        deadline = time.time() + 5
+        while time.time() < deadline and not (
+                facade._inflight.in_flight(key) and facade._inflight._calls[key].waiters == 2):
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        assert facade._inflight._calls == {}
+        assert mock_spotbugs.call_count == 1
+        assert mock_ck.call_count == 1
+        assert [[bug["type"] for bug in r[1]] for r in results] == [["BUG_A"]] * 3
+
+
+def test_quick_profile_results_are_upgraded_by_deep_pass(facade, test_output_dir, test_bin_dir):
+    """Test that a slow repository gets quick results first and deep results once the background pass ends."""
+    with open(os.path.join(test_output_dir, "A.java"), "w") as f:
+        f.write("public class A {}")
+    open(os.path.join(test_bin_dir, "A.class"), "wb").close()
+    # The classes are already built, so the build result cache answers
+    facade.build_system_manager.compile_java_files = MagicMock(return_value=True)
+    deep_may_finish = threading.Event()
+
+    def fake_repository_analysis(report_path, bug_descriptions, profile=None):
+        if profile == "deep":
+            deep_may_finish.wait(5)
+        return {"a.java": [{"file": "A.java", "line": "1", "type": f"{profile.upper()}_BUG", "description": ""}]}
+
+    with patch.object(facade.spotbugs_analyzer, 'choose_profile', return_value="quick"), \
+            patch.object(facade.spotbugs_analyzer, 'run_repository_analysis',
+                         side_effect=fake_repository_analysis) as mock_run, \
+            patch('app.services.BugAnalyzer.BugAnalyzer.extract_code_snippet', return_value=""), \
+            patch('app.services.MetricAnalyzer.CKMetricsAnalyzer.get_original_metrics', return_value=[]):
+
+        _, bugs, _, _ = facade.analyze_file("A.java")
+        assert [bug["type"] for bug in bugs] == ["QUICK_BUG"]
+
+        deep_may_finish.set()
+        facade._deep_pass.join(5)
+        _, bugs, _, _ = facade.analyze_file("A.java")
+
+        assert [bug["type"] for bug in bugs] == ["DEEP_BUG"]
+        assert [call.args[2] for call in mock_run.call_args_list] == ["quick", "deep"]
+
+
+def test_explicit_profile_overrides_automatic_choice(facade, test_output_dir, test_bin_dir):
+    """Test that a per-request profile skips the automatic choice."""
+    with open(os.path.join(test_output_dir, "A.java"), "w") as f:
+        f.write("public class A {}")
+    open(os.path.join(test_bin_dir, "A.class"), "wb").close()
+    # The classes are already built, so the build result cache answers
+    facade.build_system_manager.compile_java_files = MagicMock(return_value=True)
+
+    with patch.object(facade.spotbugs_analyzer, 'choose_profile') as mock_choose, \
+            patch.object(facade.spotbugs_analyzer, 'run_repository_analysis', return_value={}) as mock_run, \
+            patch('app.services.MetricAnalyzer.CKMetricsAnalyzer.get_original_metrics', return_value=[]):
+
+        facade.analyze_file("A.java", profile="deep")
+
+        assert not mock_choose.called
+        assert mock_run.call_args.args[2] == "deep"
+        assert facade._deep_pass is None
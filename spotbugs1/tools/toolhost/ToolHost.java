@@ -0,0 +1,456 @@
+import java.io.BufferedReader;
+import java.io.ByteArrayInputStream;
+import java.io.ByteArrayOutputStream;
+import java.io.FileOutputStream;
+import java.io.FileDescriptor;
+import java.io.InputStreamReader;
+import java.io.PrintStream;
+import java.lang.reflect.InvocationTargetException;
+import java.lang.reflect.Method;
+import java.net.URL;
+import java.net.URLClassLoader;
+import java.nio.charset.StandardCharsets;
+import java.nio.file.Paths;
+import java.security.Permission;
+import java.util.ArrayList;
+import java.util.HashMap;
+import java.util.LinkedHashMap;
+import java.util.List;
+import java.util.Map;
+import java.util.jar.JarFile;
+import javax.tools.JavaCompiler;
+import javax.tools.ToolProvider;
+
+/**
+ * Long-lived JVM that runs Java tools in-process so each job skips JVM startup.
+ *
+ * Reads one JSON request per line on stdin and writes one JSON response per
+ * line on stdout:
+ *
+ *   {"id": 1, "tool": "pmd", "main": "net.sourceforge.pmd.cli.PmdCli",
+ *    "classpath": ["/path/a.jar", ...], "args": ["check", ...]}
+ *   {"id": 1, "exit": 4, "stdout": "...", "stderr": "...", "error": null}
+ *
+ * Each classpath gets its own class loader, created once and reused, so tool
+ * jars are loaded and JIT-compiled only once. "main" may be omitted to use the
+ * Main-Class of the first jar. The tool "javac" runs the system compiler and
+ * "ping" just answers. Calls to System.exit() inside a tool are trapped and
+ * reported as the exit code. Jobs run one at a time; the Python client
+ * restarts this process if it dies and recycles it after a number of jobs.
+ *
+ * Start with: java -Djava.security.manager=allow ToolHost.java
+ */
+public final class ToolHost {
+
+    private static final class ExitTrapped extends SecurityException {
+        final int status;
+
+        ExitTrapped(int status) {
+            super("System.exit(" + status + ") trapped");
+            this.status = status;
+        }
+    }
+
+    private static final class ExitTrap extends SecurityManager {
+        volatile boolean trapping;
+
+        @Override
+        public void checkPermission(Permission perm) {
+        }
+
+        @Override
+        public void checkPermission(Permission perm, Object context) {
+        }
+
+        @Override
+        public void checkExit(int status) {
+            if (trapping) {
+                throw new ExitTrapped(status);
+            }
+        }
+    }
+
+    private final Map<String, ClassLoader> loaders = new HashMap<>();
+    private final Map<String, Method> mains = new HashMap<>();
+    private final ExitTrap exitTrap = new ExitTrap();
+    private final PrintStream protocolOut;
+
+    private ToolHost(PrintStream protocolOut) {
+        this.protocolOut = protocolOut;
+    }
+
+    public static void main(String[] argv) throws Exception {
+        // Keep the real stdout for responses; tools only ever see per-job buffers
+        PrintStream protocolOut = new PrintStream(
+                new FileOutputStream(FileDescriptor.out), true, "UTF-8");
+        BufferedReader requests = new BufferedReader(
+                new InputStreamReader(System.in, StandardCharsets.UTF_8));
+        System.setIn(new ByteArrayInputStream(new byte[0]));
+
+        ToolHost host = new ToolHost(protocolOut);
+        try {
+            System.setSecurityManager(host.exitTrap);
+        } catch (UnsupportedOperationException e) {
+            // Newer JDKs cannot trap System.exit; the client restarts us if a tool calls it
+            System.err.println("[TOOLHOST] Cannot trap System.exit: " + e.getMessage());
+        }
+        host.respond(mapOf("ready", Boolean.TRUE));
+
+        String line;
+        while ((line = requests.readLine()) != null) {
+            if (line.trim().isEmpty()) {
+                continue;
+            }
+            host.respond(host.handle(line));
+        }
+    }
+
+    private Map<String, Object> handle(String line) {
+        Object id = null;
+        Map<String, Object> response = new LinkedHashMap<>();
+        ByteArrayOutputStream out = new ByteArrayOutputStream();
+        ByteArrayOutputStream err = new ByteArrayOutputStream();
+        int exit = 0;
+        String error = null;
+        try {
+            Map<String, Object> request = Json.parseObject(line);
+            id = request.get("id");
+            String tool = (String) request.get("tool");
+            List<String> args = strings(request.get("args"));
+            List<String> classpath = strings(request.get("classpath"));
+            String mainClass = (String) request.get("main");
+
+            if ("ping".equals(tool)) {
+                exit = 0;
+            } else if ("javac".equals(tool)) {
+                exit = runJavac(args, out, err);
+            } else {
+                exit = runMain(classpath, mainClass, args, out, err);
+            }
+        } catch (Throwable t) {
+            exit = 1;
+            error = t.toString();
+        }
+        response.put("id", id);
+        response.put("exit", exit);
+        response.put("stdout", new String(out.toByteArray(), StandardCharsets.UTF_8));
+        response.put("stderr", new String(err.toByteArray(), StandardCharsets.UTF_8));
+        response.put("error", error);
+        return response;
+    }
+
+    private int runJavac(List<String> args, ByteArrayOutputStream out, ByteArrayOutputStream err) {
+        JavaCompiler compiler = ToolProvider.getSystemJavaCompiler();
+        if (compiler == null) {
+            throw new IllegalStateException("No system Java compiler; the tool host needs a JDK");
+        }
+        return compiler.run(null, out, err, args.toArray(new String[0]));
+    }
+
+    private int runMain(List<String> classpath, String mainClass, List<String> args,
+            ByteArrayOutputStream out, ByteArrayOutputStream err) throws Throwable {
+        Method main = mainMethod(classpath, mainClass);
+        PrintStream originalOut = System.out;
+        PrintStream originalErr = System.err;
+        Thread thread = Thread.currentThread();
+        ClassLoader originalContext = thread.getContextClassLoader();
+        PrintStream jobOut = new PrintStream(out, true, "UTF-8");
+        PrintStream jobErr = new PrintStream(err, true, "UTF-8");
+        System.setOut(jobOut);
+        System.setErr(jobErr);
+        thread.setContextClassLoader(main.getDeclaringClass().getClassLoader());
+        exitTrap.trapping = true;
+        try {
+            main.invoke(null, (Object) args.toArray(new String[0]));
+            return 0;
+        } catch (InvocationTargetException e) {
+            Throwable cause = e.getCause();
+            if (cause instanceof ExitTrapped) {
+                return ((ExitTrapped) cause).status;
+            }
+            throw cause;
+        } catch (ExitTrapped e) {
+            return e.status;
+        } finally {
+            exitTrap.trapping = false;
+            thread.setContextClassLoader(originalContext);
+            jobOut.flush();
+            jobErr.flush();
+            System.setOut(originalOut);
+            System.setErr(originalErr);
+        }
+    }
+
+    private Method mainMethod(List<String> classpath, String mainClass) throws Exception {
+        if (classpath.isEmpty()) {
+            throw new IllegalArgumentException("A classpath is required");
+        }
+        String key = String.join(java.io.File.pathSeparator, classpath) + "!" + mainClass;
+        Method main = mains.get(key);
+        if (main != null) {
+            return main;
+        }
+        String loaderKey = String.join(java.io.File.pathSeparator, classpath);
+        ClassLoader loader = loaders.get(loaderKey);
+        if (loader == null) {
+            URL[] urls = new URL[classpath.size()];
+            for (int i = 0; i < urls.length; i++) {
+                urls[i] = Paths.get(classpath.get(i)).toUri().toURL();
+            }
+            // Tools never see each other's jars, only the platform classes
+            loader = new URLClassLoader(urls, ClassLoader.getPlatformClassLoader());
+            loaders.put(loaderKey, loader);
+        }
+        if (mainClass == null || mainClass.isEmpty()) {
+            try (JarFile jar = new JarFile(classpath.get(0))) {
+                mainClass = jar.getManifest().getMainAttributes().getValue("Main-Class");
+            }
+        }
+        main = loader.loadClass(mainClass).getMethod("main", String[].class);
+        mains.put(key, main);
+        return main;
+    }
+
+    private void respond(Map<String, Object> response) {
+        protocolOut.println(Json.write(response));
+        protocolOut.flush();
+    }
+
+    @SuppressWarnings("unchecked")
+    private static List<String> strings(Object value) {
+        List<String> result = new ArrayList<>();
+        if (value instanceof List) {
+            for (Object item : (List<Object>) value) {
+                result.add(String.valueOf(item));
+            }
+        }
+        return result;
+    }
+
+    private static Map<String, Object> mapOf(String key, Object value) {
+        Map<String, Object> map = new LinkedHashMap<>();
+        map.put(key, value);
+        return map;
+    }
+
+    /** Just enough JSON for the request and response shapes above. */
+    static final class Json {
+        private final String text;
+        private int pos;
+
+        private Json(String text) {
+            this.text = text;
+        }
+
+        @SuppressWarnings("unchecked")
+        static Map<String, Object> parseObject(String text) {
+            Json parser = new Json(text);
+            Object value = parser.value();
+            if (!(value instanceof Map)) {
+                throw new IllegalArgumentException("Expected a JSON object");
+            }
+            return (Map<String, Object>) value;
+        }
+
+        private Object value() {
+            skipWhitespace();
+            char c = text.charAt(pos);
+            switch (c) {
+                case '{':
+                    return object();
+                case '[':
+                    return array();
+                case '"':
+                    return string();
+                case 't':
+                    return literal("true", Boolean.TRUE);
+                case 'f':
+                    return literal("false", Boolean.FALSE);
+                case 'n':
+                    return literal("null", null);
+                default:
+                    return number();
+            }
+        }
+
+        private Map<String, Object> object() {
+            Map<String, Object> map = new LinkedHashMap<>();
+            pos++;
+            skipWhitespace();
+            if (text.charAt(pos) == '}') {
+                pos++;
+                return map;
+            }
+            while (true) {
+                skipWhitespace();
+                String key = string();
+                skipWhitespace();
+                expect(':');
+                map.put(key, value());
+                skipWhitespace();
+                if (text.charAt(pos) == ',') {
+                    pos++;
+                    continue;
+                }
+                expect('}');
+                return map;
+            }
+        }
+
+        private List<Object> array() {
+            List<Object> list = new ArrayList<>();
+            pos++;
+            skipWhitespace();
+            if (text.charAt(pos) == ']') {
+                pos++;
+                return list;
+            }
+            while (true) {
+                list.add(value());
+                skipWhitespace();
+                if (text.charAt(pos) == ',') {
+                    pos++;
+                    continue;
+                }
+                expect(']');
+                return list;
+            }
+        }
+
+        private String string() {
+            expect('"');
+            StringBuilder sb = new StringBuilder();
+            while (true) {
+                char c = text.charAt(pos++);
+                if (c == '"') {
+                    return sb.toString();
+                }
+                if (c != '\\') {
+                    sb.append(c);
+                    continue;
+                }
+                char escaped = text.charAt(pos++);
+                switch (escaped) {
+                    case 'n':
+                        sb.append('\n');
+                        break;
+                    case 't':
+                        sb.append('\t');
+                        break;
+                    case 'r':
+                        sb.append('\r');
+                        break;
+                    case 'b':
+                        sb.append('\b');
+                        break;
+                    case 'f':
+                        sb.append('\f');
+                        break;
+                    case 'u':
+                        sb.append((char) Integer.parseInt(text.substring(pos, pos + 4), 16));
+                        pos += 4;
+                        break;
+                    default:
+                        sb.append(escaped);
+                }
+            }
+        }
+
+        private Object number() {
+            int start = pos;
+            while (pos < text.length() && "+-0123456789.eE".indexOf(text.charAt(pos)) >= 0) {
+                pos++;
+            }
+            String number = text.substring(start, pos);
+            if (number.isEmpty()) {
+                throw new IllegalArgumentException("Unexpected character at " + start);
+            }
+            if (number.contains(".") || number.contains("e") || number.contains("E")) {
+                return Double.parseDouble(number);
+            }
+            return Long.parseLong(number);
+        }
+
+        private Object literal(String word, Object value) {
+            if (!text.startsWith(word, pos)) {
+                throw new IllegalArgumentException("Unexpected token at " + pos);
+            }
+            pos += word.length();
+            return value;
+        }
+
+        private void expect(char c) {
+            if (text.charAt(pos) != c) {
+                throw new IllegalArgumentException("Expected '" + c + "' at " + pos);
+            }
+            pos++;
+        }
+
+        private void skipWhitespace() {
+            while (pos < text.length() && Character.isWhitespace(text.charAt(pos))) {
+                pos++;
+            }
+        }
+
+        static String write(Object value) {
+            StringBuilder sb = new StringBuilder();
+            write(sb, value);
+            return sb.toString();
+        }
+
+        @SuppressWarnings("unchecked")
+        private static void write(StringBuilder sb, Object value) {
+            if (value == null) {
+                sb.append("null");
+            } else if (value instanceof Map) {
+                sb.append('{');
+                boolean first = true;
+                for (Map.Entry<String, Object> entry : ((Map<String, Object>) value).entrySet()) {
+                    if (!first) {
+                        sb.append(',');
+                    }
+                    first = false;
+                    writeString(sb, entry.getKey());
+                    sb.append(':');
+                    write(sb, entry.getValue());
+                }
+                sb.append('}');
+            } else if (value instanceof Number || value instanceof Boolean) {
+                sb.append(value);
+            } else {
+                writeString(sb, value.toString());
+            }
+        }
+
+        private static void writeString(StringBuilder sb, String s) {
+            sb.append('"');
+            for (int i = 0; i < s.length(); i++) {
+                char c = s.charAt(i);
+                switch (c) {
+                    case '"':
+                        sb.append("\\\"");
+                        break;
+                    case '\\':
+                        sb.append("\\\\");
+                        break;
+                    case '\n':
+                        sb.append("\\n");
+                        break;
+                    case '\r':
+                        sb.append("\\r");
+                        break;
+                    case '\t':
+                        sb.append("\\t");
+                        break;
+                    default:
+                        if (c < 0x20) {
+                            sb.append(String.format("\\u%04x", (int) c));
+                        } else {
+                            sb.append(c);
+                        }
+                }
+            }
+            sb.append('"');
+        }
+    }
+}